@@ -1,40 +1,665 @@
 import sys
 import os
+import hashlib
+import time
+from datetime import datetime, timezone
 
-from flask import Flask, render_template
+from flask import Flask, Response, abort, jsonify, render_template, request, url_for
 from dotenv import load_dotenv
 
-from cribl_api import get_cached_api_client
-from graph_generator import generate_graph
+from cache import TTLCache
+from cribl_api import DEFAULT_CONFIG_TTL, get_cached_api_client, get_cached_leader_clients, leaders_from_env
+from graph_diff import build_diff_graph, diff_graph_data, diff_summary
+from graph_generator import (
+    DEFAULT_FETCH_WORKERS,
+    build_graph,
+    build_graph_json,
+    build_group_graphs,
+    build_flow_graph,
+    build_summary_graph,
+    fetch_graph_data,
+    fetch_graph_data_async,
+    fetch_leaders,
+    fetch_leaders_async,
+    find_paths,
+    iter_graph_lines,
+)
+from metrics import REGISTRY
+from renderer import (
+    DEFAULT_LAYOUT_CACHE_SIZE,
+    DEFAULT_LAYOUT_WORKERS,
+    DEFAULT_RENDER_CACHE_BYTES,
+    compressed_copy,
+    configure_layout_cache,
+    configure_render_backend,
+    configure_render_cache,
+    content_encodings,
+    render_dot_lines,
+    render_graph,
+    render_stitched_svg,
+)
+from snapshot import SnapshotRefresher
+from snapshot_store import SnapshotStore, group_digest
+from vendor_assets import load_vendor_manifest
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# Maximum number of concurrent Cribl API calls made while building the graph
+FETCH_WORKERS = int(os.environ.get("CRIBL_FETCH_WORKERS", DEFAULT_FETCH_WORKERS))
+
+# Use the asyncio client, which fans out every API call of the leader at once
+USE_ASYNC_CLIENT = os.environ.get("CRIBL_ASYNC_CLIENT", "False").lower() == "true"
+
+# Upper bound, in bytes, of the rendered SVGs kept for unchanged graphs
+configure_render_cache(int(os.environ.get("CRIBL_RENDER_CACHE_BYTES", DEFAULT_RENDER_CACHE_BYTES)))
+
+# Number of layouts kept for re-rendering graphs whose topology did not change; 0 disables
+configure_layout_cache(int(os.environ.get("CRIBL_LAYOUT_CACHE_SIZE", DEFAULT_LAYOUT_CACHE_SIZE)))
+
+
+# Lay out each worker group of the full view in its own graphviz process and
+# stitch the results, instead of one layout of the whole graph
+PER_GROUP_LAYOUT = os.environ.get("CRIBL_PER_GROUP_LAYOUT", "False").lower() == "true"
+
+# Maximum number of graphviz processes run at once for per-group layout
+LAYOUT_WORKERS = int(os.environ.get("CRIBL_LAYOUT_WORKERS", DEFAULT_LAYOUT_WORKERS))
+
+
+# Stream the DOT source of the full view into graphviz instead of building it as
+# one string; saves memory on very large fleets but skips layout reuse
+STREAM_DOT = os.environ.get("CRIBL_STREAM_DOT", "False").lower() == "true"
+
+# "inprocess" renders through libgvc via the optional pygraphviz package instead
+# of a graphviz process per render; falls back to "subprocess" without it
+configure_render_backend(os.environ.get("CRIBL_RENDER_BACKEND", "subprocess").lower())
+
+
+# View of "/" when no view parameter is given: "full", "summary" for large fleets,
+# "groups" to load each group's graph separately as it scrolls into view, or
+# "client" to lay the graph out in the browser from /api/graph.json
+DEFAULT_VIEW = os.environ.get("CRIBL_DEFAULT_VIEW", "full").lower()
+
+
+VIEWS = ("full", "summary", "groups", "client")
+
+# Integrity values of the browser libraries of the client view, served from
+# static/vendor (see vendor_assets.py); None until they are downloaded
+VENDOR_ASSETS = load_vendor_manifest()
+
+# Named leaders that can be compared on /diff, e.g. "staging=https://staging:9000,prod=https://prod:9000"
+LEADERS = leaders_from_env()
+
+
+@app.context_processor
+def _leader_names():
+    return {"leader_names": list(LEADERS)}
+
+
+# Seconds the worker group listing is reused by the lazily loaded group graphs
+GROUP_LIST_TTL = float(os.environ.get("CRIBL_CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL))
+
+_group_list_cache = TTLCache(max_entries=1)
+
+
+def _worker_groups():
+    """
+    Lists the worker groups with the configured Cribl API client, reusing the
+    listing for GROUP_LIST_TTL seconds.
+
+    Returns:
+        dict: The get_worker_groups response.
+    """
+    groups = _group_list_cache.get("groups")
+    if groups is None:
+        if USE_ASYNC_CLIENT:
+            from cribl_api_async import get_cached_async_api_client, run_coroutine
+
+            groups = run_coroutine(get_cached_async_api_client().get_worker_groups())
+        else:
+            groups = get_cached_api_client().get_worker_groups()
+        if GROUP_LIST_TTL > 0:
+            _group_list_cache.set("groups", groups, ttl=GROUP_LIST_TTL)
+    return groups
+
+
+def _list_worker_groups():
+    """
+    Lists the worker group IDs with the configured Cribl API client.
+
+    Returns:
+        list: Worker group IDs in leader order.
+    """
+    return [group["id"] for group in _worker_groups().get("items", [])]
+
+
+# Overall time budget, in seconds, of fetching the graph for "/"; 0 waits for every group
+RENDER_BUDGET = float(os.environ.get("CRIBL_RENDER_BUDGET", "0"))
+
+# Data of each worker group as last fetched: group_id -> (group_data, fetched_at).
+# Groups that miss the budget are drawn from it, marked stale.
+_last_known_groups = {}
+
+# Directory of the on-disk snapshot store; unset keeps snapshots in memory only
+SNAPSHOT_DIR = os.environ.get("CRIBL_SNAPSHOT_DIR")
+snapshot_store = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+
+# Content hash of each group's data as last persisted: group_id -> digest
+_persisted_digests = {}
+
+
+def _restore_groups(store):
+    """
+    Makes the groups stored by a previous run the last-known data, whether or
+    not the background refresher is enabled.
+
+    Args:
+        store (SnapshotStore): The snapshot store to read.
+    """
+    try:
+        stored = store.load_groups()
+    except Exception as e:
+        print(f"Failed to restore stored group data: {e}")
+        return
+    for group_id, group_data, fetched_at in stored:
+        _last_known_groups[group_id] = (group_data, fetched_at)
+        _persisted_digests[group_id] = group_digest(group_data)
+
+
+if snapshot_store is not None:
+    # Groups of the previous run are the last-known data until they are fetched again
+    _restore_groups(snapshot_store)
+
+
+def _remember_groups(graph_data, fetched_at, complete=False):
+    """
+    Records freshly fetched group data as the last-known data of each group.
+
+    Fetches of every group, which include the background refreshes, also
+    persist it to the snapshot store so a restarted app can fall back to it;
+    the store is only written when a group's content changed. Fetches of
+    single groups stay in memory.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs, as returned by fetch_graph_data.
+        fetched_at (float): Unix time of the fetch.
+        complete (bool): True if graph_data covers every worker group of the leader.
+    """
+    fresh = [(group_id, group_data) for group_id, group_data in graph_data if not _is_late(group_data)]
+    for group_id, group_data in fresh:
+        _last_known_groups[group_id] = (group_data, fetched_at)
+    if snapshot_store is None or not complete or not fresh:
+        return
+    digests = {group_id: group_digest(group_data) for group_id, group_data in fresh}
+    # Stored groups are only dropped when every group of the leader was fetched
+    replace = len(fresh) == len(graph_data)
+    changed = [(group_id, group_data) for group_id, group_data in fresh
+               if _persisted_digests.get(group_id) != digests[group_id]]
+    removed = replace and set(_persisted_digests) - set(digests)
+    if not changed and not removed:
+        return
+    try:
+        snapshot_store.save_groups(fresh if replace else changed, fetched_at, replace=replace)
+    except Exception as e:
+        print(f"Failed to persist fetched group data: {e}")
+        return
+    if replace:
+        _persisted_digests.clear()
+    _persisted_digests.update(digests)
+
+
+def _is_late(group_data):
+    """
+    Returns True for group data drawn in place of a fetch that missed its deadline or failed.
+    """
+    return group_data.get("stale_since") is not None or group_data.get("unavailable", False)
+
+
+def _fetch_graph_data(group_ids=None, budget=None, groups=None):
+    """
+    Fetches the graph data with the configured Cribl API client.
+
+    Args:
+        group_ids (iterable, optional): Only fetch these worker groups.
+        budget (float, optional): Seconds to wait for the leader. Groups that
+            have not arrived by then are returned from their last-known data.
+        groups (dict, optional): A worker group listing to use instead of listing them again.
+
+    Returns:
+        list: (group_id, group_data) pairs, as returned by fetch_graph_data.
+    """
+    deadline = time.monotonic() + budget if budget else None
+    if USE_ASYNC_CLIENT:
+        from cribl_api_async import get_cached_async_api_client, run_coroutine
+
+        graph_data = run_coroutine(fetch_graph_data_async(
+            get_cached_async_api_client(), group_ids=group_ids, deadline=deadline,
+            last_known=_last_known_groups.get, groups=groups,
+        ))
+    else:
+        api_client = get_cached_api_client()
+        graph_data = fetch_graph_data(
+            api_client, max_workers=FETCH_WORKERS, group_ids=group_ids, deadline=deadline,
+            last_known=_last_known_groups.get, groups=groups,
+        )
+    _remember_groups(graph_data, time.time(), complete=group_ids is None)
+    return graph_data
+
+
+def _fetch_leaders(names):
+    """
+    Fetches the graph data of named leaders of CRIBL_LEADERS concurrently
+    with the configured Cribl API clients.
+
+    Args:
+        names (iterable): Leader names; a name given twice is fetched once.
+
+    Returns:
+        dict: Leader name -> (group_id, group_data) pairs.
+    """
+    if USE_ASYNC_CLIENT:
+        from cribl_api_async import get_cached_async_leader_clients, run_coroutine
+
+        api_clients = get_cached_async_leader_clients()
+        return run_coroutine(fetch_leaders_async({name: api_clients[name] for name in names}))
+    api_clients = get_cached_leader_clients()
+    return fetch_leaders({name: api_clients[name] for name in names}, max_workers=FETCH_WORKERS)
+
+
+def _generate_dot(view="full", expand=(), group_url=None, graph_data=None):
+    """
+    Generates the graph with the configured Cribl API client.
+
+    Args:
+        view (str): "full" draws every input and output; "summary" draws one node per group.
+        expand (iterable): Groups drawn in full in the summary view.
+        group_url (callable, optional): Link of a summary node, given its group ID.
+        graph_data (list, optional): Already fetched graph data; fetched if omitted.
+
+    Returns:
+        graphviz.Digraph: The generated graph.
+    """
+    if graph_data is None:
+        graph_data = _fetch_graph_data()
+    if view == "summary":
+        return build_summary_graph(graph_data, expand=expand, group_url=group_url)
+    return build_graph(graph_data)
+
+
+def _render_svg(view="full", expand=(), group_url=None, graph_data=None):
+    """
+    Generates the graph and renders it to SVG.
+
+    With CRIBL_PER_GROUP_LAYOUT, the groups of the full view are laid out
+    concurrently and stitched into one SVG; with CRIBL_STREAM_DOT, its DOT
+    source is streamed into graphviz.
+
+    Returns:
+        str: The SVG content.
+    """
+    if view == "full" and PER_GROUP_LAYOUT:
+        if graph_data is None:
+            graph_data = _fetch_graph_data()
+        return render_stitched_svg(build_group_graphs(graph_data), max_workers=LAYOUT_WORKERS).decode("utf-8")
+    if view == "full" and STREAM_DOT:
+        if graph_data is None:
+            graph_data = _fetch_graph_data()
+        return render_dot_lines(iter_graph_lines(graph_data)).decode("utf-8")
+
+    dot = _generate_dot(view, expand, group_url, graph_data)
+    # Render to SVG, skipping graphviz layout if this exact graph was rendered before
+    return render_graph(dot, format="svg").decode("utf-8")
+
+
+# Seconds between background snapshot refreshes; 0 renders inside each request
+REFRESH_INTERVAL = float(os.environ.get("CRIBL_REFRESH_INTERVAL", "0"))
+
+# Oldest snapshot, in seconds, that is served before falling back to a synchronous render
+MAX_STALENESS = float(os.environ.get("CRIBL_MAX_STALENESS", "300"))
+
+
+def _refresh_svg():
+    """
+    Renders the full graph for a background refresh.
+
+    Returns:
+        str: The SVG content.
+    """
+    return _render_svg("full", graph_data=_fetch_graph_data())
+
+
+snapshot_refresher = None
+if REFRESH_INTERVAL > 0:
+    snapshot_refresher = SnapshotRefresher(_refresh_svg, REFRESH_INTERVAL, store=snapshot_store)
+    # Serve the snapshot of the previous run while the first refresh is running
+    snapshot_refresher.restore()
+    snapshot_refresher.start()
+
+
+def _conditional_response(body, mimetype, last_modified=None):
+    """
+    Serves a page or graph with a strong ETag derived from its content.
+
+    A request whose If-None-Match matches gets 304 Not Modified without a
+    body; otherwise a cached compressed copy is sent if the client accepts one.
+
+    Args:
+        body (str or bytes): The response content.
+        mimetype (str): The content type.
+        last_modified (datetime, optional): Value of the Last-Modified header.
+
+    Returns:
+        Response: The response.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    etag = hashlib.sha256(body).hexdigest()
+    encodings = content_encodings()
+    encoding = request.accept_encodings.best_match(encodings)
+
+    # Each Content-Encoding is a separate representation with its own ETag
+    known_etags = [etag] + [f"{etag}-{name}" for name in encodings]
+    if any(request.if_none_match.contains(tag) for tag in known_etags):
+        response = Response(status=304)
+    elif encoding:
+        response = Response(compressed_copy(etag, body, encoding), mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = Response(body, mimetype=mimetype)
+
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    response.vary.add("Accept-Encoding")
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
 
 @app.route("/")
 def index():
     """
     Main route that generates the graph and renders it.
 
+    Query parameters:
+        view: "full", "summary", "groups" or "client" (default CRIBL_DEFAULT_VIEW).
+        expand: In the summary view, a group to draw in full; may be repeated.
+        budget: Seconds to wait for the leader (default CRIBL_RENDER_BUDGET). Groups
+            that have not arrived by then are drawn from their last-known data,
+            marked stale, or as placeholders.
+
+    When background refreshing is enabled, the latest snapshot of the full
+    view is served immediately unless it is older than CRIBL_MAX_STALENESS.
+    Graph pages carry an ETag and are answered with 304 when unchanged.
+
     Returns:
-        str: Rendered HTML template with the graph SVG.
+        Response: Rendered HTML template with the graph SVG.
 
     Renders:
         index.html: If graph generation is successful.
         error.html: If an exception occurs (e.g., API failure).
     """
+    view = request.args.get("view", DEFAULT_VIEW)
+    if view not in VIEWS:
+        view = "full"
+    expand = sorted(set(request.args.getlist("expand"))) if view == "summary" else []
+
+    if view == "groups":
+        # Only the group list is fetched here; the page loads each group's SVG itself
+        try:
+            group_ids = _list_worker_groups()
+        except Exception as e:
+            return render_template("error.html", error_message=str(e))
+        return render_template("index.html", group_ids=group_ids, view=view)
+
+    if view == "client":
+        # The page fetches /api/graph.json and lays the graph out itself
+        return render_template("index.html", view=view, vendor_assets=VENDOR_ASSETS)
+
+    if view == "full" and snapshot_refresher is not None:
+        snapshot = snapshot_refresher.latest()
+        if snapshot is not None and snapshot.age() <= MAX_STALENESS:
+            # The page shows the snapshot age from Last-Modified, so its ETag only changes with the graph
+            return _conditional_response(
+                render_template("index.html", svg_content=snapshot.svg_content, snapshot=True, view=view),
+                "text/html",
+                last_modified=datetime.fromtimestamp(snapshot.generated_at, timezone.utc),
+            )
+
+    def group_url(group_id):
+        return url_for("index", view="summary", expand=expand + [group_id])
+
+    budget = request.args.get("budget", RENDER_BUDGET, type=float)
     try:
-        api_client = get_cached_api_client()
-        dot = generate_graph(api_client)
-        # Use pipe to get the SVG content as a string
-        svg_content = dot.pipe(format="svg").decode("utf-8")
+        graph_data = _fetch_graph_data(budget=budget if budget > 0 else None)
+        svg_content = _render_svg(view, expand, group_url, graph_data)
     except Exception as e:
         # If anything goes wrong during graph generation, show an error page.
         # This could happen if the API is not available, for example.
         return render_template("error.html", error_message=str(e))
 
-    return render_template("index.html", svg_content=svg_content)
+    late_groups = [group_id for group_id, group_data in graph_data if _is_late(group_data)]
+    if view == "full" and snapshot_refresher is not None and not late_groups:
+        snapshot_refresher.publish(svg_content)
+
+    return _conditional_response(
+        render_template(
+            "index.html", svg_content=svg_content, view=view, expand=expand, late_groups=late_groups
+        ),
+        "text/html",
+    )
+
+
+@app.route("/group/<group_id>.svg")
+def group_svg(group_id):
+    """
+    Renders the cluster of a single worker group.
+
+    Only the API calls of that group are made, so groups can be fetched,
+    rendered and cached independently of each other. The group is looked up
+    in the cached worker group listing, which is not fetched once per group.
+
+    Returns:
+        Response: The SVG, 404 if the group does not exist, or 502 if it
+        could not be fetched or rendered.
+    """
+    try:
+        groups = _worker_groups()
+    except Exception as e:
+        return Response(str(e), status=502, mimetype="text/plain")
+    if not any(group["id"] == group_id for group in groups.get("items", [])):
+        abort(404)
+
+    try:
+        graph_data = _fetch_graph_data(group_ids=[group_id], groups=groups)
+        svg = render_graph(build_graph(graph_data), format="svg")
+    except Exception as e:
+        return Response(str(e), status=502, mimetype="text/plain")
+    return _conditional_response(svg, "image/svg+xml")
+
+
+@app.route("/api/graph.json")
+def graph_json():
+    """
+    Returns the clusters, nodes and edges of the graph, with their labels,
+    colours and pen widths, for layout in the browser.
+
+    Returns:
+        Response: The graph as JSON, or a JSON error with status 502.
+    """
+    try:
+        graph_data = _fetch_graph_data()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+    return jsonify(build_graph_json(graph_data))
+
+
+# Models, with their adjacency indexes, of the groups queried on /api/paths:
+# group_id -> (group_data they were built from, FlowGroup)
+_path_groups = {}
+
+
+class GroupUnavailableError(Exception):
+    """
+    Raised when a worker group exists but could not be fetched and has no last-known data.
+    """
+
+
+def _path_group(group_id):
+    """
+    Returns the model of a worker group as last fetched, i.e. as drawn on the
+    page, fetching the group only if it has no last-known data.
+
+    The model is rebuilt only when newer data was fetched, so repeated queries
+    are answered from its indexes without fetching or hashing group data.
+
+    Raises:
+        KeyError: If the group does not exist.
+        GroupUnavailableError: If the group's fetch failed or missed its deadline.
+    """
+    known = _last_known_groups.get(group_id)
+    if known is None:
+        fetched = dict(_fetch_graph_data(group_ids=[group_id]))
+        if group_id not in fetched:
+            raise KeyError(group_id)
+        known = _last_known_groups.get(group_id)
+        if known is None:
+            raise GroupUnavailableError(f"Worker group {group_id} could not be fetched and has no earlier data")
+    group_data = known[0]
+    entry = _path_groups.get(group_id)
+    if entry is None or entry[0] is not group_data:
+        entry = (group_data, build_flow_graph([(group_id, group_data)]).groups[0])
+        _path_groups[group_id] = entry
+    return entry[1]
+
+
+@app.route("/api/paths")
+def paths():
+    """
+    Returns the subgraph reachable from a node, for highlighting it on the page.
+
+    Query parameters:
+        node: "<group>/<id>" of an input, output or pipeline.
+
+    Returns:
+        Response: The node, and the nodes and routes reachable from it with
+        their SVG element IDs, as JSON; a JSON error with status 400 for a
+        malformed node, 404 for an unknown one, 503 if its group exists but
+        could not be fetched, or 502 if the leader could not be queried.
+    """
+    group_id, _, name = request.args.get("node", "").partition("/")
+    if not group_id or not name:
+        return jsonify({"error": "node must be <group>/<id>"}), 400
+    try:
+        group = _path_group(group_id)
+    except KeyError:
+        return jsonify({"error": f"Unknown worker group {group_id}"}), 404
+    except GroupUnavailableError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+
+    result = find_paths(group, name)
+    if result is None:
+        return jsonify({"error": f"{name} does not occur in worker group {group_id}"}), 404
+    return jsonify(result)
+
+
+def _compared_leaders():
+    """
+    Returns the leaders named by the base and other query parameters,
+    defaulting to the first two of CRIBL_LEADERS, or None if fewer than two are configured.
+
+    Aborts with 404 for a leader that is not configured.
+    """
+    names = list(LEADERS)
+    if len(names) < 2:
+        return None
+    base = request.args.get("base", names[0])
+    other = request.args.get("other", names[1])
+    if base not in LEADERS or other not in LEADERS:
+        abort(404)
+    return base, other
+
+
+def _fetch_diff(base, other):
+    """
+    Fetches two leaders in one concurrent round and compares them.
+
+    Returns:
+        list: The diff, as returned by diff_graph_data.
+    """
+    leaders = _fetch_leaders([base, other])
+    return diff_graph_data(leaders[base], leaders[other])
+
+
+@app.route("/diff")
+def diff():
+    """
+    Renders the differences between two leaders of CRIBL_LEADERS.
+
+    Query parameters:
+        base: The leader compared against (default: the first one).
+        other: The compared leader (default: the second one).
+
+    Added groups, inputs, outputs and routes are drawn green, removed ones
+    red and changed ones orange. Groups either leader failed to return are
+    drawn as not compared and listed above the graph.
+
+    Returns:
+        Response: Rendered HTML template with the diff SVG, or 404 for an unknown leader.
+    """
+    leaders = _compared_leaders()
+    if leaders is None:
+        return render_template(
+            "error.html",
+            error_message="Set CRIBL_LEADERS to at least two leaders (name=url,...) to compare them.",
+        )
+    base, other = leaders
+    try:
+        graph_diff = _fetch_diff(base, other)
+        svg_content = render_graph(build_diff_graph(graph_diff, base, other), format="svg").decode("utf-8")
+    except Exception as e:
+        return render_template("error.html", error_message=str(e))
+
+    return _conditional_response(
+        render_template(
+            "index.html", svg_content=svg_content, view="diff", diff_base=base, diff_other=other,
+            diff_summary=diff_summary(graph_diff),
+            late_groups=[group["id"] for group in graph_diff if group["status"] == "unknown"],
+        ),
+        "text/html",
+    )
+
+
+@app.route("/api/diff.json")
+def diff_json():
+    """
+    Returns the differences between two leaders, with the query parameters of /diff.
+
+    Returns:
+        Response: The base and other leader names, a summary of counts by
+        status and the per-group diff as JSON, or a JSON error with status 400 or 502.
+    """
+    leaders = _compared_leaders()
+    if leaders is None:
+        return jsonify({"error": "CRIBL_LEADERS lists fewer than two leaders"}), 400
+    base, other = leaders
+    try:
+        graph_diff = _fetch_diff(base, other)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+    return jsonify({"base": base, "other": other, "summary": diff_summary(graph_diff), "groups": graph_diff})
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Exposes request, stage and cache metrics in the Prometheus text format.
+
+    Returns:
+        Response: The metrics as text/plain.
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
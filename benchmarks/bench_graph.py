@@ -0,0 +1,204 @@
+"""
+Benchmarks the fetch, build and render stages of graph generation on
+synthetic fleets and emits the results as JSON.
+
+Usage:
+    python -m benchmarks.bench_graph --sizes 10,1000,100000 -o results.json
+    python -m benchmarks.bench_graph --compare results.json
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import graphviz
+
+import graph_generator
+from benchmarks.synthetic_fleet import fleet_for_node_count
+from graph_generator import build_graph, fetch_graph_data
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def _measure(func, reset=None, trace_memory=True):
+    """
+    Measures the wall time and peak Python memory of func.
+
+    tracemalloc slows allocation-heavy code down considerably, so time and
+    memory are measured in two separate runs.
+
+    Args:
+        func (callable): The stage to measure.
+        reset (callable, optional): Called before each run, e.g. to clear caches.
+        trace_memory (bool): Run a second time to measure peak memory.
+
+    Returns:
+        tuple: (result, {"seconds": float, "peak_memory_bytes": int or None})
+    """
+    if reset:
+        reset()
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if trace_memory:
+        if reset:
+            reset()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, {"seconds": round(seconds, 6), "peak_memory_bytes": peak}
+
+
+def run_size(nodes, render=True, fetch_workers=graph_generator.DEFAULT_FETCH_WORKERS, **fleet_kwargs):
+    """
+    Benchmarks one fleet size.
+
+    Args:
+        nodes (int): Target number of input and output nodes.
+        render (bool): Also run the dot.pipe stage.
+        fetch_workers (int): Thread pool size of the fetch stage.
+        **fleet_kwargs: SyntheticFleet parameters.
+
+    Returns:
+        dict: Fleet shape and per-stage measurements.
+    """
+    fleet = fleet_for_node_count(nodes, **fleet_kwargs)
+    result = {
+        "nodes": fleet.node_count,
+        "groups": len(fleet.groups),
+        "edges": sum(
+            len(item["connections"]) for group in fleet.groups.values() for item in group["inputs"]
+        ),
+        "stages": {},
+    }
+
+    graph_data, result["stages"]["fetch"] = _measure(
+        lambda: fetch_graph_data(fleet, max_workers=fetch_workers)
+    )
+
+    # Measure a cold build, without fragments cached by earlier runs
+    dot, result["stages"]["build"] = _measure(
+        lambda: build_graph(graph_data), reset=graph_generator._fragment_cache.invalidate
+    )
+    result["stages"]["build"]["dot_bytes"] = len(dot.source.encode("utf-8"))
+
+    if render:
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        try:
+            svg, result["stages"]["render"] = _measure(lambda: dot.pipe(format="svg"), trace_memory=False)
+        except graphviz.ExecutableNotFound as e:
+            result["stages"]["render"] = {"skipped": str(e)}
+        else:
+            render_stage = result["stages"]["render"]
+            render_stage["svg_bytes"] = len(svg)
+            # ru_maxrss is in KiB on Linux; it only grows, so it is reported if this render raised it
+            children_after = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            render_stage["layout_max_rss_bytes"] = (
+                children_after * 1024 if children_after > children_before else None
+            )
+
+    return result
+
+
+def compare(baseline, current, max_regression):
+    """
+    Compares per-stage wall times of two runs with matching sizes.
+
+    Args:
+        baseline (dict): Earlier benchmark output.
+        current (dict): New benchmark output.
+        max_regression (float): Allowed current/baseline time ratio.
+
+    Returns:
+        list: Human-readable descriptions of the regressions found.
+    """
+    baseline_runs = {run["nodes"]: run for run in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        before = baseline_runs.get(run["nodes"])
+        if before is None:
+            continue
+        for stage, measurement in run["stages"].items():
+            old = before["stages"].get(stage, {}).get("seconds")
+            new = measurement.get("seconds")
+            if not old or new is None:
+                continue
+            ratio = new / old
+            print(f"{run['nodes']:>7} nodes  {stage:<6} {old:10.4f}s -> {new:10.4f}s  x{ratio:.2f}", file=sys.stderr)
+            if ratio > max_regression:
+                regressions.append(f"{stage} at {run['nodes']} nodes is {ratio:.2f}x slower")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark graph generation on synthetic fleets.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated node counts (default: %(default)s)",
+    )
+    parser.add_argument("--nodes-per-group", type=int, default=100, help="Inputs plus outputs per group")
+    parser.add_argument("--pipelines", type=int, default=10, help="Pipelines per group")
+    parser.add_argument("--connections-per-input", type=int, default=2)
+    parser.add_argument("--functions-per-pipeline", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated API round trip")
+    parser.add_argument("--fetch-workers", type=int, default=graph_generator.DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--no-render", action="store_true", help="Skip the dot.pipe stage")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument(
+        "--max-regression", type=float, default=1.5, help="Allowed slowdown ratio when comparing"
+    )
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "nodes_per_group": args.nodes_per_group,
+            "pipelines": args.pipelines,
+            "connections_per_input": args.connections_per_input,
+            "functions_per_pipeline": args.functions_per_pipeline,
+            "latency_ms": args.latency_ms,
+            "fetch_workers": args.fetch_workers,
+        },
+        "runs": [],
+    }
+    for size in (int(size) for size in args.sizes.split(",")):
+        results["runs"].append(run_size(
+            size,
+            render=not args.no_render,
+            fetch_workers=args.fetch_workers,
+            nodes_per_group=args.nodes_per_group,
+            pipelines=args.pipelines,
+            connections_per_input=args.connections_per_input,
+            functions_per_pipeline=args.functions_per_pipeline,
+            latency=args.latency_ms / 1000.0,
+        ))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
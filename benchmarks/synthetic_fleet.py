@@ -0,0 +1,156 @@
+import random
+import time
+
+
+class SyntheticFleet:
+    """
+    A deterministic, synthetic Cribl deployment that implements the CriblAPI
+    read interface, for benchmarking graph generation without a leader.
+    """
+
+    def __init__(
+        self,
+        groups=1,
+        inputs=10,
+        outputs=10,
+        pipelines=5,
+        connections_per_input=1,
+        functions_per_pipeline=5,
+        latency=0.0,
+        seed=0,
+    ):
+        """
+        Generates the fleet.
+
+        Args:
+            groups (int): Number of worker groups.
+            inputs (int): Inputs per worker group.
+            outputs (int): Outputs per worker group.
+            pipelines (int): Pipelines per worker group.
+            connections_per_input (int): Routes from each input to an output.
+            functions_per_pipeline (int): Functions in each pipeline.
+            latency (float): Seconds each API call sleeps, to simulate a leader round trip.
+            seed (int): Random seed; the same parameters and seed yield the same fleet.
+        """
+        self.latency = latency
+        self.groups = {}
+        rng = random.Random(seed)
+
+        for g in range(groups):
+            group_id = f"group-{g}"
+            output_ids = [f"out_{o}" for o in range(outputs)]
+            pipeline_ids = [f"pipeline_{p}" for p in range(pipelines)] or ["passthru"]
+
+            input_items = []
+            for i in range(inputs):
+                connections = []
+                if output_ids:
+                    for _ in range(connections_per_input):
+                        connections.append(
+                            {"output": rng.choice(output_ids), "pipeline": rng.choice(pipeline_ids)}
+                        )
+                input_items.append({
+                    "id": f"in_{i}",
+                    "type": "syslog",
+                    "disabled": rng.random() < 0.05,
+                    "description": f"Synthetic input {i}",
+                    "connections": connections,
+                })
+
+            self.groups[group_id] = {
+                "inputs": input_items,
+                "outputs": [
+                    {"id": output_id, "type": "s3", "disabled": rng.random() < 0.05}
+                    for output_id in output_ids
+                ],
+                "pipelines": [
+                    {
+                        "id": pipeline_id,
+                        "conf": {"functions": [{"id": "eval"}] * functions_per_pipeline},
+                    }
+                    for pipeline_id in pipeline_ids
+                ],
+                "source_status": [
+                    {"id": item["id"], "eps": round(rng.uniform(0, 5000), 2)} for item in input_items
+                ],
+                "destination_status": [
+                    {"id": output_id, "eps": round(rng.uniform(0, 5000), 2)} for output_id in output_ids
+                ],
+                "pipeline_status": [
+                    {"id": pipeline_id, "eps": round(rng.uniform(0, 5000), 2)} for pipeline_id in pipeline_ids
+                ],
+                "source_health": [
+                    {"id": item["id"], "error_rate": round(rng.uniform(0, 12), 2)} for item in input_items
+                ],
+                "destination_health": [
+                    {"id": output_id, "drop_rate": round(rng.uniform(0, 12), 2)} for output_id in output_ids
+                ],
+            }
+
+    @property
+    def node_count(self):
+        """
+        Total number of inputs and outputs across all worker groups.
+        """
+        return sum(len(group["inputs"]) + len(group["outputs"]) for group in self.groups.values())
+
+    def _respond(self, group_id, key):
+        if self.latency:
+            time.sleep(self.latency)
+        return {"items": self.groups[group_id][key]}
+
+    def get_worker_groups(self):
+        if self.latency:
+            time.sleep(self.latency)
+        return {"items": [{"id": group_id} for group_id in self.groups]}
+
+    def get_sources(self, group_id):
+        return self._respond(group_id, "inputs")
+
+    def get_destinations(self, group_id):
+        return self._respond(group_id, "outputs")
+
+    def get_pipelines(self, group_id):
+        return self._respond(group_id, "pipelines")
+
+    def get_source_status(self, group_id):
+        return self._respond(group_id, "source_status")
+
+    def get_destination_status(self, group_id):
+        return self._respond(group_id, "destination_status")
+
+    def get_pipeline_status(self, group_id):
+        return self._respond(group_id, "pipeline_status")
+
+    def get_source_health(self, group_id):
+        return self._respond(group_id, "source_health")
+
+    def get_destination_health(self, group_id):
+        return self._respond(group_id, "destination_health")
+
+    def get_pipeline_functions(self, group_id, pipeline_id):
+        if self.latency:
+            time.sleep(self.latency)
+        for pipeline in self.groups[group_id]["pipelines"]:
+            if pipeline["id"] == pipeline_id:
+                return pipeline
+        return {}
+
+
+def fleet_for_node_count(nodes, nodes_per_group=100, **kwargs):
+    """
+    Builds a fleet of roughly the given number of input and output nodes.
+
+    Args:
+        nodes (int): Target total number of nodes.
+        nodes_per_group (int): Nodes per worker group; groups are added to reach the target.
+        **kwargs: Further SyntheticFleet parameters (pipelines, connections_per_input, ...).
+
+    Returns:
+        SyntheticFleet: The generated fleet.
+    """
+    per_group = min(nodes, nodes_per_group)
+    groups = max(1, -(-nodes // per_group))
+    inputs = per_group // 2 + per_group % 2
+    outputs = per_group // 2
+    return SyntheticFleet(groups=groups, inputs=inputs, outputs=outputs, **kwargs)
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries can expire.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, clock=time.monotonic):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept; the least recently
+                used entry is evicted when it is exceeded.
+            max_bytes (int, optional): Maximum total len() of the cached values, for
+                caches of bytes or strings. Least recently used entries are evicted
+                when it is exceeded.
+            clock (callable): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry):
+        expires_at = entry[1]
+        return expires_at is not None and expires_at <= self._clock()
+
+    def _size(self, value):
+        return len(value) if self.max_bytes is not None else 0
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._size(value)
+
+    def _over_capacity(self):
+        if len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for key, or default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores value under key.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+            ttl (float, optional): Lifetime in seconds. None means the entry never expires.
+        """
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += self._size(value)
+            # The newest entry is kept even if it exceeds max_bytes on its own
+            while len(self._entries) > 1 and self._over_capacity():
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """
+        Removes entries from the cache.
+
+        Args:
+            predicate (callable, optional): Called with each key; matching entries
+                are removed. If omitted, the whole cache is cleared.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size of the cache.
+
+        Returns:
+            dict: hits, misses, evictions, size, bytes and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
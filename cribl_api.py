@@ -1,6 +1,201 @@
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
 import requests
 from requests import Session
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+from json_stream import ItemsDecoder
+from metrics import DEFAULT_SIZE_BUCKETS, REGISTRY, Counter, Histogram
+from resilience import (
+    DEFAULT_BREAKER_COOLDOWN,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_BACKOFF_CAP,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+)
+
+# Default cache lifetimes, in seconds, for configuration and status endpoints.
+DEFAULT_CONFIG_TTL = 300
+DEFAULT_STATUS_TTL = 5
+
+# Default maximum number of cached responses.
+DEFAULT_CACHE_SIZE = 1024
+
+# Endpoints whose responses change only when the configuration is edited
+_CONFIG_ENDPOINT = re.compile(r"^/api/v1/m/[^/]+/(system/inputs|system/outputs|pipelines(/[^/]+)?)$")
+
+# Endpoints that report live metrics
+_STATUS_ENDPOINT = re.compile(r"^/api/v1/m/[^/]+/system/(status|health)/")
+
+
+def endpoint_ttl(endpoint, config_ttl, status_ttl):
+    """
+    Returns how long a response of the given endpoint may be cached.
+
+    Args:
+        endpoint (str): The API endpoint path.
+        config_ttl (float): Lifetime for inputs, outputs and pipelines.
+        status_ttl (float): Lifetime for status and health endpoints.
+
+    Returns:
+        float: Lifetime in seconds, or None if the endpoint must not be cached.
+    """
+    if _CONFIG_ENDPOINT.match(endpoint):
+        return config_ttl or None
+    if _STATUS_ENDPOINT.match(endpoint):
+        return status_ttl or None
+    return None
+
+
+# Fields of each list item that graph building uses, by endpoint path below the
+# worker group. Endpoints selected for streaming are decoded item by item and
+# reduced to these fields.
+STREAMED_FIELDS = {
+    "system/inputs": ("id", "disabled", "description", "connections"),
+    "system/outputs": ("id", "disabled", "description"),
+    "system/status/inputs": ("id", "eps", "events"),
+    "system/status/outputs": ("id", "eps", "events"),
+    "system/status/pipelines": ("id", "eps"),
+    "system/health/inputs": ("id", "error_rate", "drop_rate"),
+    "system/health/outputs": ("id", "error_rate", "drop_rate"),
+}
+
+# Size of the chunks in which streamed responses are read
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def streamed_fields(streamed_endpoints):
+    """
+    Maps endpoint templates to the fields kept when their responses are streamed.
+
+    Args:
+        streamed_endpoints (iterable): Keys of STREAMED_FIELDS, e.g. "system/inputs",
+            or "all" for every one of them.
+
+    Returns:
+        dict: Endpoint template (see endpoint_labels) -> tuple of fields.
+
+    Raises:
+        ValueError: If an endpoint cannot be streamed.
+    """
+    streamed_endpoints = set(streamed_endpoints)
+    if "all" in streamed_endpoints:
+        streamed_endpoints = set(STREAMED_FIELDS)
+    unknown = streamed_endpoints.difference(STREAMED_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot stream endpoints: {', '.join(sorted(unknown))}")
+    return {"/api/v1/m/{group}/" + path: STREAMED_FIELDS[path] for path in streamed_endpoints}
+
+
+def group_endpoint_prefix(group_id):
+    """
+    Returns the path prefix shared by all endpoints of a worker group.
+    """
+    return f"/api/v1/m/{group_id}/"
+
+
+_GROUP_ENDPOINT = re.compile(r"^/api/v1/m/([^/]+)(/.*)$")
+_PIPELINE_DETAIL = re.compile(r"^/pipelines/[^/]+$")
+
+API_REQUEST_SECONDS = Histogram(
+    "cribl_api_request_seconds", "Latency of Cribl API requests.", ("method", "endpoint", "group")
+)
+API_ERRORS = Counter(
+    "cribl_api_errors_total", "Cribl API requests that failed.", ("method", "endpoint", "group")
+)
+API_RESPONSE_BYTES = Histogram(
+    "cribl_api_response_bytes", "Size of Cribl API response bodies.", ("endpoint",), buckets=DEFAULT_SIZE_BUCKETS
+)
+API_RETRIES = Counter(
+    "cribl_api_retries_total", "Cribl API requests retried after a transient failure.", ("endpoint", "group")
+)
+API_CIRCUIT_OPEN = Counter(
+    "cribl_api_circuit_open_total", "Cribl API requests rejected by an open circuit breaker.", ("endpoint", "group")
+)
+
+
+def endpoint_labels(endpoint):
+    """
+    Splits an endpoint into a low-cardinality template and its worker group.
+
+    Args:
+        endpoint (str): The API endpoint path, e.g. /api/v1/m/default/pipelines/main.
+
+    Returns:
+        tuple: (template, group_id), e.g. ("/api/v1/m/{group}/pipelines/{pipeline}", "default").
+               group_id is "" for endpoints outside a worker group.
+    """
+    match = _GROUP_ENDPOINT.match(endpoint)
+    if not match:
+        return endpoint, ""
+    group_id, path = match.groups()
+    if _PIPELINE_DETAIL.match(path):
+        path = "/pipelines/{pipeline}"
+    return "/api/v1/m/{group}" + path, group_id
+
+
+@contextmanager
+def observe_request(method, endpoint):
+    """
+    Records the latency and failure of the API request made in the with-block.
+
+    Yields:
+        str: The endpoint template, for recording further metrics.
+    """
+    template, group_id = endpoint_labels(endpoint)
+    started = time.perf_counter()
+    try:
+        yield template
+    except Exception:
+        API_ERRORS.inc(method=method, endpoint=template, group=group_id)
+        raise
+    finally:
+        API_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, method=method, endpoint=template, group=group_id
+        )
+
+
+def is_transient_error(error):
+    """
+    Returns True for request failures worth retrying: connection errors,
+    timeouts, 429 and 5xx responses.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status == 429 or (status is not None and status >= 500)
+    return isinstance(
+        error,
+        (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ),
+    )
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that applies a default (connect, read) timeout to requests made without one.
+    """
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
 
 
 class CriblAPI:
@@ -9,7 +204,21 @@ class CriblAPI:
     """
 
     def __init__(
-        self, base_url="http://localhost:9000", username=None, password=None, token=None
+        self,
+        base_url="http://localhost:9000",
+        username=None,
+        password=None,
+        token=None,
+        config_ttl=DEFAULT_CONFIG_TTL,
+        status_ttl=DEFAULT_STATUS_TTL,
+        cache_size=DEFAULT_CACHE_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+        breaker=None,
+        streamed_endpoints=(),
+        adapter=None,
     ):
         """
         Initializes the CriblAPI client.
@@ -20,9 +229,36 @@ class CriblAPI:
             username (str, optional): The username for authentication.
             password (str, optional): The password for authentication.
             token (str, optional): An existing authentication token.
+            config_ttl (float): Seconds to cache inputs, outputs and pipelines. 0 disables.
+            status_ttl (float): Seconds to cache status and health metrics. 0 disables.
+            cache_size (int): Maximum number of cached responses.
+            connect_timeout (float): Seconds to wait for a connection to the leader.
+            read_timeout (float): Seconds to wait for each read of a response.
+            retries (int): Retries of a GET after a connection error, timeout, 429 or 5xx response.
+            retry_backoff (float): Base of the jittered exponential delay between retries, in seconds.
+            breaker (CircuitBreaker, optional): Fails GETs fast per endpoint and worker group
+                after repeated failures. Defaults to a CircuitBreaker with default settings.
+            streamed_endpoints (iterable): Endpoints whose "items" are decoded incrementally
+                and reduced to the fields in STREAMED_FIELDS; "all" selects every one.
+            adapter (HTTPAdapter, optional): Connection pool shared with the clients of other
+                leaders; its own timeouts apply instead of connect_timeout and read_timeout.
         """
         self.base_url = base_url
         self.session = Session()
+        if adapter is None:
+            adapter = TimeoutHTTPAdapter((connect_timeout, read_timeout))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        # time.monotonic() deadline of the requests of each thread, set by deadline()
+        self._deadline = threading.local()
+        self.config_ttl = config_ttl
+        self.status_ttl = status_ttl
+        self.cache = TTLCache(max_entries=cache_size)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.streamed_fields = streamed_fields(streamed_endpoints)
         self.session.headers.update({"Content-Type": "application/json"})
 
         if token:
@@ -42,8 +278,9 @@ class CriblAPI:
         """
         url = self.base_url + endpoint
         try:
-            response = self.session.post(url, json=payload)
-            response.raise_for_status()
+            with observe_request("POST", endpoint):
+                response = self.session.post(url, json=payload)
+                response.raise_for_status()
             try:
                 return response.json()
             except requests.exceptions.JSONDecodeError as e:
@@ -75,14 +312,118 @@ class CriblAPI:
         self.session.headers["Authorization"] = token
         print("Successfully authenticated and retrieved token.")
 
+    @contextmanager
+    def deadline(self, deadline):
+        """
+        Bounds the requests made by this thread inside the block by a deadline.
+
+        Request timeouts are cut to the time left, and no request or retry is
+        started once it has passed, so a fetch abandoned at the deadline ends
+        soon after it instead of running its full timeouts and retries.
+
+        Args:
+            deadline (float, optional): time.monotonic() value; None keeps the configured timeouts.
+        """
+        previous = getattr(self._deadline, "value", None)
+        self._deadline.value = deadline
+        try:
+            yield
+        finally:
+            self._deadline.value = previous
+
+    def _remaining(self):
+        """
+        Returns the seconds left before the deadline of this thread, or None without one.
+        """
+        deadline = getattr(self._deadline, "value", None)
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _timeout_kwargs(self, endpoint):
+        """
+        Returns the timeout keyword argument of a request made now: the
+        (connect, read) timeout cut to the time left before the deadline, or
+        nothing without a deadline, so the adapter's own timeout applies.
+
+        Raises:
+            TimeoutError: If the deadline has passed.
+        """
+        remaining = self._remaining()
+        if remaining is None:
+            return {}
+        if remaining <= 0:
+            raise TimeoutError(f"Deadline passed before requesting {endpoint}")
+        return {"timeout": tuple(min(timeout, remaining) for timeout in self.timeout)}
+
     def _get(self, endpoint):
         """
         Performs a GET request to the specified endpoint.
+        Responses of configuration and status endpoints are served from the
+        response cache while they are fresh (see endpoint_ttl).
+
+        Transient failures are retried with jittered exponential backoff, and
+        endpoints whose circuit breaker is open fail fast with CircuitOpenError.
+        """
+        ttl = endpoint_ttl(endpoint, self.config_ttl, self.status_ttl)
+        if ttl is not None:
+            cached = self.cache.get(endpoint)
+            if cached is not None:
+                return cached
+
+        key = endpoint_labels(endpoint)
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call(key)
+            except CircuitOpenError:
+                API_CIRCUIT_OPEN.inc(endpoint=key[0], group=key[1])
+                raise
+            try:
+                data = self._get_once(endpoint)
+            except Exception as e:
+                remaining = self._remaining()
+                if remaining is not None and remaining <= 0:
+                    # Cut short by the caller's deadline, which says nothing about the endpoint
+                    self.breaker.release_probe(key)
+                    raise
+                transient = is_transient_error(e)
+                if transient:
+                    self.breaker.record_failure(key)
+                else:
+                    # The leader answered, so the endpoint is reachable
+                    self.breaker.record_success(key)
+                if not transient or attempt >= self.retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_backoff, DEFAULT_RETRY_BACKOFF_CAP)
+                print(f"Retrying {endpoint} in {delay:.2f}s after: {e}")
+                API_RETRIES.inc(endpoint=key[0], group=key[1])
+                time.sleep(delay)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: neither a success nor a failure of the endpoint
+                self.breaker.release_probe(key)
+                raise
+            else:
+                self.breaker.record_success(key)
+                break
+
+        if ttl is not None:
+            self.cache.set(endpoint, data, ttl=ttl)
+        return data
+
+    def _get_once(self, endpoint):
+        """
+        Performs a single GET request to the specified endpoint.
         """
         url = self.base_url + endpoint
+        fields = self.streamed_fields.get(endpoint_labels(endpoint)[0])
+        timeout_kwargs = self._timeout_kwargs(endpoint)
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
+            if fields is not None:
+                return self._get_streamed(url, endpoint, fields, timeout_kwargs)
+            with observe_request("GET", endpoint) as template:
+                response = self.session.get(url, **timeout_kwargs)
+                response.raise_for_status()
+            API_RESPONSE_BYTES.observe(len(response.content), endpoint=template)
             try:
                 return response.json()
             except requests.exceptions.JSONDecodeError as e:
@@ -102,6 +443,30 @@ class CriblAPI:
             print(f"Error connecting to Cribl API at {url}: {e}")
             raise
 
+    def _get_streamed(self, url, endpoint, fields, timeout_kwargs=None):
+        """
+        Performs a GET request whose list response is decoded while it is read,
+        keeping only the given fields of each item.
+        """
+        with observe_request("GET", endpoint) as template:
+            response = self.session.get(url, stream=True, **(timeout_kwargs or {}))
+            try:
+                response.raise_for_status()
+                size = 0
+                decoder = ItemsDecoder(fields)
+                try:
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        size += len(chunk)
+                        decoder.feed(chunk)
+                    data = decoder.close()
+                except ValueError as e:
+                    print(f"Failed to decode JSON from response. Status: {response.status_code}: {e}")
+                    raise
+            finally:
+                response.close()
+        API_RESPONSE_BYTES.observe(size, endpoint=template)
+        return data
+
     def get_worker_groups(self):
         """
         Retrieves all worker groups.
@@ -199,6 +564,27 @@ class CriblAPI:
             print(f"Pipeline functions not available for {group_id}/{pipeline_id}: {e}")
             return {}
 
+    def invalidate(self, group_id=None):
+        """
+        Drops cached responses, either for one worker group or for all of them.
+
+        Args:
+            group_id (str, optional): Only drop responses of this worker group.
+
+        Returns:
+            int: Number of dropped responses.
+        """
+        if group_id is None:
+            return self.cache.invalidate()
+        prefix = group_endpoint_prefix(group_id)
+        return self.cache.invalidate(lambda endpoint: endpoint.startswith(prefix))
+
+    def cache_stats(self):
+        """
+        Returns hit/miss counters of the response cache.
+        """
+        return self.cache.stats()
+
 
 def get_api_client_from_env():
     """
@@ -208,13 +594,144 @@ def get_api_client_from_env():
     token = os.environ.get("CRIBL_AUTH_TOKEN")
     username = os.environ.get("CRIBL_USERNAME")
     password = os.environ.get("CRIBL_PASSWORD")
+    config_ttl = float(os.environ.get("CRIBL_CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL))
+    status_ttl = float(os.environ.get("CRIBL_STATUS_CACHE_TTL", DEFAULT_STATUS_TTL))
+    cache_size = int(os.environ.get("CRIBL_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+
+    return CriblAPI(
+        base_url,
+        username=username,
+        password=password,
+        token=token,
+        config_ttl=config_ttl,
+        status_ttl=status_ttl,
+        cache_size=cache_size,
+        streamed_endpoints=streamed_endpoints_from_env(),
+        **resilience_settings_from_env(),
+    )
+
+
+def streamed_endpoints_from_env():
+    """
+    Reads the endpoints decoded incrementally, e.g. "system/inputs,system/outputs" or "all".
+
+    Returns:
+        list: Keys of STREAMED_FIELDS, or ["all"].
+    """
+    value = os.environ.get("CRIBL_STREAM_ENDPOINTS", "")
+    return [endpoint.strip() for endpoint in value.split(",") if endpoint.strip()]
 
-    return CriblAPI(base_url, username=username, password=password, token=token)
+
+def resilience_settings_from_env():
+    """
+    Reads the timeout, retry and circuit breaker settings shared by both API clients.
+
+    Returns:
+        dict: connect_timeout, read_timeout, retries, retry_backoff and breaker keyword arguments.
+    """
+    return {
+        "connect_timeout": float(os.environ.get("CRIBL_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        "read_timeout": float(os.environ.get("CRIBL_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        "retries": int(os.environ.get("CRIBL_RETRIES", DEFAULT_RETRIES)),
+        "retry_backoff": float(os.environ.get("CRIBL_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)),
+        "breaker": CircuitBreaker(
+            failure_threshold=int(os.environ.get("CRIBL_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+            cooldown=float(os.environ.get("CRIBL_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN)),
+        ),
+    }
+
+
+def leaders_from_env():
+    """
+    Reads the named leaders of CRIBL_LEADERS, e.g. "dev=https://dev:9000,prod=https://prod:9000".
+
+    Returns:
+        dict: Leader name -> base URL, in configured order. Empty if CRIBL_LEADERS is not set.
+
+    Raises:
+        ValueError: If an entry is not of the form name=url, or a name is repeated.
+    """
+    leaders = {}
+    for entry in os.environ.get("CRIBL_LEADERS", "").split(","):
+        if not entry.strip():
+            continue
+        name, sep, url = entry.partition("=")
+        name, url = name.strip(), url.strip()
+        if not sep or not name or not url:
+            raise ValueError(f"Invalid CRIBL_LEADERS entry {entry.strip()!r}; expected name=url")
+        if name in leaders:
+            raise ValueError(f"Leader {name!r} is listed twice in CRIBL_LEADERS")
+        leaders[name] = url
+    return leaders
+
+
+def leader_credentials_from_env(name):
+    """
+    Reads the credentials of a named leader.
+
+    CRIBL_AUTH_TOKEN_<NAME>, CRIBL_USERNAME_<NAME> and CRIBL_PASSWORD_<NAME>
+    (the name upper-cased, other characters than letters and digits replaced
+    by "_") take precedence over CRIBL_AUTH_TOKEN, CRIBL_USERNAME and CRIBL_PASSWORD.
+
+    Returns:
+        dict: token, username and password keyword arguments.
+    """
+    suffix = re.sub(r"[^A-Z0-9]", "_", name.upper())
+    return {
+        key: os.environ.get(f"{variable}_{suffix}", os.environ.get(variable))
+        for key, variable in (
+            ("token", "CRIBL_AUTH_TOKEN"),
+            ("username", "CRIBL_USERNAME"),
+            ("password", "CRIBL_PASSWORD"),
+        )
+    }
+
+
+def get_leader_clients_from_env():
+    """
+    Creates a CriblAPI client for each leader of CRIBL_LEADERS.
+
+    The clients share one connection pool, with a pool of keep-alive
+    connections per leader host, but keep their own credentials, response
+    cache and circuit breaker.
+
+    Returns:
+        dict: Leader name -> CriblAPI, in configured order.
+    """
+    leaders = leaders_from_env()
+    config_ttl = float(os.environ.get("CRIBL_CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL))
+    status_ttl = float(os.environ.get("CRIBL_STATUS_CACHE_TTL", DEFAULT_STATUS_TTL))
+    cache_size = int(os.environ.get("CRIBL_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    streamed_endpoints = streamed_endpoints_from_env()
+
+    adapter = None
+    clients = {}
+    for name, base_url in leaders.items():
+        # Each client gets its own breaker: circuits are keyed by worker group, not leader
+        settings = resilience_settings_from_env()
+        if adapter is None:
+            adapter = TimeoutHTTPAdapter(
+                (settings["connect_timeout"], settings["read_timeout"]),
+                pool_connections=max(len(leaders), 10),
+            )
+        clients[name] = CriblAPI(
+            base_url,
+            config_ttl=config_ttl,
+            status_ttl=status_ttl,
+            cache_size=cache_size,
+            streamed_endpoints=streamed_endpoints,
+            adapter=adapter,
+            **leader_credentials_from_env(name),
+            **settings,
+        )
+    return clients
 
 
 # Global variable to cache the API client
 _cached_api_client = None
 
+REGISTRY.register_cache("api", lambda: _cached_api_client.cache if _cached_api_client is not None else None)
+
 
 def get_cached_api_client():
     """
@@ -224,3 +741,20 @@ def get_cached_api_client():
     if _cached_api_client is None:
         _cached_api_client = get_api_client_from_env()
     return _cached_api_client
+
+
+# Global variable to cache the clients of CRIBL_LEADERS
+_cached_leader_clients = None
+
+
+def get_cached_leader_clients():
+    """
+    Returns the cached CriblAPI clients of CRIBL_LEADERS, initializing them if necessary.
+
+    Returns:
+        dict: Leader name -> CriblAPI, in configured order.
+    """
+    global _cached_leader_clients
+    if _cached_leader_clients is None:
+        _cached_leader_clients = get_leader_clients_from_env()
+    return _cached_leader_clients
@@ -0,0 +1,566 @@
+import asyncio
+import json
+import os
+import threading
+
+import aiohttp
+
+from cache import TTLCache
+from cribl_api import (
+    API_CIRCUIT_OPEN,
+    API_RESPONSE_BYTES,
+    API_RETRIES,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CONFIG_TTL,
+    DEFAULT_STATUS_TTL,
+    STREAM_CHUNK_SIZE,
+    endpoint_labels,
+    endpoint_ttl,
+    group_endpoint_prefix,
+    leader_credentials_from_env,
+    leaders_from_env,
+    observe_request,
+    resilience_settings_from_env,
+    streamed_endpoints_from_env,
+    streamed_fields,
+)
+from json_stream import ItemsDecoder
+from metrics import REGISTRY
+from resilience import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_BACKOFF_CAP,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+)
+
+# Maximum number of requests the client keeps in flight at once.
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Maximum number of pooled keep-alive connections to the leader.
+DEFAULT_POOL_SIZE = 32
+
+
+def is_transient_error(error):
+    """
+    Returns True for request failures worth retrying: connection errors,
+    timeouts, 429 and 5xx responses.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+class SharedConnector:
+    """
+    One pool of keep-alive connections shared by the clients of several leaders.
+
+    aiohttp connectors belong to the event loop they are created on, so the
+    connector is only created when the first client opens its session.
+    """
+
+    def __init__(self, limit=DEFAULT_POOL_SIZE):
+        """
+        Args:
+            limit (int): Maximum number of pooled connections, across all leaders.
+        """
+        self.limit = limit
+        self._connector = None
+
+    def get(self):
+        """
+        Returns the shared connector, creating it on first use or after it was closed.
+        """
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(limit=self.limit)
+        return self._connector
+
+    async def close(self):
+        """
+        Closes the shared connector and its pooled connections.
+        """
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+
+class AsyncCriblAPI:
+    """
+    An asyncio client for interacting with the Cribl API.
+
+    Exposes the same methods as CriblAPI as coroutines. Requests share a pool of
+    keep-alive connections and are limited to max_in_flight concurrent calls.
+    """
+
+    def __init__(
+        self,
+        base_url="http://localhost:9000",
+        username=None,
+        password=None,
+        token=None,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        pool_size=DEFAULT_POOL_SIZE,
+        config_ttl=DEFAULT_CONFIG_TTL,
+        status_ttl=DEFAULT_STATUS_TTL,
+        cache_size=DEFAULT_CACHE_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+        breaker=None,
+        streamed_endpoints=(),
+        connector=None,
+    ):
+        """
+        Initializes the AsyncCriblAPI client.
+        The HTTP session is opened lazily on first use (or via `async with`), and
+        logs in at that point if username and password are provided.
+
+        Args:
+            base_url (str): The base URL of the Cribl API. Defaults to http://localhost:9000.
+            username (str, optional): The username for authentication.
+            password (str, optional): The password for authentication.
+            token (str, optional): An existing authentication token.
+            max_in_flight (int): Maximum number of concurrent requests.
+            pool_size (int): Maximum number of pooled connections.
+            config_ttl (float): Seconds to cache inputs, outputs and pipelines. 0 disables.
+            status_ttl (float): Seconds to cache status and health metrics. 0 disables.
+            cache_size (int): Maximum number of cached responses.
+            connect_timeout (float): Seconds to wait for a connection to the leader.
+            read_timeout (float): Seconds to wait for each read of a response.
+            retries (int): Retries of a GET after a connection error, timeout, 429 or 5xx response.
+            retry_backoff (float): Base of the jittered exponential delay between retries, in seconds.
+            breaker (CircuitBreaker, optional): Fails GETs fast per endpoint and worker group
+                after repeated failures. Defaults to a CircuitBreaker with default settings.
+            streamed_endpoints (iterable): Endpoints whose "items" are decoded incrementally
+                and reduced to the fields in STREAMED_FIELDS; "all" selects every one.
+            connector (SharedConnector, optional): Connection pool shared with the clients of
+                other leaders, used instead of a pool of pool_size connections of this client.
+        """
+        self.base_url = base_url
+        self.headers = {"Content-Type": "application/json"}
+        self.max_in_flight = max_in_flight
+        self.pool_size = pool_size
+        self.connector = connector
+        self.session = None
+        self._semaphore = None
+        # Set once the session is open and, with credentials, logged in
+        self._ready = False
+        self._open_lock = None
+        self._credentials = None
+        self.config_ttl = config_ttl
+        self.status_ttl = status_ttl
+        self.cache = TTLCache(max_entries=cache_size)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.streamed_fields = streamed_fields(streamed_endpoints)
+
+        if token:
+            if token.startswith("Bearer "):
+                self.headers["Authorization"] = token
+            else:
+                self.headers["Authorization"] = f"Bearer {token}"
+        elif username and password:
+            self._credentials = (username, password)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _create_session(self):
+        """
+        Creates the in-flight semaphore and the pooled HTTP session if they do not exist yet.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if self.session is None:
+            if self.connector is not None:
+                # Closing this client's session leaves the shared pool open
+                self.session = aiohttp.ClientSession(
+                    connector=self.connector.get(), connector_owner=False, timeout=self.timeout
+                )
+            else:
+                connector = aiohttp.TCPConnector(limit=self.pool_size)
+                self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def open(self):
+        """
+        Opens the pooled HTTP session and authenticates if needed.
+
+        Concurrent callers wait for one login, so no request is sent before
+        the Authorization header is set.
+        """
+        if self._ready:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._ready:
+                return
+            self._create_session()
+            if self._credentials and "Authorization" not in self.headers:
+                await self.login(*self._credentials)
+            self._ready = True
+
+    async def close(self):
+        """
+        Closes the HTTP session and its pooled connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self._ready = False
+
+    async def _request(self, method, endpoint, payload=None, fields=None, authenticated=True):
+        """
+        Performs a request to the specified endpoint, bounded by the in-flight limit.
+
+        With fields, the list response is decoded while it is read and each
+        item is reduced to those fields. Requests wait for open() to log in,
+        except the login request itself (authenticated=False).
+        """
+        if authenticated:
+            await self.open()
+        else:
+            self._create_session()
+        url = self.base_url + endpoint
+        async with self._semaphore:
+            try:
+                with observe_request(method, endpoint) as template:
+                    async with self.session.request(
+                        method, url, json=payload, headers=self.headers
+                    ) as response:
+                        response.raise_for_status()
+                        if fields is None:
+                            body = await response.read()
+                        else:
+                            size = 0
+                            decoder = ItemsDecoder(fields)
+                            try:
+                                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                                    size += len(chunk)
+                                    decoder.feed(chunk)
+                                data = decoder.close()
+                            except ValueError as e:
+                                print(f"Failed to decode JSON from response. Status: {response.status}: {e}")
+                                raise
+                if fields is not None:
+                    API_RESPONSE_BYTES.observe(size, endpoint=template)
+                    return data
+                API_RESPONSE_BYTES.observe(len(body), endpoint=template)
+                try:
+                    return json.loads(body)
+                except json.JSONDecodeError as e:
+                    print(
+                        f"Failed to decode JSON from response. Status: {response.status}, Body: {body!r}"
+                    )
+                    raise e
+            except aiohttp.ClientResponseError as e:
+                if e.status == 401:
+                    print(
+                        f"Authentication failed for {url}. Please check your credentials "
+                        "(CRIBL_USERNAME, CRIBL_PASSWORD) or auth token (CRIBL_AUTH_TOKEN)."
+                    )
+                print(f"HTTP error connecting to Cribl API at {url}: {e}")
+                raise
+            except aiohttp.ClientError as e:
+                print(f"Error connecting to Cribl API at {url}: {e}")
+                raise
+
+    async def _post(self, endpoint, payload):
+        """
+        Performs a POST request to the specified endpoint.
+        """
+        return await self._request("POST", endpoint, payload)
+
+    async def _get(self, endpoint):
+        """
+        Performs a GET request to the specified endpoint, using the response
+        cache, retries and circuit breaker in the same way as CriblAPI._get.
+        """
+        ttl = endpoint_ttl(endpoint, self.config_ttl, self.status_ttl)
+        if ttl is not None:
+            cached = self.cache.get(endpoint)
+            if cached is not None:
+                return cached
+
+        key = endpoint_labels(endpoint)
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call(key)
+            except CircuitOpenError:
+                API_CIRCUIT_OPEN.inc(endpoint=key[0], group=key[1])
+                raise
+            try:
+                data = await self._request("GET", endpoint, fields=self.streamed_fields.get(key[0]))
+            except Exception as e:
+                transient = is_transient_error(e)
+                if transient:
+                    self.breaker.record_failure(key)
+                else:
+                    # The leader answered, so the endpoint is reachable
+                    self.breaker.record_success(key)
+                if not transient or attempt >= self.retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_backoff, DEFAULT_RETRY_BACKOFF_CAP)
+                print(f"Retrying {endpoint} in {delay:.2f}s after: {e}")
+                API_RETRIES.inc(endpoint=key[0], group=key[1])
+                # Sleeps outside the in-flight limit, so other requests proceed meanwhile
+                await asyncio.sleep(delay)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: neither a success nor a failure of the endpoint
+                self.breaker.release_probe(key)
+                raise
+            else:
+                self.breaker.record_success(key)
+                break
+
+        if ttl is not None:
+            self.cache.set(endpoint, data, ttl=ttl)
+        return data
+
+    async def login(self, username, password):
+        """
+        Logs in to the Cribl API and retrieves an authentication token.
+        """
+        auth_payload = {"username": username, "password": password}
+        response = await self._request("POST", "/api/v1/auth/login", auth_payload, authenticated=False)
+        token = response.get("token")
+        if token and not token.startswith("Bearer "):
+            token = f"Bearer {token}"
+        self.headers["Authorization"] = token
+        print("Successfully authenticated and retrieved token.")
+
+    async def get_worker_groups(self):
+        """
+        Retrieves all worker groups.
+        """
+        return await self._get("/api/v1/master/groups")
+
+    async def get_sources(self, group_id):
+        """
+        Retrieves all sources (inputs) for a given worker group.
+        """
+        return await self._get(f"/api/v1/m/{group_id}/system/inputs")
+
+    async def get_destinations(self, group_id):
+        """
+        Retrieves all destinations (outputs) for a given worker group.
+        """
+        return await self._get(f"/api/v1/m/{group_id}/system/outputs")
+
+    async def get_pipelines(self, group_id):
+        """
+        Retrieves all pipelines for a given worker group.
+        """
+        return await self._get(f"/api/v1/m/{group_id}/pipelines")
+
+    async def get_source_status(self, group_id):
+        """
+        Retrieves status for all sources (inputs) for a given worker group.
+        """
+        return await self._get(f"/api/v1/m/{group_id}/system/status/inputs")
+
+    async def get_destination_status(self, group_id):
+        """
+        Retrieves status for all destinations (outputs) for a given worker group.
+        """
+        return await self._get(f"/api/v1/m/{group_id}/system/status/outputs")
+
+    async def get_pipeline_status(self, group_id):
+        """
+        Retrieves status for all pipelines for a given worker group.
+        Returns empty items if pipeline status is not available.
+        """
+        try:
+            return await self._get(f"/api/v1/m/{group_id}/system/status/pipelines")
+        except Exception as e:
+            print(f"Pipeline status not available for group {group_id}: {e}")
+            return {"items": []}
+
+    async def get_source_health(self, group_id):
+        """
+        Retrieves health information for all sources (inputs) for a given worker group.
+        Returns empty items if health information is not available.
+        """
+        try:
+            return await self._get(f"/api/v1/m/{group_id}/system/health/inputs")
+        except Exception as e:
+            print(f"Source health information not available for group {group_id}: {e}")
+            return {"items": []}
+
+    async def get_destination_health(self, group_id):
+        """
+        Retrieves health information for all destinations (outputs) for a given worker group.
+        Returns empty items if health information is not available.
+        """
+        try:
+            return await self._get(f"/api/v1/m/{group_id}/system/health/outputs")
+        except Exception as e:
+            print(f"Destination health information not available for group {group_id}: {e}")
+            return {"items": []}
+
+    async def get_pipeline_functions(self, group_id, pipeline_id):
+        """
+        Retrieves detailed information about functions in a specific pipeline.
+
+        Returns: Dictionary with pipeline details including functions list.
+                 Returns empty dict on failure (graceful degradation).
+        """
+        try:
+            return await self._get(f"/api/v1/m/{group_id}/pipelines/{pipeline_id}")
+        except Exception as e:
+            print(f"Pipeline functions not available for {group_id}/{pipeline_id}: {e}")
+            return {}
+
+    def invalidate(self, group_id=None):
+        """
+        Drops cached responses, either for one worker group or for all of them.
+
+        Args:
+            group_id (str, optional): Only drop responses of this worker group.
+
+        Returns:
+            int: Number of dropped responses.
+        """
+        if group_id is None:
+            return self.cache.invalidate()
+        prefix = group_endpoint_prefix(group_id)
+        return self.cache.invalidate(lambda endpoint: endpoint.startswith(prefix))
+
+    def cache_stats(self):
+        """
+        Returns hit/miss counters of the response cache.
+        """
+        return self.cache.stats()
+
+
+def get_async_api_client_from_env():
+    """
+    Creates an AsyncCriblAPI client from environment variables.
+    """
+    base_url = os.environ.get("CRIBL_BASE_URL", "http://localhost:9000")
+    token = os.environ.get("CRIBL_AUTH_TOKEN")
+    username = os.environ.get("CRIBL_USERNAME")
+    password = os.environ.get("CRIBL_PASSWORD")
+    max_in_flight = int(os.environ.get("CRIBL_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+    config_ttl = float(os.environ.get("CRIBL_CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL))
+    status_ttl = float(os.environ.get("CRIBL_STATUS_CACHE_TTL", DEFAULT_STATUS_TTL))
+    cache_size = int(os.environ.get("CRIBL_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+
+    return AsyncCriblAPI(
+        base_url,
+        username=username,
+        password=password,
+        token=token,
+        max_in_flight=max_in_flight,
+        config_ttl=config_ttl,
+        status_ttl=status_ttl,
+        cache_size=cache_size,
+        streamed_endpoints=streamed_endpoints_from_env(),
+        **resilience_settings_from_env(),
+    )
+
+
+def get_async_leader_clients_from_env():
+    """
+    Creates an AsyncCriblAPI client for each leader of CRIBL_LEADERS.
+
+    The clients share one SharedConnector of CRIBL_MAX_IN_FLIGHT times the
+    number of leaders connections, but keep their own credentials, in-flight
+    limit, response cache and circuit breaker.
+
+    Returns:
+        dict: Leader name -> AsyncCriblAPI, in configured order.
+    """
+    leaders = leaders_from_env()
+    max_in_flight = int(os.environ.get("CRIBL_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+    config_ttl = float(os.environ.get("CRIBL_CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL))
+    status_ttl = float(os.environ.get("CRIBL_STATUS_CACHE_TTL", DEFAULT_STATUS_TTL))
+    cache_size = int(os.environ.get("CRIBL_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    streamed_endpoints = streamed_endpoints_from_env()
+    connector = SharedConnector(limit=max(max_in_flight * len(leaders), DEFAULT_POOL_SIZE))
+
+    return {
+        name: AsyncCriblAPI(
+            base_url,
+            max_in_flight=max_in_flight,
+            config_ttl=config_ttl,
+            status_ttl=status_ttl,
+            cache_size=cache_size,
+            streamed_endpoints=streamed_endpoints,
+            connector=connector,
+            **leader_credentials_from_env(name),
+            **resilience_settings_from_env(),
+        )
+        for name, base_url in leaders.items()
+    }
+
+
+# Global variable to cache the async API client
+_cached_async_api_client = None
+
+REGISTRY.register_cache(
+    "api_async",
+    lambda: _cached_async_api_client.cache if _cached_async_api_client is not None else None,
+)
+
+# Background event loop shared by all async API calls, so the client's
+# connection pool survives across Flask requests
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_cached_async_api_client():
+    """
+    Returns a cached AsyncCriblAPI client, initializing it if necessary.
+    """
+    global _cached_async_api_client
+    if _cached_async_api_client is None:
+        _cached_async_api_client = get_async_api_client_from_env()
+    return _cached_async_api_client
+
+
+# Global variable to cache the async clients of CRIBL_LEADERS
+_cached_async_leader_clients = None
+
+
+def get_cached_async_leader_clients():
+    """
+    Returns the cached AsyncCriblAPI clients of CRIBL_LEADERS, initializing them if necessary.
+
+    Returns:
+        dict: Leader name -> AsyncCriblAPI, in configured order.
+    """
+    global _cached_async_leader_clients
+    if _cached_async_leader_clients is None:
+        _cached_async_leader_clients = get_async_leader_clients_from_env()
+    return _cached_async_leader_clients
+
+
+def run_coroutine(coro):
+    """
+    Runs a coroutine on the shared background event loop and waits for its result.
+
+    Args:
+        coro (coroutine): The coroutine to run.
+
+    Returns:
+        The coroutine's return value.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="cribl-async-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
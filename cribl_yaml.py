@@ -0,0 +1,165 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+# Use the libyaml C parser when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Below this many files, parsing in-process is faster than starting a process pool.
+DEFAULT_PARALLEL_THRESHOLD = 64
+
+
+def _load_yaml_file(path):
+    """
+    Parses one YAML file; returns an empty dict for empty files.
+    """
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+class CriblYamlConfig:
+    """
+    Reads an exported Cribl configuration tree and exposes it through the same
+    interface as CriblAPI, so generate_graph can run without a leader.
+
+    Expected layout:
+        <root>/groups/<group_id>/local/cribl/inputs.yml
+        <root>/groups/<group_id>/local/cribl/outputs.yml
+        <root>/groups/<group_id>/local/cribl/pipelines/<pipeline_id>/conf.yml
+
+    Status and health endpoints have no offline equivalent and return no items.
+    """
+
+    def __init__(self, root, processes=None, parallel_threshold=DEFAULT_PARALLEL_THRESHOLD):
+        """
+        Loads the configuration tree.
+
+        Args:
+            root (str): Path of the configuration directory.
+            processes (int, optional): Size of the parsing process pool. Defaults to the CPU count.
+            parallel_threshold (int): Minimum number of files to parse them in a process pool.
+
+        Raises:
+            FileNotFoundError: If root has no groups directory.
+        """
+        self.root = root
+        self.groups = {}
+
+        groups_dir = os.path.join(root, "groups")
+        if not os.path.isdir(groups_dir):
+            raise FileNotFoundError(f"No groups directory found in {root}")
+
+        files = {}
+        for group_id in sorted(os.listdir(groups_dir)):
+            cribl_dir = os.path.join(groups_dir, group_id, "local", "cribl")
+            if not os.path.isdir(cribl_dir):
+                continue
+            self.groups[group_id] = {"inputs": [], "outputs": [], "pipelines": []}
+            for name in ("inputs", "outputs"):
+                path = os.path.join(cribl_dir, f"{name}.yml")
+                if os.path.isfile(path):
+                    files[path] = (group_id, name, None)
+            pipelines_dir = os.path.join(cribl_dir, "pipelines")
+            if os.path.isdir(pipelines_dir):
+                for pipeline_id in sorted(os.listdir(pipelines_dir)):
+                    path = os.path.join(pipelines_dir, pipeline_id, "conf.yml")
+                    if os.path.isfile(path):
+                        files[path] = (group_id, "pipelines", pipeline_id)
+
+        paths = list(files)
+        if len(paths) >= parallel_threshold:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                documents = list(executor.map(_load_yaml_file, paths, chunksize=16))
+        else:
+            documents = [_load_yaml_file(path) for path in paths]
+
+        for path, document in zip(paths, documents):
+            group_id, name, pipeline_id = files[path]
+            if pipeline_id is not None:
+                self.groups[group_id]["pipelines"].append({"id": pipeline_id, "conf": document})
+            else:
+                # inputs.yml / outputs.yml map each ID to its settings
+                entries = document.get(name) or {}
+                self.groups[group_id][name] = [
+                    {**(settings or {}), "id": item_id} for item_id, settings in entries.items()
+                ]
+
+    def get_worker_groups(self):
+        """
+        Retrieves all worker groups found in the configuration tree.
+        """
+        return {"items": [{"id": group_id} for group_id in self.groups]}
+
+    def get_sources(self, group_id):
+        """
+        Retrieves all sources (inputs) for a given worker group.
+        """
+        return {"items": self.groups[group_id]["inputs"]}
+
+    def get_destinations(self, group_id):
+        """
+        Retrieves all destinations (outputs) for a given worker group.
+        """
+        return {"items": self.groups[group_id]["outputs"]}
+
+    def get_pipelines(self, group_id):
+        """
+        Retrieves all pipelines for a given worker group, with their conf.
+        """
+        return {"items": self.groups[group_id]["pipelines"]}
+
+    def get_source_status(self, group_id):
+        return {"items": []}
+
+    def get_destination_status(self, group_id):
+        return {"items": []}
+
+    def get_pipeline_status(self, group_id):
+        return {"items": []}
+
+    def get_source_health(self, group_id):
+        return {"items": []}
+
+    def get_destination_health(self, group_id):
+        return {"items": []}
+
+    def get_pipeline_functions(self, group_id, pipeline_id):
+        """
+        Retrieves a pipeline with its conf, or an empty dict if it does not exist.
+        """
+        for pipeline in self.groups[group_id]["pipelines"]:
+            if pipeline["id"] == pipeline_id:
+                return pipeline
+        return {}
+
+
+def main(argv=None):
+    """
+    Renders the graph of an exported configuration tree, e.g. in CI.
+    """
+    from graph_generator import fetch_graph_data, iter_graph_lines
+    from renderer import pipe_dot_lines
+
+    parser = argparse.ArgumentParser(description="Render a Cribl configuration directory as a graph.")
+    parser.add_argument("config_dir", help="Cribl configuration directory containing groups/")
+    parser.add_argument("-o", "--output", default="cribl.svg", help="Output file (default: cribl.svg)")
+    parser.add_argument(
+        "-f", "--format", default="svg", help="Output format; 'dot' writes the DOT source (default: svg)"
+    )
+    args = parser.parse_args(argv)
+
+    graph_data = fetch_graph_data(CriblYamlConfig(args.config_dir))
+    # The DOT source is streamed group by group rather than built as one string
+    if args.format == "dot":
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.writelines(iter_graph_lines(graph_data))
+    else:
+        with open(args.output, "wb") as f:
+            f.write(pipe_dot_lines(iter_graph_lines(graph_data), format=args.format))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
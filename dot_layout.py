@@ -0,0 +1,310 @@
+"""
+Reuses graphviz layouts across renders of graphs with the same topology.
+
+A layout computed by ``dot -Tdot`` is reduced to the node positions, edge
+splines and cluster bounding boxes. It is applied to a later graph with the
+same nodes, edges, clusters and label and shape attributes, which
+``neato -n2`` then renders without running layout again. Colours and pen
+widths come from the new graph.
+"""
+import hashlib
+import re
+
+from graphviz import quoting
+
+_TOKEN = re.compile(
+    r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/|^\#[^\n]*)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<html><(?:[^<>]|<[^<>]*>)*>)
+  | (?P<edgeop>->|--)
+  | (?P<op>[{}\[\];,=:+])
+  | (?P<id>[^\W\d]\w*|-?(?:\.\d+|\d+(?:\.\d*)?))
+    """,
+    re.S | re.M | re.X,
+)
+
+# Layout attributes kept from the laid-out graph
+_EDGE_LAYOUT_ATTRIBUTES = ("pos", "lp", "head_lp", "tail_lp", "xlp")
+_GRAPH_LAYOUT_ATTRIBUTES = ("bb", "lp", "lwidth", "lheight")
+
+# Node and edge attributes that change the size of a node or label, so a graph
+# differing in any of them needs a new layout; labels are compared without
+# their live throughput figure (see _EPS_SUFFIX)
+_SIZE_ATTRIBUTES = frozenset((
+    "label", "xlabel", "headlabel", "taillabel", "shape", "width", "height", "fixedsize",
+    "margin", "fontsize", "fontname", "labelfontsize", "labelfontname", "peripheries", "sides",
+))
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected DOT input at offset {position}: {text[position:position + 20]!r}")
+        position = match.end()
+        if match.lastgroup != "skip":
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+def _unquote(kind, token):
+    if kind != "string":
+        return token
+    # Drop the quotes and line continuations; keep graphviz escapes such as \n and \N
+    return token[1:-1].replace("\\\n", "").replace("\\\r\n", "").replace('\\"', '"')
+
+
+def _value(tokens, i):
+    """
+    Reads an ID, concatenating quoted strings joined with "+".
+    """
+    kind, token = tokens[i]
+    if kind not in ("id", "string", "html"):
+        raise ValueError(f"Expected an ID, got {token!r}")
+    value = _unquote(kind, token)
+    i += 1
+    while i + 1 < len(tokens) and tokens[i] == ("op", "+") and tokens[i + 1][0] == "string":
+        value += _unquote(*tokens[i + 1])
+        i += 2
+    return value, i
+
+
+def _node_id(tokens, i):
+    node_id, i = _value(tokens, i)
+    # Ports and compass points do not change which node is meant
+    while i + 1 < len(tokens) and tokens[i] == ("op", ":"):
+        _, i = _value(tokens, i + 1)
+    return node_id, i
+
+
+def _attr_lists(tokens, i):
+    attributes = {}
+    while i < len(tokens) and tokens[i] == ("op", "["):
+        i += 1
+        while tokens[i] != ("op", "]"):
+            if tokens[i][0] == "op" and tokens[i][1] in ";,":
+                i += 1
+                continue
+            name, i = _value(tokens, i)
+            if tokens[i] != ("op", "="):
+                raise ValueError(f"Expected '=' after attribute {name!r}")
+            attributes[name], i = _value(tokens, i + 1)
+        i += 1
+    return attributes, i
+
+
+def _events(text):
+    """
+    Yields the statements of DOT text as events:
+    ("open", name or None), ("close",), ("set", name, value),
+    ("attr", "graph" | "node" | "edge", attributes), ("node", id, attributes)
+    and ("edge", [ids], attributes).
+
+    Statements may span several calls as long as each call gets whole tokens,
+    e.g. the lines of a graphviz.Digraph.
+
+    Raises:
+        ValueError: On DOT syntax outside the supported subset.
+    """
+    tokens = _tokenize(text)
+    i = 0
+    while i < len(tokens):
+        kind, token = tokens[i]
+        keyword = token.lower() if kind == "id" else None
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if kind == "op":
+            if token == "{":
+                yield ("open", None)
+            elif token == "}":
+                yield ("close",)
+            elif token not in ";,":
+                raise ValueError(f"Unexpected {token!r}")
+            i += 1
+        elif keyword == "strict":
+            i += 1
+        elif keyword in ("graph", "digraph", "subgraph") and following not in (("op", "["), ("op", "=")):
+            i += 1
+            name = None
+            if tokens[i] != ("op", "{"):
+                name, i = _value(tokens, i)
+            if i >= len(tokens) or tokens[i] != ("op", "{"):
+                raise ValueError(f"Expected '{{' after {token} {name}")
+            yield ("open", name)
+            i += 1
+        elif keyword in ("graph", "node", "edge") and following == ("op", "["):
+            attributes, i = _attr_lists(tokens, i + 1)
+            yield ("attr", keyword, attributes)
+        else:
+            first, i = _node_id(tokens, i)
+            if i < len(tokens) and tokens[i] == ("op", "="):
+                value, i = _value(tokens, i + 1)
+                yield ("set", first, value)
+                continue
+            ids = [first]
+            while i < len(tokens) and tokens[i][0] == "edgeop":
+                if tokens[i + 1] == ("op", "{"):
+                    raise ValueError("Edges to subgraphs are not supported")
+                node_id, i = _node_id(tokens, i + 1)
+                ids.append(node_id)
+            attributes, i = _attr_lists(tokens, i)
+            if len(ids) > 1:
+                yield ("edge", ids, attributes)
+            else:
+                yield ("node", first, attributes)
+
+
+# The "(12.34 EPS)" line that graph_generator appends to node and edge labels
+_EPS_SUFFIX = re.compile(r"\s*\(-?[\d.]+ EPS\)")
+
+
+def _size_attributes(attributes):
+    return tuple(sorted(
+        (name, _EPS_SUFFIX.sub("", value) if name == "label" else value)
+        for name, value in attributes.items()
+        if name in _SIZE_ATTRIBUTES
+    ))
+
+
+def topology_fingerprint(lines):
+    """
+    Returns a hash of the nodes, edges, subgraphs and graph attributes of a
+    graph, and of the node and edge attributes that size nodes and labels
+    (labels, shapes, fonts). Other attributes, such as colours, are ignored,
+    and so are the EPS figures of labels, so a refresh that only changed
+    throughput reuses the layout.
+
+    Args:
+        lines (iterable): DOT source lines, e.g. list(graphviz.Digraph).
+
+    Returns:
+        str: Hex digest.
+
+    Raises:
+        ValueError: On DOT syntax outside the supported subset.
+    """
+    digest = hashlib.sha256()
+    for line in lines:
+        for event in _events(line):
+            if event[0] == "node":
+                event = ("node", event[1], _size_attributes(event[2]))
+            elif event[0] == "edge":
+                event = ("edge", tuple(event[1]), _size_attributes(event[2]))
+            elif event[0] == "attr" and event[1] in ("node", "edge"):
+                event = ("attr", event[1], _size_attributes(event[2]))
+            elif event[0] == "attr":
+                event = ("attr", tuple(sorted(event[2].items())))
+            digest.update(repr(event).encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Layout:
+    """
+    Positions taken from a graph laid out by graphviz.
+    """
+
+    __slots__ = ("graph", "clusters", "nodes", "edges")
+
+    def __init__(self):
+        self.graph = {}
+        self.clusters = {}
+        self.nodes = {}
+        # (tail, head) -> layout attributes of each such edge, in source order
+        self.edges = {}
+
+
+def parse_layout(text):
+    """
+    Extracts the layout from the output of a graphviz ``-Tdot`` render.
+
+    Args:
+        text (str): Laid-out DOT source.
+
+    Returns:
+        Layout: Node positions, edge splines and graph and cluster bounding boxes.
+
+    Raises:
+        ValueError: On DOT syntax outside the supported subset.
+    """
+    layout = Layout()
+    stack = []
+    for event in _events(text):
+        kind = event[0]
+        if kind == "open":
+            stack.append(event[1])
+        elif kind == "close":
+            stack.pop()
+        elif kind in ("attr", "set"):
+            if kind == "attr" and event[1] != "graph":
+                continue
+            attributes = event[2] if kind == "attr" else {event[1]: event[2]}
+            kept = {name: value for name, value in attributes.items() if name in _GRAPH_LAYOUT_ATTRIBUTES}
+            if len(stack) == 1:
+                layout.graph.update(kept)
+            elif stack and stack[-1] and stack[-1].startswith("cluster"):
+                layout.clusters.setdefault(stack[-1], {}).update(kept)
+        elif kind == "node":
+            if "pos" in event[2]:
+                layout.nodes[event[1]] = event[2]["pos"]
+        elif kind == "edge" and len(event[1]) == 2:
+            kept = {name: value for name, value in event[2].items() if name in _EDGE_LAYOUT_ATTRIBUTES}
+            layout.edges.setdefault(tuple(event[1]), []).append(kept)
+    return layout
+
+
+def _attribute_statement(attributes, indent):
+    return f"{indent}graph [{quoting.a_list(None, kwargs=attributes)}]\n"
+
+
+def apply_layout(lines, layout):
+    """
+    Pins a graph to a layout of a graph with the same topology.
+
+    Args:
+        lines (iterable): DOT source lines, e.g. list(graphviz.Digraph).
+        layout (Layout): Layout returned by parse_layout.
+
+    Returns:
+        str: DOT source to render with ``neato -n2``.
+
+    Raises:
+        ValueError: On DOT syntax outside the supported subset.
+    """
+    output = []
+    stack = []
+    edges_seen = {}
+    for line in lines:
+        events = list(_events(line))
+
+        if events and events[0][0] == "edge" and len(events) == 1 and len(events[0][1]) == 2:
+            key = tuple(events[0][1])
+            index = edges_seen.get(key, 0)
+            edges_seen[key] = index + 1
+            laid_out = layout.edges.get(key, ())
+            if index < len(laid_out) and laid_out[index]:
+                extra = quoting.a_list(None, kwargs=laid_out[index])
+                line = line.rstrip("\n")
+                line = f"{line[:-1]} {extra}]\n" if line.endswith("]") else f"{line} [{extra}]\n"
+
+        if events and events[-1][0] == "close" and len(stack) == 1:
+            # Positions are set after all nodes are declared, so cluster membership is unchanged
+            for node_id, pos in layout.nodes.items():
+                output.append(f"\t{quoting.quote(node_id)} [pos={quoting.quote(pos)}]\n")
+
+        output.append(line)
+
+        for event in events:
+            if event[0] == "open":
+                stack.append(event[1])
+                indent = "\t" * len(stack)
+                if len(stack) == 1 and layout.graph:
+                    output.append(_attribute_statement(layout.graph, indent))
+                elif event[1] in layout.clusters and layout.clusters[event[1]]:
+                    output.append(_attribute_statement(layout.clusters[event[1]], indent))
+            elif event[0] == "close":
+                stack.pop()
+    return "".join(output)
@@ -0,0 +1,365 @@
+class FlowMetrics:
+    """
+    Throughput of a node, from the status endpoints.
+    """
+
+    __slots__ = ("eps", "events")
+
+    def __init__(self, eps=None, events=None):
+        self.eps = eps
+        self.events = events
+
+
+class FlowHealth:
+    """
+    Error and drop rates of a node, from the health endpoints.
+    """
+
+    __slots__ = ("error_rate", "drop_rate")
+
+    def __init__(self, error_rate=0, drop_rate=0):
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+
+
+class FlowNode:
+    """
+    An input or output of a worker group.
+    """
+
+    __slots__ = ("name", "disabled", "description", "orphan", "metrics", "health")
+
+    def __init__(self, name, disabled=False, description="", metrics=None, health=None):
+        """
+        Args:
+            name (int): Interned ID of the input or output; see FlowGroup.name.
+            disabled (bool): Whether the item is disabled.
+            description (str): The configured description.
+            metrics (FlowMetrics, optional): Throughput, if reported.
+            health (FlowHealth, optional): Health, if reported.
+        """
+        self.name = name
+        self.disabled = disabled
+        self.description = description
+        self.orphan = False
+        self.metrics = metrics
+        self.health = health
+
+
+class FlowPipeline:
+    """
+    A pipeline referenced by at least one route of a worker group.
+    """
+
+    __slots__ = ("name", "eps", "complexity")
+
+    def __init__(self, name, eps=0, complexity=None):
+        """
+        Args:
+            name (int): Interned pipeline ID.
+            eps (float): Events per second through the pipeline.
+            complexity (dict, optional): Result of _calculate_pipeline_complexity.
+        """
+        self.name = name
+        self.eps = eps
+        self.complexity = complexity
+
+
+class FlowEdge:
+    """
+    A route from an input through a pipeline to an output.
+    """
+
+    __slots__ = ("source", "target", "pipeline")
+
+    def __init__(self, source, target, pipeline):
+        """
+        Args:
+            source (int): Interned input ID.
+            target (int): Interned output ID (the output may not exist).
+            pipeline (FlowPipeline): The pipeline the route goes through.
+        """
+        self.source = source
+        self.target = target
+        self.pipeline = pipeline
+
+
+class FlowGroup:
+    """
+    One worker group: its inputs, outputs and routes, with IDs interned to integers.
+
+    stale_since is the Unix time of the data when it is last-known data drawn in
+    place of a fetch that missed its deadline; unavailable marks a group without
+    any data.
+
+    outgoing, incoming and pipeline_edges index the positions in edges of the
+    routes leaving a node, entering a node and going through a pipeline, by
+    interned ID. Pipelines are interned apart from inputs and outputs, so a
+    pipeline and a node of the same name get different IDs.
+    """
+
+    __slots__ = (
+        "id", "names", "_name_ids", "_pipeline_ids",
+        "inputs", "outputs", "pipelines", "edges", "max_eps", "pipeline_count",
+        "stale_since", "unavailable",
+        "outgoing", "incoming", "pipeline_edges",
+    )
+
+    def __init__(self, group_id):
+        self.id = group_id
+        self.names = []
+        self._name_ids = {}
+        self._pipeline_ids = {}
+        self.inputs = []
+        self.outputs = []
+        self.pipelines = {}
+        self.edges = []
+        self.max_eps = 0
+        self.pipeline_count = 0
+        self.stale_since = None
+        self.unavailable = False
+        self.outgoing = {}
+        self.incoming = {}
+        self.pipeline_edges = {}
+
+    def intern(self, name):
+        """
+        Returns the integer ID of the input or output name, assigning one on first use.
+        """
+        return self._intern(self._name_ids, name)
+
+    def intern_pipeline(self, name):
+        """
+        Returns the integer ID of the pipeline name, assigning one on first use.
+        """
+        return self._intern(self._pipeline_ids, name)
+
+    def _intern(self, ids, name):
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def name(self, name_id):
+        """
+        Returns the string behind an interned ID.
+        """
+        return self.names[name_id]
+
+    def lookup(self, name):
+        """
+        Returns the interned ID of an input or output, or None if it does not occur in the group.
+        """
+        return self._name_ids.get(name)
+
+    def lookup_pipeline(self, name):
+        """
+        Returns the interned ID of a routed pipeline, or None if no route of the group uses it.
+        """
+        return self._pipeline_ids.get(name)
+
+    def add_edge(self, edge):
+        """
+        Appends a route and indexes it by source, target and pipeline.
+        """
+        index = len(self.edges)
+        self.edges.append(edge)
+        self.outgoing.setdefault(edge.source, []).append(index)
+        self.incoming.setdefault(edge.target, []).append(index)
+        self.pipeline_edges.setdefault(edge.pipeline.name, []).append(index)
+
+    def reachable(self, name):
+        """
+        Returns the routes that data passing a node or pipeline takes or came from.
+
+        Follows outgoing routes downstream and incoming routes upstream of the
+        node, or of both ends of the pipeline's routes, through the indexes.
+
+        Args:
+            name (str): ID of an input, output or pipeline of the group; an
+                input or output is meant if a pipeline has the same ID.
+
+        Returns:
+            tuple: (interned node IDs, sorted positions in edges), or None if
+            name does not occur in the group.
+        """
+        start = self.lookup(name)
+        if start is not None:
+            edge_indexes = set()
+            downstream = [start]
+            upstream = [start]
+        else:
+            pipeline_id = self.lookup_pipeline(name)
+            if pipeline_id is None:
+                return None
+            edge_indexes = set(self.pipeline_edges.get(pipeline_id, ()))
+            downstream = [self.edges[index].target for index in edge_indexes]
+            upstream = [self.edges[index].source for index in edge_indexes]
+
+        for adjacency, end, frontier in ((self.outgoing, "target", downstream), (self.incoming, "source", upstream)):
+            seen = set(frontier)
+            while frontier:
+                for index in adjacency.get(frontier.pop(), ()):
+                    edge_indexes.add(index)
+                    next_id = getattr(self.edges[index], end)
+                    if next_id not in seen:
+                        seen.add(next_id)
+                        frontier.append(next_id)
+
+        node_ids = set()
+        for index in edge_indexes:
+            node_ids.add(self.edges[index].source)
+            node_ids.add(self.edges[index].target)
+        if start is not None:
+            node_ids.add(start)
+        return node_ids, sorted(edge_indexes)
+
+
+class FlowGraph:
+    """
+    The whole leader as a list of FlowGroups, in worker-group order.
+    """
+
+    __slots__ = ("groups",)
+
+    def __init__(self, groups=None):
+        self.groups = groups or []
+
+
+def _metrics_from(item):
+    if not item:
+        return None
+    return FlowMetrics(eps=item.get("eps"), events=item.get("events"))
+
+
+def _health_from(item):
+    if not item:
+        return None
+    return FlowHealth(error_rate=item.get("error_rate", 0), drop_rate=item.get("drop_rate", 0))
+
+
+def build_flow_group(group_id, group_data):
+    """
+    Builds the model of one worker group in a single pass over its data, and
+    runs the orphan and throughput analyses on it.
+
+    Args:
+        group_id (str): The worker group ID.
+        group_data (dict): Fetched data for the group, as returned by fetch_graph_data.
+
+    Returns:
+        FlowGroup: The group model.
+    """
+    group = FlowGroup(group_id)
+    group.stale_since = group_data.get("stale_since")
+    group.unavailable = group_data.get("unavailable", False)
+    source_metrics = group_data["source_metrics"]
+    dest_metrics = group_data["dest_metrics"]
+    source_health_map = group_data["source_health_map"]
+    dest_health_map = group_data["dest_health_map"]
+    pipeline_metrics = group_data["pipeline_metrics"]
+    pipeline_complexity = group_data["pipeline_complexity"]
+
+    referenced_outputs = set()
+    for input_data in group_data["inputs"]:
+        input_id = input_data["id"]
+        node = FlowNode(
+            group.intern(input_id),
+            disabled=input_data.get("disabled", False),
+            description=input_data.get("description", ""),
+            metrics=_metrics_from(source_metrics.get(input_id)),
+            health=_health_from(source_health_map.get(input_id)),
+        )
+        connections = input_data.get("connections", [])
+        # Inputs without any connection are not routed anywhere
+        node.orphan = not node.disabled and not connections
+        group.inputs.append(node)
+
+        for conn in connections:
+            if not conn or "output" not in conn:
+                continue
+            target = group.intern(conn["output"])
+            # Disabled inputs still count as references to their outputs
+            referenced_outputs.add(target)
+            if node.disabled:
+                continue
+            pipeline_name = conn.get("pipeline", "passthru")
+            pipeline_id = group.intern_pipeline(pipeline_name)
+            pipeline = group.pipelines.get(pipeline_id)
+            if pipeline is None:
+                pipeline = FlowPipeline(
+                    pipeline_id,
+                    eps=pipeline_metrics.get(pipeline_name, {}).get("eps", 0),
+                    complexity=pipeline_complexity.get(pipeline_name),
+                )
+                group.pipelines[pipeline_id] = pipeline
+            group.add_edge(FlowEdge(node.name, target, pipeline))
+
+    # Pipelines configured in the group plus any only known from routes
+    group.pipeline_count = len(
+        set(pipeline_complexity).union(group.name(pipeline_id) for pipeline_id in group.pipelines)
+    )
+
+    for output_data in group_data["outputs"]:
+        output_id = output_data["id"]
+        node = FlowNode(
+            group.intern(output_id),
+            disabled=output_data.get("disabled", False),
+            description=output_data.get("description", ""),
+            metrics=_metrics_from(dest_metrics.get(output_id)),
+            health=_health_from(dest_health_map.get(output_id)),
+        )
+        # Outputs that no input routes to
+        node.orphan = node.name not in referenced_outputs
+        group.outputs.append(node)
+
+    # Edge scaling is relative to the busiest input or output of the group
+    all_eps_values = [
+        metrics["eps"]
+        for metrics_map in (source_metrics, dest_metrics)
+        for metrics in metrics_map.values()
+        if metrics.get("eps") is not None
+    ]
+    group.max_eps = max(all_eps_values) if all_eps_values else 0
+
+    return group
+
+
+def summarize_group(group):
+    """
+    Aggregates a group into the figures shown on its collapsed summary node.
+
+    Args:
+        group (FlowGroup): The group model.
+
+    Returns:
+        dict: inputs, outputs and disabled counts, pipelines, eps (total input
+        throughput), orphans, and the worst error_rate and drop_rate of any
+        enabled node.
+    """
+    summary = {
+        "inputs": 0,
+        "outputs": 0,
+        "disabled": 0,
+        "pipelines": group.pipeline_count,
+        "eps": 0.0,
+        "orphans": 0,
+        "error_rate": 0,
+        "drop_rate": 0,
+    }
+    for kind, nodes in (("inputs", group.inputs), ("outputs", group.outputs)):
+        for node in nodes:
+            if node.disabled:
+                summary["disabled"] += 1
+                continue
+            summary[kind] += 1
+            if node.orphan:
+                summary["orphans"] += 1
+            if kind == "inputs" and node.metrics and node.metrics.eps is not None:
+                summary["eps"] += node.metrics.eps
+            if node.health:
+                summary["error_rate"] = max(summary["error_rate"], node.health.error_rate)
+                summary["drop_rate"] = max(summary["drop_rate"], node.health.drop_rate)
+    return summary
@@ -0,0 +1,290 @@
+"""
+Comparison of the graphs of two leaders, e.g. staging and prod.
+
+Worker groups, inputs, outputs and routes are matched by their identity
+(group ID, kind and ID of a node, or source, target and pipeline of a route)
+through dicts, so a diff takes time linear in the size of both graphs.
+Throughput and health differ between any two leaders and are not compared.
+Groups that could not be fetched from either leader, or are drawn from
+last-known data, are reported as unknown rather than diffed.
+"""
+from datetime import datetime, timezone
+
+import graphviz
+
+from graph_generator import GRAPH_STAGE_SECONDS, build_flow_graph
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+UNKNOWN = "unknown"
+
+STATUSES = (ADDED, REMOVED, CHANGED, UNCHANGED, UNKNOWN)
+
+# (fillcolor, color) of diffed elements, by status
+_DIFF_COLORS = {
+    ADDED: ("palegreen", "darkgreen"),
+    REMOVED: ("mistyrose", "red"),
+    CHANGED: ("lightyellow", "darkorange"),
+    UNCHANGED: ("white", "gray60"),
+    UNKNOWN: ("whitesmoke", "gray40"),
+}
+
+# Longest value shown in the label of a changed attribute
+_MAX_VALUE_LENGTH = 24
+
+
+def _node_signatures(group):
+    """
+    Returns {(kind, name): compared attributes} of a group's inputs and outputs.
+    """
+    signatures = {}
+    if group is None:
+        return signatures
+    for kind, nodes in (("input", group.inputs), ("output", group.outputs)):
+        for node in nodes:
+            signatures[(kind, group.name(node.name))] = {
+                "disabled": node.disabled,
+                "description": node.description,
+            }
+    return signatures
+
+
+def _edge_signatures(group):
+    """
+    Returns {(source, target, pipeline): compared attributes} of a group's routes.
+    """
+    signatures = {}
+    if group is None:
+        return signatures
+    for edge in group.edges:
+        pipeline = edge.pipeline
+        key = (group.name(edge.source), group.name(edge.target), group.name(pipeline.name))
+        signatures[key] = {"functions": (pipeline.complexity or {}).get("score", 0)}
+    return signatures
+
+
+def _diff_signatures(base, other):
+    """
+    Matches two signature maps by key.
+
+    Args:
+        base (dict): Signatures of the base leader.
+        other (dict): Signatures of the compared leader.
+
+    Returns:
+        list: (key, status, changes) in base order, followed by the keys only in
+        other; changes maps each differing attribute to its [base, other] values.
+    """
+    entries = []
+    for key, signature in base.items():
+        other_signature = other.get(key)
+        if other_signature is None:
+            entries.append((key, REMOVED, {}))
+            continue
+        changes = {
+            name: [value, other_signature[name]]
+            for name, value in signature.items()
+            if other_signature[name] != value
+        }
+        entries.append((key, CHANGED if changes else UNCHANGED, changes))
+    entries.extend((key, ADDED, {}) for key in other if key not in base)
+    return entries
+
+
+def _unknown_reason(base_group, other_group):
+    """
+    Returns why a group cannot be compared, or None if neither side is a
+    placeholder for a failed fetch or last-known data.
+    """
+    reasons = []
+    for side, group in (("base", base_group), ("other", other_group)):
+        if group is None:
+            continue
+        if group.unavailable:
+            reasons.append(f"no data from {side}")
+        elif group.stale_since is not None:
+            fetched = datetime.fromtimestamp(group.stale_since, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+            reasons.append(f"{side} data from {fetched}")
+    return ", ".join(reasons) or None
+
+
+def _diff_group(group_id, base_group, other_group):
+    """
+    Diffs one worker group; either side is None if the group only exists on the other.
+    """
+    reason = _unknown_reason(base_group, other_group)
+    if reason is not None:
+        return {"id": group_id, "status": UNKNOWN, "reason": reason, "nodes": [], "edges": []}
+
+    nodes = _diff_signatures(_node_signatures(base_group), _node_signatures(other_group))
+    edges = _diff_signatures(_edge_signatures(base_group), _edge_signatures(other_group))
+    if base_group is None:
+        status = ADDED
+    elif other_group is None:
+        status = REMOVED
+    elif any(entry[1] != UNCHANGED for entry in nodes) or any(entry[1] != UNCHANGED for entry in edges):
+        status = CHANGED
+    else:
+        status = UNCHANGED
+
+    return {
+        "id": group_id,
+        "status": status,
+        "nodes": [
+            {"kind": kind, "name": name, "status": node_status, "changes": changes}
+            for (kind, name), node_status, changes in nodes
+        ],
+        "edges": [
+            {"source": source, "target": target, "pipeline": pipeline, "status": edge_status, "changes": changes}
+            for (source, target, pipeline), edge_status, changes in edges
+        ],
+    }
+
+
+def diff_flow_graphs(base, other):
+    """
+    Compares the models of two leaders.
+
+    Args:
+        base (FlowGraph): The model of the base leader.
+        other (FlowGraph): The model of the compared leader.
+
+    Returns:
+        list: One dict per worker group, in base order followed by groups only
+        in other, with "id", "status" ("added", "removed", "changed",
+        "unchanged", or "unknown" with a "reason" when either side was not
+        fetched), and "nodes" and "edges" lists carrying their own status
+        and the changed attributes; an unknown group has neither.
+    """
+    other_groups = {group.id: group for group in other.groups}
+    base_ids = set()
+    pairs = []
+    for group in base.groups:
+        base_ids.add(group.id)
+        pairs.append((group.id, group, other_groups.get(group.id)))
+    pairs.extend((group.id, None, group) for group in other.groups if group.id not in base_ids)
+    return [_diff_group(group_id, base_group, other_group) for group_id, base_group, other_group in pairs]
+
+
+def diff_graph_data(base_data, other_data):
+    """
+    Compares the graph data of two leaders, as returned by fetch_graph_data.
+
+    Args:
+        base_data (list): (group_id, group_data) pairs of the base leader.
+        other_data (list): (group_id, group_data) pairs of the compared leader.
+
+    Returns:
+        list: The diff, as returned by diff_flow_graphs.
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="diff"):
+        return diff_flow_graphs(build_flow_graph(base_data), build_flow_graph(other_data))
+
+
+def diff_summary(diff):
+    """
+    Counts the groups, nodes and edges of a diff by status.
+
+    Returns:
+        dict: {"groups": counts, "nodes": counts, "edges": counts}, each
+        mapping every status to a number.
+    """
+    summary = {kind: dict.fromkeys(STATUSES, 0) for kind in ("groups", "nodes", "edges")}
+    for group in diff:
+        summary["groups"][group["status"]] += 1
+        for node in group["nodes"]:
+            summary["nodes"][node["status"]] += 1
+        for edge in group["edges"]:
+            summary["edges"][edge["status"]] += 1
+    return summary
+
+
+def _shorten(value):
+    text = str(value)
+    if len(text) > _MAX_VALUE_LENGTH:
+        text = text[:_MAX_VALUE_LENGTH - 1] + "…"
+    return text
+
+
+def _change_lines(changes):
+    """
+    Returns one "attribute: base → other" label line per changed attribute.
+    """
+    return "".join(f"\n{name}: {_shorten(old)} → {_shorten(new)}" for name, (old, new) in changes.items())
+
+
+def _diff_node_attributes(node):
+    """
+    Returns the graphviz attributes of a diffed input or output.
+    """
+    fillcolor, color = _DIFF_COLORS[node["status"]]
+    style = "rounded,filled,dashed" if node["status"] == REMOVED else "rounded,filled"
+    return {
+        "label": node["name"] + _change_lines(node["changes"]),
+        "shape": "box",
+        "style": style,
+        "fillcolor": fillcolor,
+        "color": color,
+        "penwidth": "1" if node["status"] == UNCHANGED else "2",
+    }
+
+
+def _diff_edge_attributes(edge):
+    """
+    Returns the graphviz attributes of a diffed route.
+    """
+    _, color = _DIFF_COLORS[edge["status"]]
+    return {
+        "label": edge["pipeline"] + _change_lines(edge["changes"]),
+        "color": color,
+        "style": "dashed" if edge["status"] == REMOVED else "solid",
+        "penwidth": "1" if edge["status"] == UNCHANGED else "2",
+    }
+
+
+def build_diff_graph(diff, base_name, other_name):
+    """
+    Draws a diff as a graphviz Digraph, colouring added elements green,
+    removed ones red and dashed, changed ones orange and unchanged ones gray.
+
+    Args:
+        diff (list): The diff, as returned by diff_graph_data.
+        base_name (str): Name of the base leader.
+        other_name (str): Name of the compared leader.
+
+    Returns:
+        graphviz.Digraph: One cluster per worker group of either leader.
+    """
+    dot = graphviz.Digraph("CriblDiff", comment="Cribl Configuration Diff")
+    dot.attr(
+        rankdir="LR", splines="polylines", nodesep="0.5", ranksep="1.5",
+        label=f"{base_name} → {other_name}", labelloc="t",
+    )
+
+    for group in diff:
+        group_id = group["id"]
+        status = group["status"]
+        with dot.subgraph(name=f"cluster_{group_id}") as c:
+            if status == UNKNOWN:
+                c.attr(label=f"{group_id} (not compared)", color=_DIFF_COLORS[UNKNOWN][1], style="dotted")
+                c.node(f"{group_id}__unknown", label=f"Not compared: {group['reason']}", shape="note",
+                       style="filled", fillcolor=_DIFF_COLORS[UNKNOWN][0], fontcolor="gray40")
+                continue
+            c.attr(
+                label=group_id if status == UNCHANGED else f"{group_id} ({status})",
+                color=_DIFF_COLORS[status][1],
+                style="dashed" if status == REMOVED else "solid",
+            )
+            for kind, rank in (("input", "source"), ("output", "sink")):
+                with c.subgraph() as s:
+                    s.attr(rank=rank)
+                    for node in group["nodes"]:
+                        if node["kind"] == kind:
+                            s.node(f"{group_id}_{node['name']}", **_diff_node_attributes(node))
+
+            for edge in group["edges"]:
+                c.edge(f"{group_id}_{edge['source']}", f"{group_id}_{edge['target']}", **_diff_edge_attributes(edge))
+
+    return dot
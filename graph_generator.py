@@ -1,5 +1,18 @@
+import asyncio
+import hashlib
+import json
+import math
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
 import graphviz
 
+from cache import TTLCache
+from flow_model import FlowGraph, build_flow_group, summarize_group
+from metrics import REGISTRY, Histogram
+
 
 def _get_node_color(health_metrics):
     """
@@ -15,9 +28,13 @@ def _get_node_color(health_metrics):
         return None
 
     # Check for error_rate or drop_rate
-    error_rate = health_metrics.get("error_rate", 0)
-    drop_rate = health_metrics.get("drop_rate", 0)
+    return _health_color(health_metrics.get("error_rate", 0), health_metrics.get("drop_rate", 0))
+
 
+def _health_color(error_rate, drop_rate):
+    """
+    Maps error and drop rates (percentages) to a node fill colour, or None if healthy.
+    """
     # Critical: > 10%
     if error_rate > 10 or drop_rate > 10:
         return "lightcoral"  # Red
@@ -124,7 +141,8 @@ def _calculate_pipeline_complexity(pipeline_obj):
     Higher function count = higher complexity.
 
     Args:
-        pipeline_obj (dict): Pipeline object with 'functions' or 'config' field.
+        pipeline_obj (dict): Pipeline object with a functions list (see _function_list)
+            or a 'function_count' field.
 
     Returns:
         dict: {
@@ -138,20 +156,11 @@ def _calculate_pipeline_complexity(pipeline_obj):
         - score 5-15:  "medium"   (complex, watch)
         - score > 15:  "high"     (very complex, refactor)
     """
-    # Try to get function count from pipeline object
-    function_count = 0
-
-    # Method 1: Direct functions list
-    if "functions" in pipeline_obj and isinstance(pipeline_obj["functions"], list):
-        function_count = len(pipeline_obj["functions"])
-    # Method 2: Direct function_count field
-    elif "function_count" in pipeline_obj:
+    functions = _function_list(pipeline_obj)
+    if functions is not None:
+        function_count = len(functions)
+    else:
         function_count = int(pipeline_obj.get("function_count", 0))
-    # Method 3: Count functions in config if available
-    elif "config" in pipeline_obj and isinstance(pipeline_obj["config"], dict):
-        config = pipeline_obj["config"]
-        if "functions" in config:
-            function_count = len(config["functions"])
 
     # Classify complexity
     if function_count < 5:
@@ -171,336 +180,1144 @@ def _calculate_pipeline_complexity(pipeline_obj):
     }
 
 
-def generate_graph(api_client):
+# Number of worker threads used to fetch worker-group data concurrently.
+DEFAULT_FETCH_WORKERS = 8
+
+# {"model": FlowGroup, output: rendering} entries keyed by (group_id, _group_fingerprint)
+_fragment_cache = TTLCache(max_entries=1024)
+REGISTRY.register_cache("fragment", lambda: _fragment_cache)
+
+GRAPH_STAGE_SECONDS = Histogram(
+    "graph_stage_seconds", "Duration of the fetch and build stages of graph generation.", ("stage",)
+)
+
+# Per-group endpoints fetched in parallel, as (data key, CriblAPI method) pairs.
+_GROUP_ENDPOINTS = (
+    ("inputs", "get_sources"),
+    ("outputs", "get_destinations"),
+    ("source_metrics", "get_source_status"),
+    ("dest_metrics", "get_destination_status"),
+    ("source_health_map", "get_source_health"),
+    ("dest_health_map", "get_destination_health"),
+    ("pipeline_metrics", "get_pipeline_status"),
+    ("pipelines", "get_pipelines"),
+)
+
+# Metrics endpoints that degrade to an empty map on failure, as (data key, description) pairs.
+_METRIC_ENDPOINTS = (
+    ("source_metrics", "source status"),
+    ("dest_metrics", "destination status"),
+    ("source_health_map", "source health"),
+    ("dest_health_map", "destination health"),
+    ("pipeline_metrics", "pipeline status"),
+)
+
+
+def _function_list(pipeline_obj):
     """
-    Fetches Cribl configurations from the API and returns a graphviz Digraph object.
+    Returns the functions list a pipeline object carries, if any.
 
-    Includes metrics overlay showing:
-    - EPS (Events Per Second) on nodes and edges
-    - Health status via node coloring
-    - Edge thickness and color based on throughput volume
+    The list is looked up directly on the object, then in its 'config' and
+    'conf' sections (the latter as returned by the /pipelines listing).
+
+    Args:
+        pipeline_obj (dict): Pipeline object from the /pipelines listing or its details.
+
+    Returns:
+        list: The pipeline's functions, or None if the object has no functions list.
+    """
+    for section in (pipeline_obj, pipeline_obj.get("config"), pipeline_obj.get("conf")):
+        if isinstance(section, dict) and isinstance(section.get("functions"), list):
+            return section["functions"]
+    return None
+
+
+def _has_function_list(pipeline_obj):
+    """
+    Checks whether a pipeline object already carries its functions list.
 
     Args:
+        pipeline_obj (dict): Pipeline object from the /pipelines listing.
+
+    Returns:
+        bool: True if complexity can be scored without fetching pipeline details.
+    """
+    return _function_list(pipeline_obj) is not None
+
+
+def _bounded(api_client, method, deadline):
+    """
+    Wraps an API client method run on a pool thread so that its requests are
+    bounded by the deadline (see CriblAPI.deadline). Requests abandoned at the
+    deadline then end soon after it rather than holding their thread for the
+    full timeouts. Clients without deadline support get method unchanged.
+    """
+    if deadline is None or not hasattr(api_client, "deadline"):
+        return method
+
+    def call(*args):
+        with api_client.deadline(deadline):
+            return method(*args)
+    return call
+
+
+def _submit_pipeline_details(executor, api_client, group_id, pipelines_future, deadline=None):
+    """
+    Schedules the per-pipeline detail fetches used for complexity scoring.
+
+    Pipelines whose functions are already part of the bulk listing are scored
+    from it directly; details are only fetched for the remaining ones.
+
+    Args:
+        executor (ThreadPoolExecutor): Pool to run the detail fetches on.
         api_client (CriblAPI): An instance of the CriblAPI client.
+        group_id (str): The worker group the pipelines belong to.
+        pipelines_future (Future): Pending result of get_pipelines for the group.
+        deadline (float, optional): time.monotonic() value bounding the detail requests.
 
     Returns:
-        graphviz.Digraph: The generated graph showing inputs, outputs, and pipeline connections.
+        list: (pipeline, Future or None) pairs, or None if the pipeline listing failed.
+    """
+    get_pipeline_functions = _bounded(api_client, api_client.get_pipeline_functions, deadline)
+    try:
+        pipelines = pipelines_future.result().get("items", [])
+        return [
+            (
+                pipeline,
+                None if _has_function_list(pipeline)
+                else executor.submit(get_pipeline_functions, group_id, pipeline["id"]),
+            )
+            for pipeline in pipelines
+        ]
+    except Exception as e:
+        print(f"Failed to calculate pipeline complexity for group {group_id}: {e}")
+        return None
+
+
+def _collect_group_data(group_id, futures, detail_futures):
+    """
+    Resolves the fetched responses of one worker group into plain data.
+
+    Args:
+        group_id (str): The worker group being collected.
+        futures (dict): Data key → Future for each entry of _GROUP_ENDPOINTS.
+        detail_futures (list): (pipeline, Future or None) pairs from _submit_pipeline_details.
+
+    Returns:
+        dict: inputs, outputs, metric/health maps keyed by item ID, and pipeline_complexity.
 
     Raises:
-        Exception: If no worker groups are found.
+        Exception: If the inputs or outputs of the group could not be fetched.
     """
-    dot = graphviz.Digraph("Cribl", comment="Cribl Configuration")
-    dot.attr(rankdir="LR", splines="polylines", nodesep="0.5", ranksep="1.5")
+    group_data = {
+        "inputs": futures["inputs"].result().get("items", []),
+        "outputs": futures["outputs"].result().get("items", []),
+    }
+
+    # Metrics and health data are optional; a failing endpoint yields an empty map
+    for key, description in _METRIC_ENDPOINTS:
+        try:
+            items = futures[key].result().get("items", [])
+            group_data[key] = {item["id"]: item for item in items}
+        except Exception as e:
+            print(f"Failed to fetch {description} for group {group_id}: {e}")
+            group_data[key] = {}
+
+    pipeline_complexity = {}
+    if detail_futures is not None:
+        try:
+            for pipeline, future in detail_futures:
+                if future is None:
+                    pipeline_complexity[pipeline["id"]] = _calculate_pipeline_complexity(pipeline)
+                    continue
+                # Try to get detailed function info
+                try:
+                    complexity = _calculate_pipeline_complexity(future.result())
+                except Exception:
+                    # If detailed fetch fails, use basic info
+                    complexity = _calculate_pipeline_complexity(pipeline)
+                pipeline_complexity[pipeline["id"]] = complexity
+        except Exception as e:
+            print(f"Failed to calculate pipeline complexity for group {group_id}: {e}")
+            pipeline_complexity = {}
+    group_data["pipeline_complexity"] = pipeline_complexity
+
+    return group_data
+
+
+def _select_group_ids(groups, group_ids):
+    """
+    Returns the IDs of the listed worker groups to fetch, in listing order.
 
-    groups = api_client.get_worker_groups().get("items", [])
+    Args:
+        groups (list): Items returned by get_worker_groups.
+        group_ids (iterable, optional): Restricts the result to these groups.
+
+    Raises:
+        Exception: If no worker groups are found.
+        KeyError: If a requested group does not exist.
+    """
     if not groups:
         raise Exception("No worker groups found.")
+    all_ids = [group["id"] for group in groups]
+    if group_ids is None:
+        return all_ids
 
-    for group in groups:
-        group_id = group["id"]
+    wanted = set(group_ids)
+    missing = wanted.difference(all_ids)
+    if missing:
+        raise KeyError(f"Unknown worker groups: {', '.join(sorted(missing))}")
+    return [group_id for group_id in all_ids if group_id in wanted]
 
-        with dot.subgraph(name=f"cluster_{group_id}") as c:
-            c.attr(label=group_id)
-            inputs = api_client.get_sources(group_id).get("items", [])
-            outputs = api_client.get_destinations(group_id).get("items", [])
 
-            # Fetch metrics and health data
-            try:
-                source_status = api_client.get_source_status(group_id).get("items", [])
-                source_metrics = {item["id"]: item for item in source_status}
-            except Exception as e:
-                print(f"Failed to fetch source status for group {group_id}: {e}")
-                source_metrics = {}
+def _remaining(deadline):
+    """
+    Returns the seconds left until a time.monotonic() deadline, or None without one.
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
 
-            try:
-                dest_status = api_client.get_destination_status(group_id).get("items", [])
-                dest_metrics = {item["id"]: item for item in dest_status}
-            except Exception as e:
-                print(f"Failed to fetch destination status for group {group_id}: {e}")
-                dest_metrics = {}
 
-            try:
-                source_health = api_client.get_source_health(group_id).get("items", [])
-                source_health_map = {item["id"]: item for item in source_health}
-            except Exception as e:
-                print(f"Failed to fetch source health for group {group_id}: {e}")
-                source_health_map = {}
+# Marks a group whose pipeline listing missed the deadline
+_LATE = object()
 
-            try:
-                dest_health = api_client.get_destination_health(group_id).get("items", [])
-                dest_health_map = {item["id"]: item for item in dest_health}
-            except Exception as e:
-                print(f"Failed to fetch destination health for group {group_id}: {e}")
-                dest_health_map = {}
 
-            try:
-                pipeline_status = api_client.get_pipeline_status(group_id).get("items", [])
-                pipeline_metrics = {item["id"]: item for item in pipeline_status}
-            except Exception as e:
-                print(f"Failed to fetch pipeline status for group {group_id}: {e}")
-                pipeline_metrics = {}
-
-            # Feature #2: Configuration Analysis
-            # Build a map of connections by input ID
-            connections_map = {}
-            all_connections = []
-            for input_data in inputs:
-                input_id = input_data["id"]
-                connections = input_data.get("connections", [])
-                connections_map[input_id] = connections
-                all_connections.extend(connections)
-
-            # Detect orphan inputs and outputs
-            try:
-                orphan_inputs = _detect_orphan_inputs(inputs, connections_map)
-            except Exception as e:
-                print(f"Failed to detect orphan inputs for group {group_id}: {e}")
-                orphan_inputs = set()
+def _late_group_data(group_id, last_known):
+    """
+    Returns the data drawn for a worker group whose fetch missed the deadline or failed.
+
+    Args:
+        group_id (str): The worker group ID.
+        last_known (callable, optional): Maps a group ID to its last fetched
+            (group_data, fetched_at), or None if there is none.
+
+    Returns:
+        dict: The last-known data marked with stale_since, or an empty group marked unavailable.
+    """
+    known = last_known(group_id) if last_known is not None else None
+    if known is not None:
+        group_data, fetched_at = known
+        print(f"Worker group {group_id} was not fetched; drawing data from {fetched_at}")
+        return dict(group_data, stale_since=fetched_at)
+    print(f"Worker group {group_id} was not fetched and has no earlier data")
+    group_data = {"inputs": [], "outputs": [], "pipeline_complexity": {}, "unavailable": True}
+    for key, _ in _METRIC_ENDPOINTS:
+        group_data[key] = {}
+    return group_data
+
+
+def _resolve_group_data(group_id, futures, details, last_known, failures):
+    """
+    Collects the responses of a worker group, degrading it like a late group
+    if its inputs or outputs could not be fetched (e.g. CircuitOpenError).
+
+    Args:
+        failures (list): The error of a degraded group is appended to it.
+    """
+    try:
+        return _collect_group_data(group_id, futures, details)
+    except Exception as e:
+        print(f"Failed to fetch worker group {group_id}: {e}")
+        failures.append(e)
+        return _late_group_data(group_id, last_known)
 
+
+def _check_failures(graph_data, failures):
+    """
+    Raises the first fetch error if every group failed and none has earlier
+    data to draw, e.g. when the leader rejects the credentials.
+    """
+    if failures and len(failures) == len(graph_data) and all(data.get("unavailable") for _, data in graph_data):
+        raise failures[0]
+
+
+def fetch_graph_data(api_client, max_workers=DEFAULT_FETCH_WORKERS, group_ids=None, deadline=None,
+                     last_known=None, groups=None):
+    """
+    Fetches everything needed to draw the graph, running the per-group and
+    per-endpoint API calls concurrently on a bounded thread pool.
+
+    With a deadline, groups whose responses have not all arrived in time are
+    returned from last_known, marked stale, or as empty groups marked
+    unavailable; their requests are abandoned. Groups whose inputs or outputs
+    could not be fetched are returned the same way.
+
+    Args:
+        api_client (CriblAPI): An instance of the CriblAPI client.
+        max_workers (int): Maximum number of API calls in flight at once.
+        group_ids (iterable, optional): Only fetch these worker groups.
+        deadline (float, optional): time.monotonic() value by which to return.
+        last_known (callable, optional): Maps a group ID to its last fetched
+            (group_data, fetched_at), or None.
+        groups (dict, optional): A get_worker_groups response at hand, e.g. a
+            cached one; the worker groups are then not listed again.
+
+    Returns:
+        list: (group_id, group_data) pairs in worker-group order.
+
+    Raises:
+        Exception: If no worker groups are found, or every group failed
+            without last-known data.
+        KeyError: If one of group_ids does not exist.
+        TimeoutError: If the worker groups are not listed before the deadline.
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="fetch"):
+        return _fetch_graph_data(api_client, max_workers, group_ids, deadline, last_known, groups)
+
+
+def _fetch_graph_data(api_client, max_workers, group_ids, deadline=None, last_known=None, groups=None):
+    """
+    Implementation of fetch_graph_data, which records its duration.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        if groups is None:
             try:
-                orphan_outputs = _detect_orphan_outputs(outputs, all_connections)
-            except Exception as e:
-                print(f"Failed to detect orphan outputs for group {group_id}: {e}")
-                orphan_outputs = set()
+                groups = executor.submit(
+                    _bounded(api_client, api_client.get_worker_groups, deadline)
+                ).result(timeout=_remaining(deadline))
+            except FuturesTimeoutError:
+                raise TimeoutError("Worker groups were not listed within the time budget") from None
+        group_ids = _select_group_ids(groups.get("items", []), group_ids)
+
+        group_futures = [
+            {
+                key: executor.submit(_bounded(api_client, getattr(api_client, method), deadline), group_id)
+                for key, method in _GROUP_ENDPOINTS
+            }
+            for group_id in group_ids
+        ]
+        if deadline is not None:
+            wait([futures["pipelines"] for futures in group_futures], timeout=_remaining(deadline))
+        # Pipeline details depend on the listing, so they form a second wave of requests
+        detail_futures = [
+            _submit_pipeline_details(executor, api_client, group_id, futures["pipelines"], deadline)
+            if deadline is None or futures["pipelines"].done() else _LATE
+            for group_id, futures in zip(group_ids, group_futures)
+        ]
+        if deadline is not None:
+            pending = [future for futures in group_futures for future in futures.values()]
+            for details in detail_futures:
+                if details is not None and details is not _LATE:
+                    pending.extend(future for _, future in details if future is not None)
+            wait(pending, timeout=_remaining(deadline))
+
+        graph_data = []
+        failures = []
+        for group_id, futures, details in zip(group_ids, group_futures, detail_futures):
+            if deadline is not None and _is_late(futures, details):
+                graph_data.append((group_id, _late_group_data(group_id, last_known)))
+            else:
+                graph_data.append((group_id, _resolve_group_data(group_id, futures, details, last_known, failures)))
+        _check_failures(graph_data, failures)
+        return graph_data
+    finally:
+        # Past a deadline, requests still queued are dropped and running ones are not waited
+        # for; their timeouts are cut to the deadline, so their threads end soon after
+        executor.shutdown(wait=deadline is None, cancel_futures=deadline is not None)
+
+
+def _is_late(futures, details):
+    """
+    Returns True if any response of a worker group is still outstanding.
+    """
+    if details is _LATE or not all(future.done() for future in futures.values()):
+        return True
+    return details is not None and not all(future.done() for _, future in details if future is not None)
+
+
+async def _fetch_pipeline_details_async(api_client, group_id, pipelines_task):
+    """
+    Async counterpart of _submit_pipeline_details; waits for the detail fetches it starts.
+
+    Args:
+        api_client (AsyncCriblAPI): An instance of the async Cribl API client.
+        group_id (str): The worker group the pipelines belong to.
+        pipelines_task (asyncio.Task): Pending result of get_pipelines for the group.
+
+    Returns:
+        list: (pipeline, Task or None) pairs, or None if the pipeline listing failed.
+    """
+    await asyncio.wait([pipelines_task])
+    try:
+        pipelines = pipelines_task.result().get("items", [])
+        detail_tasks = [
+            (
+                pipeline,
+                None if _has_function_list(pipeline)
+                else asyncio.ensure_future(api_client.get_pipeline_functions(group_id, pipeline["id"])),
+            )
+            for pipeline in pipelines
+        ]
+    except Exception as e:
+        print(f"Failed to calculate pipeline complexity for group {group_id}: {e}")
+        return None
+
+    pending = [task for _, task in detail_tasks if task is not None]
+    if pending:
+        try:
+            await asyncio.wait(pending)
+        except asyncio.CancelledError:
+            # The deadline passed; abandon the detail fetches as well
+            for task in pending:
+                task.cancel()
+            raise
+    return detail_tasks
+
+
+async def fetch_graph_data_async(api_client, group_ids=None, deadline=None, last_known=None, groups=None):
+    """
+    Fetches everything needed to draw the graph using an async API client.
+
+    All worker groups and endpoints are requested at once; the client's own
+    in-flight limit bounds the actual concurrency. A deadline is handled as in
+    fetch_graph_data.
+
+    Args:
+        api_client (AsyncCriblAPI): An instance of the async Cribl API client.
+        group_ids (iterable, optional): Only fetch these worker groups.
+        deadline (float, optional): time.monotonic() value by which to return.
+        last_known (callable, optional): Maps a group ID to its last fetched
+            (group_data, fetched_at), or None.
+        groups (dict, optional): A get_worker_groups response at hand; the
+            worker groups are then not listed again.
+
+    Returns:
+        list: (group_id, group_data) pairs in worker-group order.
 
-            # Get pipeline functions for complexity scoring
+    Raises:
+        Exception: If no worker groups are found, or every group failed
+            without last-known data.
+        KeyError: If one of group_ids does not exist.
+        TimeoutError: If the worker groups are not listed before the deadline.
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="fetch"):
+        return await _fetch_graph_data_async(api_client, group_ids, deadline, last_known, groups)
+
+
+async def _fetch_graph_data_async(api_client, group_ids, deadline=None, last_known=None, groups=None):
+    """
+    Implementation of fetch_graph_data_async, which records its duration.
+    """
+    if groups is None:
+        try:
+            groups = await asyncio.wait_for(api_client.get_worker_groups(), timeout=_remaining(deadline))
+        except asyncio.TimeoutError:
+            raise TimeoutError("Worker groups were not listed within the time budget") from None
+    group_ids = _select_group_ids(groups.get("items", []), group_ids)
+
+    group_tasks = [
+        {key: asyncio.ensure_future(getattr(api_client, method)(group_id)) for key, method in _GROUP_ENDPOINTS}
+        for group_id in group_ids
+    ]
+    detail_tasks = [
+        asyncio.ensure_future(_fetch_pipeline_details_async(api_client, group_id, tasks["pipelines"]))
+        for group_id, tasks in zip(group_ids, group_tasks)
+    ]
+    # A group's detail task finishes only after all of its pipeline detail fetches
+    all_tasks = detail_tasks + [task for tasks in group_tasks for task in tasks.values()]
+    if all_tasks:
+        _, pending = await asyncio.wait(all_tasks, timeout=_remaining(deadline))
+        for task in pending:
+            task.cancel()
+
+    # Finished tasks expose the same result() interface as futures
+    graph_data = []
+    failures = []
+    for group_id, tasks, details in zip(group_ids, group_tasks, detail_tasks):
+        if details.cancelled() or not all(task.done() and not task.cancelled() for task in tasks.values()):
+            graph_data.append((group_id, _late_group_data(group_id, last_known)))
+        else:
+            graph_data.append(
+                (group_id, _resolve_group_data(group_id, tasks, details.result(), last_known, failures))
+            )
+    _check_failures(graph_data, failures)
+    return graph_data
+
+
+def fetch_leaders(api_clients, max_workers=DEFAULT_FETCH_WORKERS):
+    """
+    Fetches the graph data of several leaders concurrently.
+
+    Each leader is fetched as by fetch_graph_data, with up to max_workers API
+    calls of its own in flight, so comparing leaders takes about as long as
+    fetching the slowest one.
+
+    Args:
+        api_clients (dict): Leader name -> CriblAPI.
+        max_workers (int): Maximum number of API calls in flight per leader.
+
+    Returns:
+        dict: Leader name -> list of (group_id, group_data) pairs, in the order of api_clients.
+
+    Raises:
+        Exception: The error of the first leader that could not be fetched.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(api_clients), 1)) as executor:
+        futures = {
+            name: executor.submit(fetch_graph_data, api_client, max_workers)
+            for name, api_client in api_clients.items()
+        }
+        leaders = {}
+        for name, future in futures.items():
             try:
-                pipelines = api_client.get_pipelines(group_id).get("items", [])
-                pipeline_complexity = {}
-                for pipeline in pipelines:
-                    pipeline_id = pipeline["id"]
-                    # Try to get detailed function info
-                    try:
-                        pipeline_detail = api_client.get_pipeline_functions(group_id, pipeline_id)
-                        complexity = _calculate_pipeline_complexity(pipeline_detail)
-                    except Exception:
-                        # If detailed fetch fails, use basic info
-                        complexity = _calculate_pipeline_complexity(pipeline)
-                    pipeline_complexity[pipeline_id] = complexity
+                leaders[name] = future.result()
             except Exception as e:
-                print(f"Failed to calculate pipeline complexity for group {group_id}: {e}")
-                pipeline_complexity = {}
-
-            # Calculate max EPS for edge scaling
-            all_eps_values = []
-            for metrics in source_metrics.values():
-                eps = metrics.get("eps")
-                if eps is not None:
-                    all_eps_values.append(eps)
-            for metrics in dest_metrics.values():
-                eps = metrics.get("eps")
-                if eps is not None:
-                    all_eps_values.append(eps)
-            max_eps = max(all_eps_values) if all_eps_values else 0
-
-            # Create nodes for inputs
-            with c.subgraph() as s:
-                s.attr(rank="source")
-                for input_data in inputs:
-                    input_id = input_data["id"]
-                    is_disabled = input_data.get("disabled", False)
-                    is_orphan = input_id in orphan_inputs
-
-                    # Skip creating node for disabled items in main loop (we'll handle in cluster below)
-                    if is_disabled:
-                        continue
-
-                    description = input_data.get("description", "")
-                    label = f"{input_id}"
-
-                    # Add orphan indicator if applicable
-                    if is_orphan:
-                        label = f"⚠ [ORPHAN] {label}"
-
-                    # Add EPS metric if available
-                    metrics = source_metrics.get(input_id)
-                    if metrics:
-                        eps = metrics.get("eps")
-                        if eps is not None:
-                            label += f"\n({eps:.2f} EPS)"
-                        elif "events" in metrics:
-                            label += f"\n({metrics['events']} Events)"
-
-                    if description:
-                        label += f"\n------------\n{description}"
-
-                    # Determine node color based on Feature #2 analysis priority
-                    if is_orphan:
-                        # Orphan nodes get red styling
-                        fillcolor = "mistyrose"  # Light red
-                        border_style = "rounded,filled,bold"
-                        border_color = "red"
-                    else:
-                        # Use Feature #1 health-based color
-                        health = source_health_map.get(input_id)
-                        fillcolor = _get_node_color(health) or "lightblue"
-                        border_style = "rounded,filled"
-                        border_color = None
-
-                    node_kwargs = {
-                        "label": label,
-                        "shape": "box",
-                        "style": border_style,
-                        "fillcolor": fillcolor,
-                    }
-                    if border_color:
-                        node_kwargs["color"] = border_color
-
-                    s.node(f"{group_id}_{input_id}", **node_kwargs)
-
-            # Create nodes for outputs
-            with c.subgraph() as s:
-                s.attr(rank="sink")
-                for output_data in outputs:
-                    output_id = output_data["id"]
-                    is_disabled = output_data.get("disabled", False)
-                    is_orphan = output_id in orphan_outputs
-
-                    # Skip creating node for disabled items in main loop (we'll handle in cluster below)
-                    if is_disabled:
-                        continue
-
-                    description = output_data.get("description", "")
-                    label = f"{output_id}"
-
-                    # Add orphan indicator if applicable
-                    if is_orphan:
-                        label = f"⚠ [ORPHAN] {label}"
-
-                    # Add EPS metric if available
-                    metrics = dest_metrics.get(output_id)
-                    if metrics:
-                        eps = metrics.get("eps")
-                        if eps is not None:
-                            label += f"\n({eps:.2f} EPS)"
-                        elif "events" in metrics:
-                            label += f"\n({metrics['events']} Events)"
-
-                    if description:
-                        label += f"\n------------\n{description}"
-
-                    # Determine node color based on Feature #2 analysis priority
-                    if is_orphan:
-                        # Orphan nodes get red styling
-                        fillcolor = "mistyrose"  # Light red
-                        border_style = "rounded,filled,bold"
-                        border_color = "red"
-                    else:
-                        # Use Feature #1 health-based color
-                        health = dest_health_map.get(output_id)
-                        fillcolor = _get_node_color(health) or "lightgreen"
-                        border_style = "rounded,filled"
-                        border_color = None
-
-                    node_kwargs = {
-                        "label": label,
-                        "shape": "box",
-                        "style": border_style,
-                        "fillcolor": fillcolor,
-                    }
-                    if border_color:
-                        node_kwargs["color"] = border_color
-
-                    s.node(f"{group_id}_{output_id}", **node_kwargs)
-
-            # Create compact cluster for disabled components
-            disabled_inputs = [inp for inp in inputs if inp.get("disabled", False)]
-            disabled_outputs = [out for out in outputs if out.get("disabled", False)]
-
-            if disabled_inputs or disabled_outputs:
-                with c.subgraph(name=f"cluster_disabled_{group_id}") as disabled_cluster:
-                    disabled_cluster.attr(
-                        label=f"Disabled ({len(disabled_inputs)} in, {len(disabled_outputs)} out)",
-                        style="dashed,filled",
-                        fillcolor="gray95",
-                        color="gray50",
-                        fontsize="9",
-                        fontcolor="gray30",
-                        penwidth="0.5",
-                        rank="sink"  # Position at bottom (corner)
-                    )
-
-                    # Add invisible node to help with corner positioning
-                    disabled_cluster.node(
-                        f"_anchor_disabled_{group_id}",
-                        label="",
-                        shape="point",
-                        width="0",
-                        height="0",
-                        style="invis"
-                    )
-
-                    # Render compact disabled inputs
-                    for input_data in disabled_inputs:
-                        input_id = input_data["id"]
-                        disabled_cluster.node(
-                            f"{group_id}_{input_id}",
-                            label=f"[D] {input_id}",
-                            shape="box",
-                            style="rounded,filled",
-                            fillcolor="lightgray",
-                            color="gray60",
-                            penwidth="0.5",
-                            fontsize="8",
-                            width="0.8",
-                            height="0.3",
-                            margin="0.05,0.02"
-                        )
-
-                    # Render compact disabled outputs
-                    for output_data in disabled_outputs:
-                        output_id = output_data["id"]
-                        disabled_cluster.node(
-                            f"{group_id}_{output_id}",
-                            label=f"[D] {output_id}",
-                            shape="box",
-                            style="rounded,filled",
-                            fillcolor="lightgray",
-                            color="gray60",
-                            penwidth="0.5",
-                            fontsize="8",
-                            width="0.8",
-                            height="0.3",
-                            margin="0.05,0.02"
-                        )
-
-            # Add edges for connections with metrics overlay
-            for input_data in inputs:
-                if not input_data.get("disabled", False):
-                    input_id = input_data["id"]
-                    connections = input_data.get("connections", [])
-                    for conn in connections:
-                        if conn and "output" in conn:
-                            output_id = conn["output"]
-                            pipeline = conn.get("pipeline", "passthru")
-
-                            # Get pipeline metrics for edge labeling
-                            pipeline_metrics_data = pipeline_metrics.get(pipeline, {})
-                            edge_eps = pipeline_metrics_data.get("eps", 0)
-                            edge_label = pipeline
-
-                            if edge_eps > 0:
-                                edge_label += f"\n({edge_eps:.2f} EPS)"
-
-                            # Feature #2: Add complexity information to edge label
-                            complexity = pipeline_complexity.get(pipeline, {})
-                            if complexity.get("label"):
-                                complexity_label = complexity["label"]
-                                # Add complexity indicator to edge
-                                if complexity["level"] == "high":
-                                    edge_label += f"\n⚠ Complex {complexity_label}"
-                                elif complexity["level"] == "medium":
-                                    edge_label += f"\n{complexity_label}"
-
-                            # Get edge styling based on throughput (Feature #1)
-                            edge_attrs = _get_edge_attributes(edge_eps, max_eps)
-
-                            c.edge(
-                                f"{group_id}_{input_id}",
-                                f"{group_id}_{output_id}",
-                                label=edge_label,
-                                penwidth=edge_attrs["penwidth"],
-                                color=edge_attrs["color"],
-                            )
+                print(f"Failed to fetch leader {name}: {e}")
+                raise
+        return leaders
+
 
+async def fetch_leaders_async(api_clients):
+    """
+    Fetches the graph data of several leaders concurrently with async API clients.
+
+    Args:
+        api_clients (dict): Leader name -> AsyncCriblAPI.
+
+    Returns:
+        dict: Leader name -> list of (group_id, group_data) pairs, in the order of api_clients.
+
+    Raises:
+        Exception: The error of the first leader that could not be fetched.
+    """
+    results = await asyncio.gather(
+        *(fetch_graph_data_async(api_client) for api_client in api_clients.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(api_clients, results):
+        if isinstance(result, BaseException):
+            print(f"Failed to fetch leader {name}: {result}")
+            raise result
+    return dict(zip(api_clients, results))
+
+
+def _node_attributes(group, node, default_fillcolor):
+    """
+    Returns the graphviz attributes of an enabled input or output node.
+
+    Args:
+        group (FlowGroup): The group the node belongs to.
+        node (FlowNode): The input or output.
+        default_fillcolor (str): Fill colour when no health data is available.
+
+    Returns:
+        dict: Node attributes.
+    """
+    label = f"{group.name(node.name)}"
+
+    # Add orphan indicator if applicable
+    if node.orphan:
+        label = f"⚠ [ORPHAN] {label}"
+
+    # Add EPS metric if available
+    metrics = node.metrics
+    if metrics:
+        if metrics.eps is not None:
+            label += f"\n({metrics.eps:.2f} EPS)"
+        elif metrics.events is not None:
+            label += f"\n({metrics.events} Events)"
+
+    if node.description:
+        label += f"\n------------\n{node.description}"
+
+    # Determine node color based on Feature #2 analysis priority
+    if node.orphan:
+        # Orphan nodes get red styling
+        fillcolor = "mistyrose"  # Light red
+        border_style = "rounded,filled,bold"
+        border_color = "red"
+    else:
+        # Use Feature #1 health-based color
+        health = node.health
+        fillcolor = (health and _health_color(health.error_rate, health.drop_rate)) or default_fillcolor
+        border_style = "rounded,filled"
+        border_color = None
+
+    node_kwargs = {
+        "label": label,
+        "shape": "box",
+        "style": border_style,
+        "fillcolor": fillcolor,
+    }
+    if border_color:
+        node_kwargs["color"] = border_color
+    return node_kwargs
+
+
+def _edge_label(group, edge):
+    """
+    Returns the label of a route: pipeline name, throughput and complexity.
+    """
+    pipeline = edge.pipeline
+    edge_label = group.name(pipeline.name)
+
+    if pipeline.eps > 0:
+        edge_label += f"\n({pipeline.eps:.2f} EPS)"
+
+    # Feature #2: Add complexity information to edge label
+    complexity = pipeline.complexity or {}
+    if complexity.get("label"):
+        complexity_label = complexity["label"]
+        # Add complexity indicator to edge
+        if complexity["level"] == "high":
+            edge_label += f"\n⚠ Complex {complexity_label}"
+        elif complexity["level"] == "medium":
+            edge_label += f"\n{complexity_label}"
+    return edge_label
+
+
+# Compact styling of disabled inputs and outputs
+_DISABLED_NODE_ATTRIBUTES = {
+    "shape": "box",
+    "style": "rounded,filled",
+    "fillcolor": "lightgray",
+    "color": "gray60",
+    "penwidth": "0.5",
+    "fontsize": "8",
+    "width": "0.8",
+    "height": "0.3",
+    "margin": "0.05,0.02",
+}
+
+
+def _disabled_cluster_attributes(disabled_inputs, disabled_outputs):
+    """
+    Returns the attributes of the cluster collecting a group's disabled items.
+    """
+    return {
+        "label": f"Disabled ({len(disabled_inputs)} in, {len(disabled_outputs)} out)",
+        "style": "dashed,filled",
+        "fillcolor": "gray95",
+        "color": "gray50",
+        "fontsize": "9",
+        "fontcolor": "gray30",
+        "penwidth": "0.5",
+        "rank": "sink",  # Position at bottom (corner)
+    }
+
+
+def _cluster_attributes(group):
+    """
+    Returns the attributes of a group's cluster, marking stale and unavailable groups.
+    """
+    if group.unavailable:
+        return {"label": f"{group.id} (no data)", "style": "dashed", "color": "gray"}
+    if group.stale_since is not None:
+        fetched = datetime.fromtimestamp(group.stale_since, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        return {"label": f"{group.id} (stale, data from {fetched})", "style": "dashed", "color": "darkorange"}
+    return {"label": group.id}
+
+
+# Drawn in place of the nodes of a group without any data
+_UNAVAILABLE_NODE_ATTRIBUTES = {
+    "label": "No data within the time budget",
+    "shape": "note",
+    "style": "filled",
+    "fillcolor": "whitesmoke",
+    "fontcolor": "gray40",
+}
+
+
+def _node_svg_id(group_id, name):
+    """
+    Returns the SVG element ID of an input or output, e.g. "node:default/in_syslog".
+    """
+    return f"node:{group_id}/{name}"
+
+
+def _edge_svg_id(group_id, source, pipeline, target):
+    """
+    Returns the SVG element ID of a route, e.g. "edge:default/in_syslog/main/out_s3".
+    """
+    return f"edge:{group_id}/{source}/{pipeline}/{target}"
+
+
+def find_paths(group, name):
+    """
+    Returns the subgraph reachable from an input, output or pipeline of a
+    group, answered from the group's adjacency indexes.
+
+    Args:
+        group (FlowGroup): The group model, e.g. from build_flow_graph.
+        name (str): ID of the input, output or pipeline.
+
+    Returns:
+        dict: "node" ("<group>/<id>"), "nodes" ({"id", "svg_id"} per node) and
+        "edges" ({"source", "target", "pipeline", "svg_id"} per route), or None
+        if name does not occur in the group. SVG IDs are those of the drawn graph.
+    """
+    reachable = group.reachable(name)
+    if reachable is None:
+        return None
+    node_ids, edge_indexes = reachable
+    names = sorted(group.name(node_id) for node_id in node_ids)
+
+    edges = []
+    for index in edge_indexes:
+        edge = group.edges[index]
+        source = group.name(edge.source)
+        target = group.name(edge.target)
+        pipeline = group.name(edge.pipeline.name)
+        edges.append({
+            "source": source,
+            "target": target,
+            "pipeline": pipeline,
+            "svg_id": _edge_svg_id(group.id, source, pipeline, target),
+        })
+
+    return {
+        "node": f"{group.id}/{name}",
+        "nodes": [{"id": node_name, "svg_id": _node_svg_id(group.id, node_name)} for node_name in names],
+        "edges": edges,
+    }
+
+
+def _add_group_cluster(dot, group):
+    """
+    Draws one worker group as a cluster subgraph of the given graph.
+
+    Args:
+        dot (graphviz.Digraph): The graph to add the cluster to.
+        group (FlowGroup): The group model, as built by build_flow_group.
+    """
+    group_id = group.id
+
+    with dot.subgraph(name=f"cluster_{group_id}") as c:
+        c.attr(**_cluster_attributes(group))
+        if group.unavailable:
+            c.node(f"{group_id}__unavailable", **_UNAVAILABLE_NODE_ATTRIBUTES)
+
+        # Create nodes for inputs
+        with c.subgraph() as s:
+            s.attr(rank="source")
+            for node in group.inputs:
+                # Disabled items are drawn in their own cluster below
+                if not node.disabled:
+                    name = group.name(node.name)
+                    s.node(f"{group_id}_{name}", id=_node_svg_id(group_id, name),
+                           **_node_attributes(group, node, "lightblue"))
+
+        # Create nodes for outputs
+        with c.subgraph() as s:
+            s.attr(rank="sink")
+            for node in group.outputs:
+                if not node.disabled:
+                    name = group.name(node.name)
+                    s.node(f"{group_id}_{name}", id=_node_svg_id(group_id, name),
+                           **_node_attributes(group, node, "lightgreen"))
+
+        # Create compact cluster for disabled components
+        disabled_inputs = [node for node in group.inputs if node.disabled]
+        disabled_outputs = [node for node in group.outputs if node.disabled]
+
+        if disabled_inputs or disabled_outputs:
+            with c.subgraph(name=f"cluster_disabled_{group_id}") as disabled_cluster:
+                disabled_cluster.attr(**_disabled_cluster_attributes(disabled_inputs, disabled_outputs))
+
+                # Add invisible node to help with corner positioning
+                disabled_cluster.node(
+                    f"_anchor_disabled_{group_id}",
+                    label="",
+                    shape="point",
+                    width="0",
+                    height="0",
+                    style="invis"
+                )
+
+                # Render compact disabled inputs, then outputs
+                for node in disabled_inputs + disabled_outputs:
+                    name = group.name(node.name)
+                    disabled_cluster.node(f"{group_id}_{name}", label=f"[D] {name}", id=_node_svg_id(group_id, name),
+                                          **_DISABLED_NODE_ATTRIBUTES)
+
+        # Add edges for connections with metrics overlay
+        for edge in group.edges:
+            # Get edge styling based on throughput (Feature #1)
+            edge_attrs = _get_edge_attributes(edge.pipeline.eps, group.max_eps)
+            source = group.name(edge.source)
+            target = group.name(edge.target)
+
+            c.edge(
+                f"{group_id}_{source}",
+                f"{group_id}_{target}",
+                label=_edge_label(group, edge),
+                penwidth=edge_attrs["penwidth"],
+                color=edge_attrs["color"],
+                id=_edge_svg_id(group_id, source, group.name(edge.pipeline.name), target),
+            )
+
+
+def _group_fingerprint(group_data):
+    """
+    Returns a content hash of the fetched data of one worker group.
+
+    Args:
+        group_data (dict): Fetched data for the group, as returned by fetch_graph_data.
+
+    Returns:
+        str: Hex digest of the group's inputs, outputs, pipelines and metrics.
+    """
+    payload = json.dumps(group_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _group_dot_fragment(group):
+    """
+    Returns the DOT body lines of a group's cluster.
+    """
+    scratch = graphviz.Digraph()
+    _add_group_cluster(scratch, group)
+    return tuple(scratch.body)
+
+
+def _group_json(group):
+    """
+    Returns the clusters, nodes and edges of a group, with the attributes the
+    DOT emitter gives them, as JSON-serialisable lists.
+    """
+    group_id = group.id
+    cluster_id = f"cluster_{group_id}"
+    clusters = [{"id": cluster_id, "parent": None, **_cluster_attributes(group)}]
+    nodes = []
+    edges = []
+    if group.unavailable:
+        nodes.append({"id": f"{group_id}__unavailable", "parent": cluster_id, "kind": "placeholder",
+                      **_UNAVAILABLE_NODE_ATTRIBUTES})
+
+    for kind, nodes_of_kind, default_fillcolor, rank in (
+        ("input", group.inputs, "lightblue", "source"),
+        ("output", group.outputs, "lightgreen", "sink"),
+    ):
+        for node in nodes_of_kind:
+            if not node.disabled:
+                attributes = _node_attributes(group, node, default_fillcolor)
+                nodes.append({
+                    "id": f"{group_id}_{group.name(node.name)}",
+                    "parent": cluster_id,
+                    "kind": kind,
+                    "rank": rank,
+                    **attributes,
+                })
+
+    disabled_inputs = [node for node in group.inputs if node.disabled]
+    disabled_outputs = [node for node in group.outputs if node.disabled]
+    if disabled_inputs or disabled_outputs:
+        disabled_id = f"cluster_disabled_{group_id}"
+        clusters.append({
+            "id": disabled_id,
+            "parent": cluster_id,
+            **_disabled_cluster_attributes(disabled_inputs, disabled_outputs),
+        })
+        for kind, disabled_nodes in (("input", disabled_inputs), ("output", disabled_outputs)):
+            for node in disabled_nodes:
+                name = group.name(node.name)
+                nodes.append({
+                    "id": f"{group_id}_{name}",
+                    "parent": disabled_id,
+                    "kind": kind,
+                    "disabled": True,
+                    "label": f"[D] {name}",
+                    **_DISABLED_NODE_ATTRIBUTES,
+                })
+
+    known = {node["id"] for node in nodes}
+    for edge in group.edges:
+        edge_attrs = _get_edge_attributes(edge.pipeline.eps, group.max_eps)
+        target = f"{group_id}_{group.name(edge.target)}"
+        if target not in known:
+            # graphviz draws routes to outputs that do not exist as plain nodes
+            known.add(target)
+            nodes.append({"id": target, "parent": cluster_id, "kind": "missing", "label": group.name(edge.target)})
+        edges.append({
+            "source": f"{group_id}_{group.name(edge.source)}",
+            "target": target,
+            "label": _edge_label(group, edge),
+            "pipeline": group.name(edge.pipeline.name),
+            "penwidth": edge_attrs["penwidth"],
+            "color": edge_attrs["color"],
+        })
+
+    return {"clusters": clusters, "nodes": nodes, "edges": edges}
+
+
+# Renderings of a group model that are cached next to it, by output name
+_GROUP_OUTPUTS = {
+    "dot": _group_dot_fragment,
+    "json": _group_json,
+}
+
+
+def _cached_group(group_id, group_data, output="dot", store=True):
+    """
+    Returns the model of one worker group and one rendering of it.
+
+    Both are cached by group and content hash, so a group whose data did not
+    change since the previous build is neither analysed nor drawn again. Each
+    rendering is only produced once a caller asks for it.
+
+    Args:
+        group_id (str): The worker group ID.
+        group_data (dict): Fetched data for the group, as returned by fetch_graph_data.
+        output (str, optional): "dot" for the DOT statements of the cluster,
+            "json" for the output of _group_json, or None for the model only.
+        store (bool): False to reuse cached entries without caching new ones,
+            so that streamed output does not keep every group in memory.
+
+    Returns:
+        tuple: (FlowGroup, the requested rendering or None).
+    """
+    cache_key = (group_id, _group_fingerprint(group_data))
+    entry = _fragment_cache.get(cache_key)
+    if entry is None:
+        entry = {"model": build_flow_group(group_id, group_data)}
+        if store:
+            _fragment_cache.set(cache_key, entry)
+    if output is None:
+        return entry["model"], None
+    if output not in entry:
+        rendering = _GROUP_OUTPUTS[output](entry["model"])
+        if not store:
+            return entry["model"], rendering
+        entry[output] = rendering
+    return entry["model"], entry[output]
+
+
+def build_flow_graph(graph_data):
+    """
+    Builds the intermediate model of the graph from data returned by fetch_graph_data.
+
+    Renderers other than graphviz can consume the model without refetching.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+
+    Returns:
+        FlowGraph: One FlowGroup per worker group, in worker-group order.
+    """
+    return FlowGraph([
+        _cached_group(group_id, group_data, output=None)[0] for group_id, group_data in graph_data
+    ])
+
+
+def build_graph(graph_data):
+    """
+    Builds the graphviz Digraph from data returned by fetch_graph_data.
+
+    The graph is composed from per-group fragments; only groups whose fetched
+    data changed since an earlier build are regenerated.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+
+    Returns:
+        graphviz.Digraph: The generated graph showing inputs, outputs, and pipeline connections.
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="build"):
+        dot = _new_graph()
+        for group_id, group_data in graph_data:
+            dot.body.extend(_cached_group(group_id, group_data)[1])
+
+    return dot
+
+
+def iter_graph_lines(graph_data):
+    """
+    Yields the DOT source of build_graph(graph_data) line by line.
+
+    Group fragments are produced as the lines are consumed and are not added
+    to the fragment cache, and the joined source is never built, so large
+    graphs can be streamed into graphviz or a file (see renderer.render_dot_lines).
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+
+    Yields:
+        str: DOT source lines, ending in newlines.
+    """
+    head = list(_new_graph())
+    # Everything up to the closing brace of the empty graph
+    yield from head[:-1]
+    for group_id, group_data in graph_data:
+        yield from _cached_group(group_id, group_data, store=False)[1]
+    yield head[-1]
+
+
+def _new_graph():
+    """
+    Returns an empty Digraph with the graph attributes shared by the full,
+    per-group and summary views.
+    """
+    dot = graphviz.Digraph("Cribl", comment="Cribl Configuration")
+    dot.attr(rankdir="LR", splines="polylines", nodesep="0.5", ranksep="1.5")
     return dot
+
+
+def build_group_graphs(graph_data):
+    """
+    Builds one graphviz Digraph per worker group, each holding the group's
+    cluster with the graph attributes of build_graph.
+
+    Groups share no nodes or edges, so each graph can be laid out on its own
+    and the results composed with renderer.render_stitched_svg.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+
+    Returns:
+        list: One graphviz.Digraph per worker group, in worker-group order.
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="build_groups"):
+        graphs = []
+        for group_id, group_data in graph_data:
+            dot = _new_graph()
+            dot.body.extend(_cached_group(group_id, group_data)[1])
+            graphs.append(dot)
+    return graphs
+
+
+def build_graph_json(graph_data):
+    """
+    Serialises the graph for client-side layout.
+
+    Contains the same clusters, nodes, edges, labels, colours and pen widths
+    as the graph built by build_graph, without running graphviz.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+
+    Returns:
+        dict: "graph" attributes and "clusters", "nodes" and "edges" lists.
+            Nodes and nested clusters name their cluster in "parent".
+    """
+    with GRAPH_STAGE_SECONDS.time(stage="build_json"):
+        result = {
+            "graph": {"rankdir": "LR", "splines": "polylines", "nodesep": "0.5", "ranksep": "1.5"},
+            "clusters": [],
+            "nodes": [],
+            "edges": [],
+        }
+        for group_id, group_data in graph_data:
+            _, fragment = _cached_group(group_id, group_data, output="json")
+            for key in ("clusters", "nodes", "edges"):
+                result[key].extend(fragment[key])
+    return result
+
+
+def _add_group_summary(dot, group, url=None):
+    """
+    Draws one worker group as a single summary node of the given graph.
+
+    Args:
+        dot (graphviz.Digraph): The graph to add the node to.
+        group (FlowGroup): The group model.
+        url (str, optional): Link followed when the node is clicked, e.g. to expand it.
+    """
+    summary = summarize_group(group)
+    label = (
+        f"{group.id}\n"
+        f"{summary['inputs']} in / {summary['outputs']} out / {summary['pipelines']} pipelines\n"
+        f"{summary['eps']:.2f} EPS"
+    )
+    if summary["disabled"]:
+        label += f"\n{summary['disabled']} disabled"
+    if summary["orphans"]:
+        label += f"\n⚠ {summary['orphans']} orphans"
+
+    # The worst health of any node in the group decides the colour
+    node_kwargs = {
+        "label": label,
+        "shape": "box",
+        "style": "rounded,filled,bold" if summary["orphans"] else "rounded,filled",
+        "fillcolor": _health_color(summary["error_rate"], summary["drop_rate"]) or "lightsteelblue",
+    }
+    if group.unavailable or group.stale_since is not None:
+        # Same marker as the group's cluster in the full view
+        marker = _cluster_attributes(group)
+        node_kwargs["label"] = marker["label"] + label[len(group.id):]
+        node_kwargs["style"] += ",dashed"
+        node_kwargs["color"] = marker["color"]
+    if url:
+        node_kwargs["URL"] = url
+        node_kwargs["tooltip"] = f"Expand {group.id}"
+
+    dot.node(f"summary_{group.id}", **node_kwargs)
+
+
+def build_summary_graph(graph_data, expand=(), group_url=None):
+    """
+    Builds an overview graph in which each worker group is one summary node.
+
+    Layout time depends on the number of groups rather than on the number of
+    inputs and outputs, so the overview stays fast for large fleets. Groups
+    listed in expand are drawn in full, as in build_graph.
+
+    Args:
+        graph_data (list): (group_id, group_data) pairs.
+        expand (iterable): IDs of the groups to draw in full.
+        group_url (callable, optional): Maps a group ID to the link of its summary node.
+
+    Returns:
+        graphviz.Digraph: The overview graph.
+    """
+    expand = set(expand)
+    with GRAPH_STAGE_SECONDS.time(stage="build_summary"):
+        dot = _new_graph()
+
+        collapsed = []
+        for group_id, group_data in graph_data:
+            group, fragment = _cached_group(group_id, group_data, output="dot" if group_id in expand else None)
+            if group_id in expand:
+                dot.body.extend(fragment)
+            else:
+                _add_group_summary(dot, group, group_url(group_id) if group_url else None)
+                collapsed.append(group_id)
+
+        # Without edges all summary nodes share one rank; chain them invisibly into a grid
+        per_rank = max(1, math.ceil(math.sqrt(len(collapsed))))
+        for i in range(per_rank, len(collapsed)):
+            dot.edge(f"summary_{collapsed[i - per_rank]}", f"summary_{collapsed[i]}", style="invis")
+
+    return dot
+
+
+def generate_graph(api_client, max_workers=DEFAULT_FETCH_WORKERS):
+    """
+    Fetches Cribl configurations from the API and returns a graphviz Digraph object.
+
+    Includes metrics overlay showing:
+    - EPS (Events Per Second) on nodes and edges
+    - Health status via node coloring
+    - Edge thickness and color based on throughput volume
+
+    API calls for all worker groups are made concurrently; clusters are then
+    assembled in worker-group order, so the output does not depend on timing.
+
+    Args:
+        api_client (CriblAPI): An instance of the CriblAPI client.
+        max_workers (int): Maximum number of API calls in flight at once.
+
+    Returns:
+        graphviz.Digraph: The generated graph showing inputs, outputs, and pipeline connections.
+
+    Raises:
+        Exception: If no worker groups are found.
+    """
+    return build_graph(fetch_graph_data(api_client, max_workers=max_workers))
+
+
+async def generate_graph_async(api_client):
+    """
+    Async counterpart of generate_graph, driven by an AsyncCriblAPI client.
+
+    Args:
+        api_client (AsyncCriblAPI): An instance of the async Cribl API client.
+
+    Returns:
+        graphviz.Digraph: The generated graph showing inputs, outputs, and pipeline connections.
+
+    Raises:
+        Exception: If no worker groups are found.
+    """
+    return build_graph(await fetch_graph_data_async(api_client))
@@ -0,0 +1,197 @@
+"""
+Incremental decoding of Cribl list responses, i.e. objects of the form
+{"count": N, "items": [...]}.
+
+Items are decoded one at a time as the body arrives and reduced to the
+requested fields, so neither the full response text nor the full object tree
+of a large list is held in memory.
+"""
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Parser states
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE, _ITEM, _AFTER_ITEM, _DONE = range(8)
+
+
+class ItemsDecoder:
+    """
+    Decodes a list response fed in chunks, keeping only the given fields of each item.
+
+    Usage:
+        decoder = ItemsDecoder(fields=("id", "eps"))
+        for chunk in response.iter_content(65536):
+            decoder.feed(chunk)
+        data = decoder.close()
+    """
+
+    def __init__(self, fields=None):
+        """
+        Args:
+            fields (iterable, optional): Keys kept from each item; None keeps whole items.
+        """
+        self.fields = tuple(fields) if fields is not None else None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        # Whether a "}" now closes an empty object, and a "]" an empty items array
+        self._empty_object = True
+        self._first = True
+        self.result = {}
+        self.items = None
+
+    def feed(self, data):
+        """
+        Decodes as much of the response as the data received so far allows.
+
+        Args:
+            data (bytes): The next chunk of the response body.
+
+        Raises:
+            ValueError: If the response is not a JSON object.
+        """
+        text = self._text.decode(data)
+        if text:
+            # Drop the consumed prefix only when new data arrives
+            self._buffer = self._buffer[self._pos:] + text
+            self._pos = 0
+            self._parse(final=False)
+
+    def close(self):
+        """
+        Finishes decoding.
+
+        Returns:
+            dict: The response, with "items" reduced to the requested fields.
+
+        Raises:
+            ValueError: If the response is incomplete or not a JSON object.
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("Incomplete JSON response")
+        if _WHITESPACE.match(self._buffer, self._pos).end() != len(self._buffer):
+            raise ValueError(f"Extra data after JSON response at offset {self._pos}")
+        return self.result
+
+    def _project(self, item):
+        if self.fields is None or not isinstance(item, dict):
+            return item
+        return {key: item[key] for key in self.fields if key in item}
+
+    def _value(self, final):
+        """
+        Decodes the value at the current position, or returns None, None if more data is needed.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None, None
+        if end == len(self._buffer) and not final:
+            # A number at the end of the buffer may continue in the next chunk
+            return None, None
+        return value, end
+
+    def _parse(self, final):
+        buffer = self._buffer
+        while self._state != _DONE:
+            self._pos = _WHITESPACE.match(buffer, self._pos).end()
+            if self._pos == len(buffer):
+                return
+            char = buffer[self._pos]
+            state = self._state
+
+            if state == _START:
+                if char != "{":
+                    raise ValueError("Expected a JSON object")
+                self._pos += 1
+                self._state = _KEY
+            elif state == _KEY:
+                if char == "}" and self._empty_object:
+                    self._pos += 1
+                    self._state = _DONE
+                    continue
+                key, end = self._value(final)
+                if end is None:
+                    return
+                if not isinstance(key, str):
+                    raise ValueError("Expected an object key")
+                self._empty_object = False
+                self._key = key
+                self._pos = end
+                self._state = _COLON
+            elif state == _COLON:
+                if char != ":":
+                    raise ValueError("Expected ':'")
+                self._pos += 1
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._key == "items" and char == "[":
+                    self.items = self.result["items"] = []
+                    self._pos += 1
+                    self._first = True
+                    self._state = _ITEM
+                    continue
+                value, end = self._value(final)
+                if end is None:
+                    return
+                self.result[self._key] = value
+                self._pos = end
+                self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                if char == ",":
+                    self._state = _KEY
+                elif char == "}":
+                    self._state = _DONE
+                else:
+                    raise ValueError("Expected ',' or '}'")
+                self._pos += 1
+            elif state == _ITEM:
+                if char == "]" and self._first:
+                    self._pos += 1
+                    self._state = _AFTER_VALUE
+                    continue
+                item, end = self._value(final)
+                if end is None:
+                    return
+                self.items.append(self._project(item))
+                self._pos = end
+                self._first = False
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                if char == ",":
+                    self._state = _ITEM
+                elif char == "]":
+                    self._state = _AFTER_VALUE
+                else:
+                    raise ValueError("Expected ',' or ']'")
+                self._pos += 1
+
+
+def decode_items(chunks, fields=None):
+    """
+    Decodes a list response from an iterable of byte chunks.
+
+    Args:
+        chunks (iterable): The response body in chunks, e.g. response.iter_content(65536).
+        fields (iterable, optional): Keys kept from each item; None keeps whole items.
+
+    Returns:
+        dict: The response, with "items" reduced to the requested fields.
+
+    Raises:
+        ValueError: If the body is not a complete JSON object.
+    """
+    decoder = ItemsDecoder(fields)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.close()
@@ -0,0 +1,185 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Default histogram buckets, in seconds, for request and stage latencies.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Default histogram buckets, in bytes, for payload sizes.
+DEFAULT_SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    Base class of labelled metrics kept in a Registry.
+    """
+
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def collect(self):
+        """
+        Returns the metric in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            for key, value in sorted(self._values.items(), key=lambda item: item[0]):
+                lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing counter.
+    """
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """
+    A histogram of observed values with cumulative buckets.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the with-block, in seconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[0][-1] if entry else 0
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = []
+        for bound, count in zip(self.buckets, counts):
+            bucket_labels = key + (("le", _format_value(float(bound))),)
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    """
+    Holds metrics and cache collectors and renders them for Prometheus.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_cache(self, name, get_cache):
+        """
+        Exports the statistics of a TTLCache.
+
+        Args:
+            name (str): Value of the cache label, e.g. "api" or "render".
+            get_cache (callable): Returns the cache, or None if it does not exist yet.
+        """
+        with self._lock:
+            self._caches[name] = get_cache
+
+    def _collect_caches(self):
+        stats = {}
+        for name, get_cache in sorted(self._caches.items()):
+            cache = get_cache()
+            if cache is not None:
+                stats[name] = cache.stats()
+        families = (
+            ("cache_hits_total", "counter", "Cache lookups that found a fresh entry.", "hits"),
+            ("cache_misses_total", "counter", "Cache lookups that found no fresh entry.", "misses"),
+            ("cache_evictions_total", "counter", "Entries evicted to stay within the cache bounds.", "evictions"),
+            ("cache_entries", "gauge", "Entries currently cached.", "size"),
+            ("cache_bytes", "gauge", "Size of the cached values, for size-bounded caches.", "bytes"),
+            ("cache_hit_ratio", "gauge", "Fraction of cache lookups that were hits.", "hit_rate"),
+        )
+        lines = []
+        for metric_name, type_name, documentation, field in families:
+            lines.append(f"# HELP {metric_name} {documentation}")
+            lines.append(f"# TYPE {metric_name} {type_name}")
+            for name, cache_stats in stats.items():
+                lines.append(f"{metric_name}{_format_labels((('cache', name),))} {_format_value(cache_stats[field])}")
+        return lines
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        lines.extend(self._collect_caches())
+        return "\n".join(lines) + "\n"
+
+
+# Registry used by the application's metrics and the /metrics route
+REGISTRY = Registry()
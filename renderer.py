@@ -0,0 +1,440 @@
+import gzip
+import hashlib
+import math
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import graphviz
+
+from cache import TTLCache
+from dot_layout import apply_layout, parse_layout, topology_fingerprint
+from metrics import DEFAULT_SIZE_BUCKETS, REGISTRY, Histogram
+
+try:
+    import brotli
+except ImportError:
+    # Brotli copies are only kept when the optional brotli package is installed
+    brotli = None
+
+try:
+    import pygraphviz
+except ImportError:
+    # The in-process backend needs the optional pygraphviz package
+    pygraphviz = None
+
+# "subprocess" pipes DOT through a graphviz process per render; "inprocess"
+# lays out and renders through libgvc via pygraphviz
+RENDER_BACKENDS = ("subprocess", "inprocess")
+_render_backend = "subprocess"
+
+# libgvc keeps global state, so in-process renders run one at a time
+_inprocess_lock = threading.Lock()
+
+# Default upper bound, in bytes, of all cached renders together.
+DEFAULT_RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+# Rendered graphs keyed by graph_fingerprint
+_render_cache = TTLCache(max_entries=256, max_bytes=DEFAULT_RENDER_CACHE_BYTES)
+REGISTRY.register_cache("render", lambda: _render_cache)
+
+# Default number of layouts kept for graphs whose topology is unchanged; layout
+# reuse is opt-in, since a pinned render is only as good as the parser's DOT subset.
+DEFAULT_LAYOUT_CACHE_SIZE = 0
+
+# dot_layout.Layout objects keyed by topology_fingerprint; None disables layout reuse
+_layout_cache = None
+REGISTRY.register_cache("layout", lambda: _layout_cache)
+
+RENDER_SECONDS = Histogram(
+    "graph_render_seconds", "Duration of graphviz layout and rendering (render cache misses).", ("format", "engine")
+)
+RENDER_BYTES = Histogram(
+    "graph_render_bytes", "Size of rendered graphs.", ("format",), buckets=DEFAULT_SIZE_BUCKETS
+)
+
+
+def graph_fingerprint(dot, format="svg"):
+    """
+    Returns a content hash identifying a render of the graph.
+
+    Args:
+        dot (graphviz.Digraph): The graph to render.
+        format (str): The output format.
+
+    Returns:
+        str: Hex digest of the layout engine, output format and DOT source.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{dot.engine}\0{format}\0".encode("utf-8"))
+    digest.update(dot.source.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_graph(dot, format="svg"):
+    """
+    Renders the graph with graphviz, reusing the previous output when the
+    DOT source, format and engine are unchanged.
+
+    Args:
+        dot (graphviz.Digraph): The graph to render.
+        format (str): The output format. Defaults to svg.
+
+    Returns:
+        bytes: The rendered graph.
+    """
+    key = graph_fingerprint(dot, format)
+    rendered = _render_cache.get(key)
+    if rendered is None:
+        rendered = _render_with_cached_layout(dot, format)
+        if rendered is None:
+            with RENDER_SECONDS.time(format=format, engine=dot.engine):
+                rendered = _pipe(dot, format)
+        RENDER_BYTES.observe(len(rendered), format=format)
+        _render_cache.set(key, rendered)
+    return rendered
+
+
+def configure_render_backend(backend):
+    """
+    Selects how graphs are laid out and rendered.
+
+    Args:
+        backend (str): "subprocess" or "inprocess". "inprocess" falls back to
+            "subprocess" when pygraphviz is not installed.
+
+    Returns:
+        str: The backend in effect.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    global _render_backend
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown render backend {backend!r}; expected one of {', '.join(RENDER_BACKENDS)}")
+    if backend == "inprocess" and pygraphviz is None:
+        print("pygraphviz is not installed; rendering with graphviz subprocesses")
+        backend = "subprocess"
+    _render_backend = backend
+    return backend
+
+
+def _pipe(dot, format, encoding=None):
+    """
+    Lays out and renders a graph with the configured backend.
+
+    Args:
+        dot (graphviz.Digraph): The graph to render.
+        format (str): The output format.
+        encoding (str, optional): Decode the output with this encoding.
+
+    Returns:
+        bytes: The rendered graph, or str if an encoding is given.
+    """
+    if _render_backend == "inprocess" and isinstance(dot, (graphviz.Digraph, graphviz.Graph, graphviz.Source)):
+        try:
+            with _inprocess_lock:
+                rendered = pygraphviz.AGraph(string=dot.source).draw(format=format, prog=dot.engine)
+            return rendered.decode(encoding) if encoding else rendered
+        except (OSError, ValueError) as e:
+            print(f"In-process render failed, retrying with a graphviz subprocess: {e}")
+    if encoding:
+        return dot.pipe(format=format, encoding=encoding)
+    return dot.pipe(format=format)
+
+
+def render_dot_lines(lines, format="svg", engine="dot"):
+    """
+    Renders DOT source produced line by line, without joining it into one string.
+
+    The lines are consumed once: they are hashed for the render cache key
+    (the key render_graph uses for the joined source) while being spooled to
+    a temporary file, which graphviz then reads as its stdin on a cache miss.
+
+    Args:
+        lines (iterable): DOT source lines, e.g. iter_graph_lines(graph_data).
+        format (str): The output format. Defaults to svg.
+        engine (str): The graphviz layout engine. Defaults to dot.
+
+    Returns:
+        bytes: The rendered graph.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{engine}\0{format}\0".encode("utf-8"))
+    with tempfile.TemporaryFile() as spool:
+        for line in lines:
+            data = line.encode("utf-8")
+            digest.update(data)
+            spool.write(data)
+        key = digest.hexdigest()
+
+        rendered = _render_cache.get(key)
+        if rendered is None:
+            spool.seek(0)
+            cmd = [engine, f"-T{format}"]
+            with RENDER_SECONDS.time(format=format, engine=engine), tempfile.TemporaryFile() as stderr:
+                rendered = _wait_graphviz(_start_graphviz(cmd, spool, stderr), cmd, stderr)
+            RENDER_BYTES.observe(len(rendered), format=format)
+            _render_cache.set(key, rendered)
+    return rendered
+
+
+def pipe_dot_lines(lines, format="svg", engine="dot"):
+    """
+    Writes DOT source lines into the stdin of a graphviz process and returns its output.
+
+    Args:
+        lines (iterable): DOT source lines.
+        format (str): The output format.
+        engine (str): The graphviz layout engine.
+
+    Returns:
+        bytes: The rendered graph.
+
+    Raises:
+        graphviz.ExecutableNotFound: If the engine is not installed.
+        subprocess.CalledProcessError: If graphviz fails.
+    """
+    cmd = [engine, f"-T{format}"]
+    # stderr goes to a file, so warnings cannot fill a pipe while stdin is written
+    with tempfile.TemporaryFile() as stderr:
+        process = _start_graphviz(cmd, subprocess.PIPE, stderr)
+        try:
+            for line in lines:
+                process.stdin.write(line.encode("utf-8"))
+            process.stdin.close()
+        except BrokenPipeError:
+            # graphviz exited early; its exit status and stderr tell why
+            pass
+        return _wait_graphviz(process, cmd, stderr)
+
+
+def _start_graphviz(cmd, stdin, stderr):
+    try:
+        return subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=stderr)
+    except FileNotFoundError:
+        raise graphviz.ExecutableNotFound(cmd) from None
+
+
+def _wait_graphviz(process, cmd, stderr):
+    """
+    Reads the output of a graphviz process started by _start_graphviz.
+
+    Raises:
+        subprocess.CalledProcessError: If graphviz fails.
+    """
+    output = process.stdout.read()
+    returncode = process.wait()
+    if returncode:
+        stderr.seek(0)
+        raise subprocess.CalledProcessError(returncode, cmd, output=output, stderr=stderr.read())
+    return output
+
+
+def _render_with_cached_layout(dot, format):
+    """
+    Renders a dot-engine graph with node positions pinned to the layout of an
+    earlier graph with the same topology and node sizes, so that a change of
+    EPS figures, colours or pen widths only costs a neato -n2 render instead of
+    a full layout.
+
+    Args:
+        dot (graphviz.Digraph): The graph to render.
+        format (str): The output format.
+
+    Returns:
+        bytes: The rendered graph, or None if the layout cannot be reused and
+        the graph has to be rendered normally.
+    """
+    if _layout_cache is None or dot.engine != "dot" or not isinstance(dot, (graphviz.Digraph, graphviz.Graph)):
+        return None
+    try:
+        lines = list(dot)
+        topology = topology_fingerprint(lines)
+        layout = _layout_cache.get(topology)
+        if layout is None:
+            with RENDER_SECONDS.time(format="dot", engine=dot.engine):
+                layout = parse_layout(_pipe(dot, "dot", encoding="utf-8"))
+            _layout_cache.set(topology, layout)
+        # neato -n2 is a command-line mode, so pinned renders always use a subprocess
+        pinned = graphviz.Source(apply_layout(lines, layout), engine="neato")
+        with RENDER_SECONDS.time(format=format, engine="neato"):
+            return pinned.pipe(format=format, neato_no_op=2)
+    except (ValueError, subprocess.CalledProcessError) as e:
+        print(f"Failed to reuse the graph layout, running a full layout: {e}")
+        return None
+
+
+# Default number of graphviz processes run at once by render_stitched_svg.
+DEFAULT_LAYOUT_WORKERS = os.cpu_count() or 1
+
+# Space, in points, between stitched graphs
+_STITCH_GAP = 18
+
+# Row width of stitched graphs relative to the square root of their total area;
+# above 1, since left-to-right graphs read better on a wide page
+_STITCH_ROW_FACTOR = 1.5
+
+_SVG_ROOT = re.compile(r"<svg\b[^>]*>", re.S)
+_VIEW_BOX = re.compile(r'\bviewBox="([^"]*)"')
+_SVG_ID = re.compile(r'(\sid="|url\(#)')
+
+
+def render_stitched_svg(dots, max_workers=DEFAULT_LAYOUT_WORKERS):
+    """
+    Lays out and renders independent graphs concurrently and composes them into one SVG.
+
+    Each graph runs in its own graphviz process and goes through render_graph,
+    so unchanged graphs are served from the render cache.
+
+    Args:
+        dots (list): graphviz.Digraph objects, e.g. one per worker group.
+        max_workers (int): Maximum number of graphviz processes at once.
+
+    Returns:
+        bytes: The composed SVG document.
+    """
+    if len(dots) <= 1 or max_workers <= 1:
+        fragments = [render_graph(dot, format="svg") for dot in dots]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(dots))) as executor:
+            fragments = list(executor.map(lambda dot: render_graph(dot, format="svg"), dots))
+    return stitch_svgs(fragments)
+
+
+def _parse_svg_fragment(svg):
+    """
+    Returns (width, height, viewBox, inner markup) of a graphviz SVG document.
+
+    Raises:
+        ValueError: If the document has no svg element with a viewBox.
+    """
+    root = _SVG_ROOT.search(svg)
+    view_box = _VIEW_BOX.search(root.group()) if root else None
+    end = svg.rfind("</svg>")
+    if view_box is None or end < root.end():
+        raise ValueError("Not an SVG document with a viewBox")
+    _, _, width, height = (float(value) for value in view_box.group(1).replace(",", " ").split())
+    return width, height, view_box.group(1), svg[root.end():end]
+
+
+def stitch_svgs(fragments, gap=_STITCH_GAP):
+    """
+    Composes SVG documents into one, placing them in rows in the given order.
+
+    Rows are about 1.5 times as wide as the square root of the total area,
+    and never narrower than the widest document. Element IDs are prefixed per document
+    so that they stay unique.
+
+    Args:
+        fragments (list): SVG documents (bytes or str), as rendered by graphviz.
+        gap (float): Space between documents, in points.
+
+    Returns:
+        bytes: The composed SVG document.
+
+    Raises:
+        ValueError: If a fragment is not an SVG document with a viewBox.
+    """
+    parsed = [
+        _parse_svg_fragment(fragment.decode("utf-8") if isinstance(fragment, bytes) else fragment)
+        for fragment in fragments
+    ]
+    total_area = sum(width * height for width, height, _, _ in parsed)
+    row_limit = max([width for width, _, _, _ in parsed] + [_STITCH_ROW_FACTOR * math.sqrt(total_area)])
+
+    placed = []
+    x = y = row_height = total_width = 0.0
+    for index, (width, height, view_box, inner) in enumerate(parsed):
+        if x > 0 and x + width > row_limit:
+            x = 0.0
+            y += row_height + gap
+            row_height = 0.0
+        inner = _SVG_ID.sub(lambda match: f"{match.group(1)}s{index}_", inner)
+        placed.append(
+            f'<svg x="{x:.2f}" y="{y:.2f}" width="{width:.2f}" height="{height:.2f}" viewBox="{view_box}">'
+            f"{inner}</svg>\n"
+        )
+        total_width = max(total_width, x + width)
+        row_height = max(row_height, height)
+        x += width + gap
+    total_height = y + row_height
+
+    header = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg width="{total_width:.2f}pt" height="{total_height:.2f}pt" '
+        f'viewBox="0.00 0.00 {total_width:.2f} {total_height:.2f}" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+    )
+    return (header + "".join(placed) + "</svg>\n").encode("utf-8")
+
+
+def configure_render_cache(max_bytes):
+    """
+    Replaces the render cache with an empty one bounded to max_bytes.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached renders.
+    """
+    global _render_cache
+    _render_cache = TTLCache(max_entries=256, max_bytes=max_bytes)
+
+
+def content_encodings():
+    """
+    Returns the Content-Encodings that compressed_copy supports, most compact first.
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compressed_copy(key, data, encoding):
+    """
+    Returns data compressed with the given Content-Encoding.
+
+    Copies are kept in the render cache, so each rendered page or graph is
+    only compressed once per encoding.
+
+    Args:
+        key (str): Content hash of data, e.g. its ETag.
+        data (bytes): The uncompressed content.
+        encoding (str): "gzip", or "br" if brotli is installed.
+
+    Returns:
+        bytes: The compressed content.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    cache_key = ("compressed", key, encoding)
+    compressed = _render_cache.get(cache_key)
+    if compressed is None:
+        if encoding == "gzip":
+            # A fixed mtime keeps the output identical for identical content
+            compressed = gzip.compress(data, compresslevel=6, mtime=0)
+        elif encoding == "br" and brotli is not None:
+            compressed = brotli.compress(data)
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+        _render_cache.set(cache_key, compressed)
+    return compressed
+
+
+def configure_layout_cache(max_entries):
+    """
+    Replaces the layout cache with an empty one holding up to max_entries layouts.
+
+    Args:
+        max_entries (int): Maximum number of cached layouts; 0 disables layout reuse.
+    """
+    global _layout_cache
+    _layout_cache = TTLCache(max_entries=max_entries) if max_entries > 0 else None
+
+
+def render_cache_stats():
+    """
+    Returns hit/miss counters of the render cache.
+    """
+    return _render_cache.stats()
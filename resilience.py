@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+# Default timeouts, in seconds, for connecting to the leader and for reading a response.
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+
+# Default number of retries of a failed idempotent request, and the backoff between them.
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.25
+DEFAULT_RETRY_BACKOFF_CAP = 5
+
+# Default consecutive failures that open a circuit, and seconds before it is probed again.
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an endpoint whose circuit breaker is open.
+    """
+
+
+def backoff_delay(attempt, base, cap, rng=random.random):
+    """
+    Returns the delay before a retry, using exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0.
+        base (float): Delay ceiling, in seconds, after the first failure.
+        cap (float): Maximum delay ceiling, in seconds.
+        rng (callable): Returns a float in [0, 1).
+
+    Returns:
+        float: Seconds to wait, uniformly drawn from [0, min(cap, base * 2 ** attempt)).
+    """
+    return rng() * min(cap, base * 2 ** attempt)
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures per key (e.g. endpoint and worker group).
+
+    After failure_threshold consecutive failures the circuit of a key opens
+    and calls fail fast with CircuitOpenError. Once cooldown seconds have
+    passed, one call is let through as a probe: success closes the circuit,
+    failure opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=DEFAULT_BREAKER_COOLDOWN,
+                 clock=time.monotonic):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit; 0 disables the breaker.
+            cooldown (float): Seconds an open circuit rejects calls before a probe.
+            clock (callable): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [consecutive failures, opened at or None, probe in flight]
+        self._circuits = {}
+
+    def before_call(self, key):
+        """
+        Checks that a call for key may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe in flight.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit[1] is None:
+                return
+            if circuit[2] or self._clock() - circuit[1] < self.cooldown:
+                raise CircuitOpenError(f"Circuit open for {key}; failing fast")
+            circuit[2] = True
+
+    def record_success(self, key):
+        """
+        Closes the circuit of key.
+        """
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def record_failure(self, key):
+        """
+        Counts a failure of key, opening its circuit at the threshold or after a failed probe.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(key, [0, None, False])
+            circuit[0] += 1
+            if circuit[2] or circuit[0] >= self.failure_threshold:
+                circuit[1] = self._clock()
+                circuit[2] = False
+
+    def release_probe(self, key):
+        """
+        Frees the probe slot of key after a call that ended without a result,
+        e.g. because it was cancelled, so that the next call probes instead.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None:
+                circuit[2] = False
+
+    def state(self, key):
+        """
+        Returns "closed", "open" or "half_open" for key.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit[1] is None:
+                return "closed"
+            if circuit[2] or self._clock() - circuit[1] >= self.cooldown:
+                return "half_open"
+            return "open"
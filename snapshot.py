@@ -0,0 +1,133 @@
+import threading
+import time
+
+
+class Snapshot:
+    """
+    A completed render of the graph.
+    """
+
+    def __init__(self, svg_content, generated_at):
+        """
+        Args:
+            svg_content (str): The rendered SVG.
+            generated_at (float): Unix time at which the render completed.
+        """
+        self.svg_content = svg_content
+        self.generated_at = generated_at
+
+    def age(self, now=None):
+        """
+        Returns the age of the snapshot in seconds.
+        """
+        return (time.time() if now is None else now) - self.generated_at
+
+
+class SnapshotRefresher:
+    """
+    Periodically rebuilds the graph snapshot on a background thread.
+
+    The latest completed snapshot is swapped in atomically, so readers always
+    get a complete render without waiting for a refresh in progress.
+    """
+
+    # Name of the snapshot in a SnapshotStore
+    ARTIFACT_NAME = "index.svg"
+
+    def __init__(self, build_svg, interval, clock=time.time, store=None):
+        """
+        Args:
+            build_svg (callable): Fetches, builds and renders the graph; returns the SVG.
+            interval (float): Seconds between the start of two refreshes.
+            clock (callable): Returns the current Unix time. Defaults to time.time.
+            store (SnapshotStore, optional): Persists published snapshots across restarts.
+        """
+        self.build_svg = build_svg
+        self.interval = interval
+        self._clock = clock
+        self.store = store
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def latest(self):
+        """
+        Returns the latest completed Snapshot, or None if there is none yet.
+        """
+        return self._snapshot
+
+    def publish(self, svg_content):
+        """
+        Makes svg_content the latest snapshot, e.g. after a synchronous render.
+        """
+        snapshot = Snapshot(svg_content, self._clock())
+        self._snapshot = snapshot
+        if self.store is not None:
+            try:
+                self.store.save_artifact(self.ARTIFACT_NAME, svg_content, snapshot.generated_at)
+            except Exception as e:
+                print(f"Failed to persist graph snapshot: {e}")
+        return snapshot
+
+    def restore(self):
+        """
+        Loads the last persisted snapshot, e.g. at startup, unless a newer one exists.
+
+        Returns:
+            bool: True if a snapshot was restored.
+        """
+        if self.store is None:
+            return False
+        try:
+            stored = self.store.load_artifact(self.ARTIFACT_NAME)
+        except Exception as e:
+            print(f"Failed to load persisted graph snapshot: {e}")
+            return False
+        if stored is None:
+            return False
+        svg_content, generated_at = stored
+        if self._snapshot is not None and self._snapshot.generated_at >= generated_at:
+            return False
+        self._snapshot = Snapshot(svg_content.decode("utf-8"), generated_at)
+        return True
+
+    def refresh(self):
+        """
+        Builds a new snapshot. On failure the previous snapshot is kept.
+
+        Returns:
+            bool: True if a new snapshot was published.
+        """
+        try:
+            svg_content = self.build_svg()
+        except Exception as e:
+            print(f"Background graph refresh failed: {e}")
+            self.last_error = e
+            return False
+        self.last_error = None
+        self.publish(svg_content)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = self._clock()
+            self.refresh()
+            self._stop.wait(max(0.0, self.interval - (self._clock() - started)))
+
+    def start(self):
+        """
+        Starts the background refresh thread; the first refresh runs immediately.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    name TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    digest TEXT NOT NULL,
+    generated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_payloads (
+    group_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def group_digest(group_data):
+    """
+    Returns the content hash under which a group's data is stored.
+
+    Args:
+        group_data (dict): Fetched data for the group, as returned by fetch_graph_data.
+
+    Returns:
+        str: Hex SHA-256 digest of the group's canonical JSON.
+    """
+    return hashlib.sha256(_group_payload(group_data)).hexdigest()
+
+
+def _group_payload(group_data):
+    return json.dumps(group_data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class SnapshotStore:
+    """
+    Persists rendered graphs and fetched per-group data in a SQLite database,
+    so a restarted app can serve its last graph before the first refresh.
+
+    Contents are zlib-compressed. Each call opens its own connection, so the
+    store can be shared between the request and refresh threads.
+    """
+
+    def __init__(self, directory):
+        """
+        Opens or creates the store.
+
+        Args:
+            directory (str): Directory of the database file; created if missing.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "snapshots.sqlite3")
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            # Commits on success and rolls back on error
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def save_artifact(self, name, content, generated_at):
+        """
+        Stores a rendered artifact, replacing the previous one of the same name.
+
+        Args:
+            name (str): Artifact name, e.g. "index.svg".
+            content (str or bytes): The artifact.
+            generated_at (float): Unix time at which it was generated.
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock, self._connect() as connection:
+            row = connection.execute("SELECT digest FROM artifacts WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] == digest:
+                # Unchanged content only needs a new timestamp
+                connection.execute("UPDATE artifacts SET generated_at = ? WHERE name = ?", (generated_at, name))
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO artifacts (name, content, digest, generated_at) VALUES (?, ?, ?, ?)",
+                (name, zlib.compress(content), digest, generated_at),
+            )
+
+    def load_artifact(self, name):
+        """
+        Returns (content, generated_at) of a stored artifact, or None.
+
+        Returns:
+            tuple: The artifact as bytes and its Unix generation time.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT content, generated_at FROM artifacts WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]), row[1]
+
+    def save_groups(self, graph_data, fetched_at, replace=True):
+        """
+        Stores the fetched data of worker groups.
+
+        Groups whose data did not change keep their stored payload.
+
+        Args:
+            graph_data (list): (group_id, group_data) pairs, as returned by fetch_graph_data.
+            fetched_at (float): Unix time of the fetch.
+            replace (bool): True if graph_data holds every worker group, in order;
+                stored groups missing from it are deleted. Otherwise the given
+                groups are updated in place and new ones appended.
+        """
+        with self._lock, self._connect() as connection:
+            stored = {
+                group_id: (position, digest)
+                for group_id, position, digest in connection.execute(
+                    "SELECT group_id, position, digest FROM group_payloads"
+                )
+            }
+            next_position = max((position for position, _ in stored.values()), default=-1) + 1
+            for index, (group_id, group_data) in enumerate(graph_data):
+                payload = _group_payload(group_data)
+                digest = hashlib.sha256(payload).hexdigest()
+                previous = stored.pop(group_id, None)
+                if replace:
+                    position = index
+                elif previous is not None:
+                    position = previous[0]
+                else:
+                    position = next_position
+                    next_position += 1
+                if previous is not None and previous[1] == digest:
+                    connection.execute(
+                        "UPDATE group_payloads SET position = ?, fetched_at = ? WHERE group_id = ?",
+                        (position, fetched_at, group_id),
+                    )
+                else:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO group_payloads (group_id, position, payload, digest, fetched_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (group_id, position, zlib.compress(payload), digest, fetched_at),
+                    )
+            if replace:
+                # Groups removed from the leader
+                connection.executemany("DELETE FROM group_payloads WHERE group_id = ?", [(g,) for g in stored])
+
+    def load_groups(self):
+        """
+        Returns the stored group data in worker-group order.
+
+        Returns:
+            list: (group_id, group_data, fetched_at) tuples.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT group_id, payload, fetched_at FROM group_payloads ORDER BY position"
+            ).fetchall()
+        return [(group_id, json.loads(zlib.decompress(payload)), fetched_at) for group_id, payload, fetched_at in rows]
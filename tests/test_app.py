@@ -0,0 +1,201 @@
+import gzip
+import unittest
+from unittest.mock import MagicMock, patch
+
+import app
+from cache import TTLCache
+from snapshot import SnapshotRefresher
+
+
+class TestApp(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def _get_group(self, headers=None):
+        with patch.object(app, "_worker_groups", return_value={"items": [{"id": "default"}]}), \
+                patch.object(app, "_fetch_graph_data", return_value=[]), \
+                patch.object(app, "render_graph", return_value=b"<svg>group</svg>" * 100):
+            return self.client.get("/group/default.svg", headers=headers or {})
+
+    def test_group_svg_not_modified(self):
+        first = self._get_group()
+        etag = first.headers["ETag"].strip('"')
+
+        second = self._get_group({"If-None-Match": f'"{etag}"'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b"")
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+
+    def test_group_svg_gzip(self):
+        response = self._get_group({"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.data), b"<svg>group</svg>" * 100)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertTrue(response.headers["ETag"].endswith('-gzip"'))
+        # The compressed representation validates the uncompressed one too
+        revalidated = self._get_group({"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_unknown_group_is_not_found(self):
+        with patch.object(app, "_worker_groups", return_value={"items": [{"id": "default"}]}), \
+                patch.object(app, "_fetch_graph_data") as fetch:
+            self.assertEqual(self.client.get("/group/missing.svg").status_code, 404)
+        fetch.assert_not_called()
+
+    def test_group_svgs_share_one_group_listing(self):
+        api_client = MagicMock()
+        api_client.get_worker_groups.return_value = {"items": [{"id": "a"}, {"id": "b"}]}
+        with patch.object(app, "get_cached_api_client", return_value=api_client), \
+                patch.object(app, "_group_list_cache", TTLCache(max_entries=1)), \
+                patch.object(app, "_fetch_graph_data", return_value=[]) as fetch, \
+                patch.object(app, "render_graph", return_value=b"<svg></svg>"):
+            self.assertEqual(self.client.get("/group/a.svg").status_code, 200)
+            self.assertEqual(self.client.get("/group/b.svg").status_code, 200)
+
+        api_client.get_worker_groups.assert_called_once()
+        self.assertIs(fetch.call_args.kwargs["groups"], api_client.get_worker_groups.return_value)
+
+    def test_group_fetch_and_render_failures_are_bad_gateway(self):
+        with patch.object(app, "_worker_groups", return_value={"items": [{"id": "default"}]}):
+            with patch.object(app, "_fetch_graph_data", side_effect=KeyError("inputs")):
+                self.assertEqual(self.client.get("/group/default.svg").status_code, 502)
+            with patch.object(app, "_fetch_graph_data", return_value=[]), \
+                    patch.object(app, "render_graph", side_effect=RuntimeError("dot crashed")):
+                response = self.client.get("/group/default.svg")
+        self.assertEqual(response.status_code, 502)
+        self.assertIn(b"dot crashed", response.data)
+
+    def test_snapshot_page_etag_does_not_depend_on_age(self):
+        refresher = SnapshotRefresher(lambda: "<svg>snap</svg>", interval=60)
+        refresher.publish("<svg>snap</svg>")
+        with patch.object(app, "snapshot_refresher", refresher):
+            first = self.client.get("/?view=full")
+            refresher.publish("<svg>snap</svg>")
+            second = self.client.get("/?view=full", headers={"If-None-Match": first.headers["ETag"]})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b"<svg>snap</svg>", first.data)
+        self.assertIn("Last-Modified", first.headers)
+        self.assertEqual(second.status_code, 304)
+
+    def test_index_lists_groups_that_missed_the_budget(self):
+        empty = {"inputs": [], "outputs": [], "source_metrics": {}, "dest_metrics": {}, "source_health_map": {},
+                 "dest_health_map": {}, "pipeline_metrics": {}, "pipeline_complexity": {}}
+        graph_data = [("fresh", empty), ("slow", dict(empty, stale_since=0.0))]
+        with patch.object(app, "_fetch_graph_data", return_value=graph_data) as fetch, \
+                patch.object(app, "render_graph", return_value=b"<svg></svg>"):
+            response = self.client.get("/?view=full&budget=2.5")
+
+        fetch.assert_called_once_with(budget=2.5)
+        self.assertIn(b"Not received within the time budget or failed to fetch: slow", response.data)
+
+    def test_diff_fetches_both_leaders_at_once(self):
+        def group_data(input_id):
+            return {"inputs": [{"id": input_id, "connections": []}], "outputs": [], "source_metrics": {},
+                    "dest_metrics": {}, "source_health_map": {}, "dest_health_map": {}, "pipeline_metrics": {},
+                    "pipeline_complexity": {}}
+
+        leaders = {"staging": [("default", group_data("in_1"))], "prod": [("default", group_data("in_2"))]}
+        with patch.object(app, "LEADERS", {"staging": "http://staging", "prod": "http://prod", "dev": "http://dev"}), \
+                patch.object(app, "_fetch_leaders", return_value=leaders) as fetch, \
+                patch.object(app, "render_graph", return_value=b"<svg>diff</svg>"):
+            page = self.client.get("/diff?base=staging&other=prod")
+            data = self.client.get("/api/diff.json?base=staging&other=prod").get_json()
+            unknown = self.client.get("/diff?base=staging&other=qa")
+
+        fetch.assert_called_with(["staging", "prod"])
+        self.assertIn(b"<svg>diff</svg>", page.data)
+        self.assertIn(b"Changes from staging to prod", page.data)
+        self.assertEqual(data["summary"]["nodes"], {"added": 1, "removed": 1, "changed": 0, "unchanged": 0, "unknown": 0})
+        self.assertEqual(data["groups"][0]["status"], "changed")
+        self.assertEqual(unknown.status_code, 404)
+
+    def test_client_view_loads_vendored_scripts_with_integrity(self):
+        assets = {"cytoscape.min.js": "sha384-a", "dagre.min.js": "sha384-b", "cytoscape-dagre.js": "sha384-c"}
+        with patch.object(app, "VENDOR_ASSETS", assets):
+            page = self.client.get("/?view=client").get_data(as_text=True)
+        with patch.object(app, "VENDOR_ASSETS", None):
+            missing = self.client.get("/?view=client").get_data(as_text=True)
+
+        self.assertIn('src="/static/vendor/cytoscape.min.js" integrity="sha384-a" crossorigin="anonymous"', page)
+        self.assertIn('src="/static/vendor/cytoscape-dagre.js" integrity="sha384-c" crossorigin="anonymous"', page)
+        self.assertNotIn("unpkg.com", page)
+        self.assertIn("vendor_assets.py", missing)
+        self.assertNotIn("/static/vendor/", missing)
+
+    def test_complete_fetches_persist_changed_groups_only(self):
+        store = MagicMock()
+        fresh = {"inputs": []}
+        changed = {"inputs": [{"id": "in_1"}]}
+        late = {"inputs": [], "stale_since": 10.0}
+        fetched = [[("a", fresh), ("b", late)], [("a", fresh)], [("a", fresh), ("b", late)],
+                   [("a", changed), ("b", fresh)]]
+        with patch.object(app, "snapshot_store", store), patch.object(app, "USE_ASYNC_CLIENT", False), \
+                patch.object(app, "get_cached_api_client"), \
+                patch.object(app, "fetch_graph_data", side_effect=fetched), \
+                patch.dict(app._last_known_groups, clear=True), patch.dict(app._persisted_digests, clear=True):
+            app._fetch_graph_data()
+            app._fetch_graph_data(group_ids=["a"])
+            app._fetch_graph_data()
+            app._fetch_graph_data()
+
+        # Single-group and unchanged fetches are not written; a late group keeps its stored data
+        self.assertEqual([c.args[0] for c in store.save_groups.call_args_list],
+                         [[("a", fresh)], [("a", changed), ("b", fresh)]])
+        self.assertEqual([c.kwargs["replace"] for c in store.save_groups.call_args_list], [False, True])
+
+    def test_stored_groups_are_restored_without_a_refresher(self):
+        store = MagicMock()
+        store.load_groups.return_value = [("a", {"inputs": []}, 50.0)]
+        with patch.object(app, "snapshot_refresher", None), \
+                patch.dict(app._last_known_groups, clear=True), patch.dict(app._persisted_digests, clear=True):
+            app._restore_groups(store)
+            last_known = dict(app._last_known_groups)
+            persisted = set(app._persisted_digests)
+
+        self.assertEqual(last_known, {"a": ({"inputs": []}, 50.0)})
+        self.assertEqual(persisted, {"a"})
+
+    def test_diff_needs_two_leaders(self):
+        with patch.object(app, "LEADERS", {}):
+            self.assertEqual(self.client.get("/api/diff.json").status_code, 400)
+
+    def test_paths_are_answered_from_the_cached_index(self):
+        group_data = {"inputs": [{"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}]}],
+                      "outputs": [{"id": "out_1"}], "source_metrics": {}, "dest_metrics": {},
+                      "source_health_map": {}, "dest_health_map": {}, "pipeline_metrics": {},
+                      "pipeline_complexity": {}}
+        with patch.dict(app._last_known_groups, {"default": (group_data, 0.0)}), \
+                patch.dict(app._path_groups, clear=True), \
+                patch.object(app, "build_flow_graph", wraps=app.build_flow_graph) as build, \
+                patch.object(app, "_fetch_graph_data") as fetch:
+            first = self.client.get("/api/paths?node=default/out_1").get_json()
+            second = self.client.get("/api/paths?node=default/in_1").get_json()
+            missing = self.client.get("/api/paths?node=default/nothing")
+            malformed = self.client.get("/api/paths?node=default")
+
+        build.assert_called_once()
+        fetch.assert_not_called()
+        self.assertEqual([node["svg_id"] for node in first["nodes"]], ["node:default/in_1", "node:default/out_1"])
+        self.assertEqual(second["edges"], first["edges"])
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(malformed.status_code, 400)
+
+    def test_paths_tell_unknown_groups_from_unavailable_ones(self):
+        unavailable = {"inputs": [], "outputs": [], "unavailable": True}
+        fetched = {"down": [("down", unavailable)], "nothing": []}
+        with patch.dict(app._last_known_groups, clear=True), patch.dict(app._path_groups, clear=True), \
+                patch.object(app, "_fetch_graph_data", side_effect=lambda group_ids: fetched[group_ids[0]]):
+            down = self.client.get("/api/paths?node=down/in_1")
+            unknown = self.client.get("/api/paths?node=nothing/in_1")
+
+        self.assertEqual(down.status_code, 503)
+        self.assertIn("could not be fetched", down.get_json()["error"])
+        self.assertEqual(unknown.status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
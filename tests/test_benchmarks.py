@@ -0,0 +1,40 @@
+import unittest
+from benchmarks.bench_graph import compare, run_size
+from benchmarks.synthetic_fleet import SyntheticFleet, fleet_for_node_count
+
+class TestSyntheticFleet(unittest.TestCase):
+
+    def test_fleet_shape(self):
+        fleet = SyntheticFleet(groups=3, inputs=4, outputs=2, pipelines=2, connections_per_input=3)
+
+        self.assertEqual(len(fleet.get_worker_groups()["items"]), 3)
+        self.assertEqual(len(fleet.get_sources("group-0")["items"]), 4)
+        self.assertEqual(len(fleet.get_sources("group-0")["items"][0]["connections"]), 3)
+        self.assertEqual(fleet.node_count, 18)
+
+    def test_fleet_is_deterministic(self):
+        self.assertEqual(SyntheticFleet(groups=2, seed=7).groups, SyntheticFleet(groups=2, seed=7).groups)
+
+    def test_fleet_for_node_count(self):
+        self.assertEqual(fleet_for_node_count(10).node_count, 10)
+        self.assertEqual(len(fleet_for_node_count(1000).groups), 10)
+
+class TestBenchGraph(unittest.TestCase):
+
+    def test_run_size(self):
+        result = run_size(20, render=False, nodes_per_group=10)
+
+        self.assertEqual(result["nodes"], 20)
+        self.assertEqual(set(result["stages"]), {"fetch", "build"})
+        self.assertGreater(result["stages"]["build"]["dot_bytes"], 0)
+        self.assertGreater(result["stages"]["build"]["peak_memory_bytes"], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"runs": [{"nodes": 10, "stages": {"build": {"seconds": 1.0}}}]}
+        current = {"runs": [{"nodes": 10, "stages": {"build": {"seconds": 2.0}}}]}
+
+        self.assertEqual(len(compare(baseline, current, max_regression=1.5)), 1)
+        self.assertEqual(compare(baseline, current, max_regression=3.0), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = TTLCache(max_entries=2, clock=lambda: self.now)
+
+    def test_get_and_set(self):
+        self.cache.set("a", 1)
+
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_expiry(self):
+        self.cache.set("a", 1, ttl=10)
+
+        self.now = 9.0
+        self.assertEqual(self.cache.get("a"), 1)
+        self.now = 10.0
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_invalidate(self):
+        self.cache.set("group-a/inputs", 1)
+        self.cache.set("group-b/inputs", 2)
+
+        removed = self.cache.invalidate(lambda key: key.startswith("group-a/"))
+
+        self.assertEqual(removed, 1)
+        self.assertNotIn("group-a/inputs", self.cache)
+        self.assertIn("group-b/inputs", self.cache)
+        self.assertEqual(self.cache.invalidate(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,18 @@
+import os
+import time
 import unittest
-from unittest.mock import MagicMock
-from cribl_api import CriblAPI
+from unittest.mock import MagicMock, patch
+import requests
+from cache import TTLCache
+from cribl_api import (
+    API_REQUEST_SECONDS,
+    DEFAULT_STATUS_TTL,
+    CriblAPI,
+    endpoint_labels,
+    get_leader_clients_from_env,
+    leaders_from_env,
+)
+from resilience import CircuitBreaker, CircuitOpenError
 
 class TestCriblAPI(unittest.TestCase):
 
@@ -202,5 +214,202 @@ class TestCriblAPI(unittest.TestCase):
         # Should return empty dict on failure for graceful degradation
         self.assertEqual(result, {})
 
+    def test_config_responses_are_cached(self):
+        """Test that configuration endpoints are served from the cache while fresh."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"id": "main", "functions": []}
+        self.api.session.get.return_value = mock_response
+
+        self.api.get_pipeline_functions("test-group", "main")
+        self.api.get_pipeline_functions("test-group", "main")
+        self.assertEqual(self.api.session.get.call_count, 1)
+        self.assertEqual(self.api.cache_stats()["hits"], 1)
+
+        self.api.invalidate("test-group")
+        self.api.get_pipeline_functions("test-group", "main")
+        self.assertEqual(self.api.session.get.call_count, 2)
+
+    def test_pipeline_details_expire_and_are_bounded(self):
+        """Test that cached pipeline definitions go stale after the config lifetime and are evicted LRU."""
+        now = [0.0]
+        self.api.cache = TTLCache(max_entries=2, clock=lambda: now[0])
+        self.api.config_ttl = 60
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"id": "main", "functions": []}
+        self.api.session.get.return_value = mock_response
+
+        for pipeline_id in ("p1", "p2", "p3"):
+            self.api.get_pipeline_functions("test-group", pipeline_id)
+        self.assertEqual(len(self.api.cache), 2)
+        self.api.get_pipeline_functions("test-group", "p1")
+        self.assertEqual(self.api.session.get.call_count, 4)
+
+        now[0] = 61
+        self.api.get_pipeline_functions("test-group", "p1")
+        self.assertEqual(self.api.session.get.call_count, 5)
+
+    def test_status_responses_expire(self):
+        """Test that status endpoints use the short status lifetime."""
+        now = [0.0]
+        self.api.cache = TTLCache(clock=lambda: now[0])
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"items": []}
+        self.api.session.get.return_value = mock_response
+
+        self.api.get_source_status("test-group")
+        self.api.get_sources("test-group")
+        now[0] = DEFAULT_STATUS_TTL + 1
+        self.api.get_source_status("test-group")
+        self.api.get_sources("test-group")
+
+        # Only the status call is repeated after the status lifetime has passed
+        self.assertEqual(self.api.session.get.call_count, 3)
+
+    def test_worker_groups_are_not_cached(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"items": []}
+        self.api.session.get.return_value = mock_response
+
+        self.api.get_worker_groups()
+        self.api.get_worker_groups()
+
+        self.assertEqual(self.api.session.get.call_count, 2)
+
+    def test_requests_are_timed_by_endpoint_template(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'{"items": []}'
+        mock_response.json.return_value = {"items": []}
+        self.api.session.get.return_value = mock_response
+        labels = {"method": "GET", "endpoint": "/api/v1/m/{group}/pipelines/{pipeline}", "group": "timed-group"}
+        before = API_REQUEST_SECONDS.count(**labels)
+
+        self.api.get_pipeline_functions("timed-group", "main")
+
+        self.assertEqual(API_REQUEST_SECONDS.count(**labels), before + 1)
+
+    def test_transient_errors_are_retried(self):
+        self.api.retry_backoff = 0
+        failed = MagicMock()
+        failed.raise_for_status.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=503))
+        ok = MagicMock()
+        ok.json.return_value = {"items": []}
+        self.api.session.get.side_effect = [requests.exceptions.ConnectTimeout("timed out"), failed, ok]
+
+        self.assertEqual(self.api.get_worker_groups(), {"items": []})
+        self.assertEqual(self.api.session.get.call_count, 3)
+
+    def test_deadline_bounds_timeouts_and_retries(self):
+        self.api.retry_backoff = 0
+        self.api.breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+        ok = MagicMock()
+        ok.json.return_value = {"items": []}
+        self.api.session.get.return_value = ok
+
+        with self.api.deadline(time.monotonic() + 2):
+            self.api.get_worker_groups()
+        connect, read = self.api.session.get.call_args.kwargs["timeout"]
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+        # A request cut short by the deadline is neither retried nor held against the endpoint
+        def slow_get(url, **kwargs):
+            time.sleep(0.1)
+            raise requests.exceptions.ReadTimeout("timed out")
+
+        self.api.session.get.reset_mock()
+        self.api.session.get.side_effect = slow_get
+        with self.api.deadline(time.monotonic() + 0.05):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self.api.get_sources("slow")
+            with self.assertRaises(TimeoutError):
+                self.api.get_sources("slow")
+        self.assertEqual(self.api.session.get.call_count, 1)
+        self.assertEqual(self.api.breaker.state(endpoint_labels("/api/v1/m/slow/system/inputs")), "closed")
+
+    def test_client_errors_are_not_retried(self):
+        self.api.retry_backoff = 0
+        failed = MagicMock()
+        failed.raise_for_status.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=404))
+        self.api.session.get.return_value = failed
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.api.get_worker_groups()
+        self.assertEqual(self.api.session.get.call_count, 1)
+
+    def test_open_circuit_fails_fast(self):
+        self.api.retries = 0
+        self.api.breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        self.api.session.get.side_effect = requests.exceptions.ConnectionError("refused")
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.api.get_sources("bad-group")
+        with self.assertRaises(CircuitOpenError):
+            self.api.get_sources("bad-group")
+        self.assertEqual(self.api.session.get.call_count, 2)
+        # Optional endpoints of the group degrade gracefully without calling the leader
+        self.assertEqual(self.api.get_source_health("bad-group"), {"items": []})
+        self.assertEqual(self.api.session.get.call_count, 3)
+
+    def test_timeouts_are_applied_to_the_session(self):
+        api = CriblAPI(base_url=self.base_url, token="mock-token", connect_timeout=2, read_timeout=7)
+        self.assertEqual(api.session.get_adapter("https://leader").timeout, (2, 7))
+
+    def test_streamed_endpoints_keep_graph_fields(self):
+        api = CriblAPI(base_url=self.base_url, token="mock-token", streamed_endpoints=["system/inputs"])
+        api.session = MagicMock()
+        body = b'{"count": 1, "items": [{"id": "in_1", "conf": {"port": 9000}, "connections": []}]}'
+        response = api.session.get.return_value
+        response.iter_content.return_value = [body[:17], body[17:]]
+
+        sources = api.get_sources("big-group")
+
+        api.session.get.assert_called_with(f"{self.base_url}/api/v1/m/big-group/system/inputs", stream=True)
+        self.assertEqual(sources, {"count": 1, "items": [{"id": "in_1", "connections": []}]})
+        response.close.assert_called_once()
+        # Other endpoints are decoded as a whole
+        api.session.get.return_value.json.return_value = {"items": [{"id": "out_1", "conf": {}}]}
+        self.assertEqual(api.get_destinations("big-group"), {"items": [{"id": "out_1", "conf": {}}]})
+
+    def test_unknown_streamed_endpoint(self):
+        with self.assertRaises(ValueError):
+            CriblAPI(base_url=self.base_url, token="mock-token", streamed_endpoints=["pipelines"])
+
+    def test_endpoint_labels(self):
+        self.assertEqual(
+            endpoint_labels("/api/v1/m/default/system/status/inputs"),
+            ("/api/v1/m/{group}/system/status/inputs", "default"),
+        )
+        self.assertEqual(endpoint_labels("/api/v1/master/groups"), ("/api/v1/master/groups", ""))
+
+    def test_leaders_from_env(self):
+        with patch.dict(os.environ, {"CRIBL_LEADERS": " staging=https://staging:9000, prod = https://prod:9000 ,"}):
+            self.assertEqual(leaders_from_env(), {"staging": "https://staging:9000", "prod": "https://prod:9000"})
+        for value in ("prod", "prod=", "a=http://a,a=http://b"):
+            with patch.dict(os.environ, {"CRIBL_LEADERS": value}), self.assertRaises(ValueError):
+                leaders_from_env()
+
+    def test_leader_clients_share_one_connection_pool(self):
+        env = {
+            "CRIBL_LEADERS": "staging=https://staging:9000,prod-eu=https://prod:9000",
+            "CRIBL_AUTH_TOKEN": "shared-token",
+            "CRIBL_AUTH_TOKEN_PROD_EU": "prod-token",
+        }
+        with patch.dict(os.environ, env):
+            clients = get_leader_clients_from_env()
+
+        staging, prod = clients["staging"], clients["prod-eu"]
+        self.assertEqual(prod.base_url, "https://prod:9000")
+        self.assertEqual(staging.session.headers["Authorization"], "Bearer shared-token")
+        self.assertEqual(prod.session.headers["Authorization"], "Bearer prod-token")
+        self.assertIs(staging.session.get_adapter("https://staging:9000"), prod.session.get_adapter("https://prod:9000"))
+        self.assertIsNot(staging.breaker, prod.breaker)
+        self.assertIsNot(staging.cache, prod.cache)
+
 if __name__ == '__main__':
     unittest.main()
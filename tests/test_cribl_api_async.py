@@ -0,0 +1,165 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import aiohttp
+from cribl_api_async import AsyncCriblAPI, SharedConnector
+from resilience import CircuitBreaker
+
+class TestAsyncCriblAPI(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.base_url = "http://mock-cribl:9000"
+        self.api = AsyncCriblAPI(base_url=self.base_url, token="mock-token", max_in_flight=2)
+        # Mock the session object directly since AsyncCriblAPI uses self.session.request
+        self.api.session = MagicMock()
+
+    def _mock_response(self, payload):
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read = AsyncMock(return_value=json.dumps(payload).encode("utf-8"))
+        self.api.session.request.return_value.__aenter__.return_value = mock_response
+        return mock_response
+
+    def test_token_header(self):
+        self.assertEqual(self.api.headers["Authorization"], "Bearer mock-token")
+
+    async def test_get_worker_groups(self):
+        self._mock_response({"items": [{"id": "default"}]})
+
+        groups = await self.api.get_worker_groups()
+
+        self.api.session.request.assert_called_with(
+            "GET", f"{self.base_url}/api/v1/master/groups", json=None, headers=self.api.headers
+        )
+        self.assertEqual(groups, {"items": [{"id": "default"}]})
+
+    async def test_get_sources(self):
+        group_id = "test-group"
+        self._mock_response({"items": []})
+
+        await self.api.get_sources(group_id)
+
+        self.api.session.request.assert_called_with(
+            "GET", f"{self.base_url}/api/v1/m/{group_id}/system/inputs", json=None, headers=self.api.headers
+        )
+
+    async def test_get_pipeline_status_failure_graceful(self):
+        """Test that pipeline status gracefully handles API errors."""
+        self.api.session.request.side_effect = Exception("API Error")
+
+        result = await self.api.get_pipeline_status("test-group")
+
+        self.assertEqual(result, {"items": []})
+
+    async def test_get_pipeline_functions_is_cached(self):
+        """Test that pipeline details are fetched once per pipeline."""
+        self._mock_response({"id": "main", "functions": [{"id": "eval"}]})
+
+        await self.api.get_pipeline_functions("test-group", "main")
+        result = await self.api.get_pipeline_functions("test-group", "main")
+
+        self.assertEqual(self.api.session.request.call_count, 1)
+        self.assertEqual(len(result["functions"]), 1)
+
+    async def test_transient_errors_are_retried(self):
+        self.api.retry_backoff = 0
+        mock_response = self._mock_response({"items": []})
+        mock_response.raise_for_status.side_effect = [
+            aiohttp.ClientResponseError(MagicMock(), (), status=502),
+            None,
+        ]
+
+        result = await self.api.get_worker_groups()
+
+        self.assertEqual(result, {"items": []})
+        self.assertEqual(self.api.session.request.call_count, 2)
+
+    async def test_cancelled_probe_frees_the_circuit(self):
+        self.api.breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        self.api.breaker.record_failure(("/api/v1/master/groups", ""))
+        self._mock_response({"items": []})
+        started = asyncio.Event()
+        release = asyncio.Event()
+        real_request = self.api._request
+
+        async def hanging_request(*args, **kwargs):
+            started.set()
+            await release.wait()
+            return await real_request(*args, **kwargs)
+
+        self.api._request = hanging_request
+        probe = asyncio.ensure_future(self.api.get_worker_groups())
+        await started.wait()
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.api._request = real_request
+        self.assertEqual(await self.api.get_worker_groups(), {"items": []})
+
+    async def test_streamed_endpoints_keep_graph_fields(self):
+        api = AsyncCriblAPI(base_url=self.base_url, token="mock-token", streamed_endpoints=["all"])
+        api.session = MagicMock()
+        body = b'{"items": [{"id": "in_1", "eps": 2.5, "cpu": 40}]}'
+
+        async def iter_chunked(size):
+            for chunk in (body[:10], body[10:]):
+                yield chunk
+
+        response = MagicMock()
+        response.content.iter_chunked = iter_chunked
+        api.session.request.return_value.__aenter__.return_value = response
+
+        status = await api.get_source_status("big-group")
+
+        self.assertEqual(status, {"items": [{"id": "in_1", "eps": 2.5}]})
+        response.read.assert_not_called()
+
+    async def test_shared_connector_outlives_client_sessions(self):
+        connector = SharedConnector(limit=8)
+        staging = AsyncCriblAPI(base_url="http://staging:9000", token="a", connector=connector)
+        prod = AsyncCriblAPI(base_url="http://prod:9000", token="b", connector=connector)
+        await staging.open()
+        await prod.open()
+
+        self.assertIs(staging.session.connector, prod.session.connector)
+        await staging.close()
+        self.assertFalse(prod.session.connector.closed)
+        await prod.close()
+        await connector.close()
+
+    async def test_concurrent_first_requests_wait_for_login(self):
+        api = AsyncCriblAPI(base_url=self.base_url, username="admin", password="secret")
+        api.session = MagicMock()
+        sent = []
+
+        def request(method, url, json=None, headers=None):
+            sent.append((url, dict(headers)))
+            response = MagicMock()
+            response.status = 200
+
+            async def read():
+                if url.endswith("/auth/login"):
+                    await asyncio.sleep(0.05)
+                    return b'{"token": "fresh"}'
+                return b'{"items": []}'
+
+            response.read = read
+            context = MagicMock()
+            context.__aenter__ = AsyncMock(return_value=response)
+            context.__aexit__ = AsyncMock(return_value=False)
+            return context
+
+        api.session.request.side_effect = request
+
+        await asyncio.gather(*(api.get_sources(f"group-{i}") for i in range(3)))
+
+        logins = [url for url, _ in sent if url.endswith("/auth/login")]
+        self.assertEqual(len(logins), 1)
+        for url, headers in sent:
+            if not url.endswith("/auth/login"):
+                self.assertEqual(headers.get("Authorization"), "Bearer fresh")
+
+if __name__ == '__main__':
+    unittest.main()
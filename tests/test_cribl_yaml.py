@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from cribl_yaml import CriblYamlConfig, main
+from graph_generator import generate_graph
+
+INPUTS_YML = """
+inputs:
+  in_syslog:
+    type: syslog
+    description: Syslog Input
+    connections:
+      - output: out_s3
+        pipeline: main
+  in_http:
+    type: http
+    disabled: true
+"""
+
+OUTPUTS_YML = """
+outputs:
+  out_s3:
+    type: s3
+"""
+
+PIPELINE_YML = """
+functions:
+""" + "".join(f"  - id: eval\n    conf: {{}}\n" for _ in range(20))
+
+class TestCriblYamlConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        cribl_dir = os.path.join(self.root, "groups", "default", "local", "cribl")
+        os.makedirs(os.path.join(cribl_dir, "pipelines", "main"))
+        os.makedirs(os.path.join(self.root, "groups", "empty", "local", "cribl"))
+        self._write(os.path.join(cribl_dir, "inputs.yml"), INPUTS_YML)
+        self._write(os.path.join(cribl_dir, "outputs.yml"), OUTPUTS_YML)
+        self._write(os.path.join(cribl_dir, "pipelines", "main", "conf.yml"), PIPELINE_YML)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_loads_groups_inputs_outputs_and_pipelines(self):
+        config = CriblYamlConfig(self.root)
+
+        self.assertEqual(config.get_worker_groups(), {"items": [{"id": "default"}, {"id": "empty"}]})
+        inputs = config.get_sources("default")["items"]
+        self.assertEqual([item["id"] for item in inputs], ["in_syslog", "in_http"])
+        self.assertEqual(inputs[0]["connections"], [{"output": "out_s3", "pipeline": "main"}])
+        self.assertEqual(config.get_destinations("default")["items"], [{"id": "out_s3", "type": "s3"}])
+        self.assertEqual(len(config.get_pipelines("default")["items"][0]["conf"]["functions"]), 20)
+        self.assertEqual(config.get_sources("empty"), {"items": []})
+        self.assertEqual(config.get_source_status("default"), {"items": []})
+
+    def test_parallel_parse_matches_serial(self):
+        serial = CriblYamlConfig(self.root)
+        parallel = CriblYamlConfig(self.root, processes=2, parallel_threshold=0)
+
+        self.assertEqual(serial.groups, parallel.groups)
+
+    def test_missing_groups_directory(self):
+        with self.assertRaises(FileNotFoundError):
+            CriblYamlConfig(os.path.join(self.root, "groups"))
+
+    def test_generate_graph_from_yaml(self):
+        source_code = generate_graph(CriblYamlConfig(self.root)).source
+
+        self.assertIn("default_in_syslog -> default_out_s3", source_code)
+        self.assertIn("Complex 🔴 (20 funcs)", source_code)
+        self.assertIn("[D] in_http", source_code)
+
+    def test_main_writes_dot_source(self):
+        output = os.path.join(self.root, "graph.dot")
+
+        main([self.root, "-o", output, "-f", "dot"])
+
+        with open(output) as f:
+            self.assertIn("digraph Cribl", f.read())
+
+if __name__ == '__main__':
+    unittest.main()
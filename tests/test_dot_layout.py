@@ -0,0 +1,102 @@
+import unittest
+
+import graphviz
+
+from dot_layout import apply_layout, parse_layout, topology_fingerprint
+
+LAID_OUT = r'''digraph Cribl {
+	graph [bb="0,0,412,196",
+		rankdir=LR
+	];
+	node [label="\N"];
+	subgraph cluster_default {
+		graph [bb="8,8,404,188",
+			label=default,
+			lp="206,176.5"
+		];
+		{
+			graph [rank=source];
+			default_in_1	[height=0.5,
+				label="in_1
+(1.00 EPS)",
+				pos="54,84",
+				width=1.0];
+		}
+		"default_out-1"	[label="out-1",
+			pos="350,84"];
+		default_in_1 -> "default_out-1"	[label=main,
+			lp="202,91.5",
+			pos="e,314,84 90,84 150,84 250,84 \
+303.8,84"];
+		default_in_1 -> "default_out-1"	[label=other,
+			pos="e,314,60 90,60 303.8,60"];
+	}
+}
+'''
+
+
+def _graph(eps, extra_edge=False, fillcolor="lightblue"):
+    dot = graphviz.Digraph("Cribl")
+    dot.attr(rankdir="LR")
+    with dot.subgraph(name="cluster_default") as c:
+        c.attr(label="default")
+        with c.subgraph() as s:
+            s.attr(rank="source")
+            s.node("default_in_1", label=f"in_1\n({eps:.2f} EPS)", fillcolor=fillcolor)
+        c.node("default_out-1", label="out-1")
+        c.edge("default_in_1", "default_out-1", label="main", penwidth=str(eps))
+        c.edge("default_in_1", "default_out-1", label="other")
+        if extra_edge:
+            c.edge("default_out-1", "default_in_1")
+    return dot
+
+
+class TestDotLayout(unittest.TestCase):
+
+    def test_topology_fingerprint_ignores_colours_but_not_sizes(self):
+        self.assertEqual(
+            topology_fingerprint(list(_graph(1.0))), topology_fingerprint(list(_graph(1.0, fillcolor="orange")))
+        )
+        # Live EPS figures are left out, so a metrics-only refresh keeps its layout
+        self.assertEqual(topology_fingerprint(list(_graph(1.0))), topology_fingerprint(list(_graph(250.5))))
+        # Other label text sizes its node
+        self.assertNotEqual(topology_fingerprint(["a [label=in]\n"]), topology_fingerprint(["a [label=\"in (12 funcs)\"]\n"]))
+        self.assertNotEqual(topology_fingerprint(["a\n"]), topology_fingerprint(["a [shape=circle]\n"]))
+        self.assertNotEqual(topology_fingerprint(["a\n"]), topology_fingerprint(["node [fontsize=20]\n", "a\n"]))
+        self.assertNotEqual(
+            topology_fingerprint(list(_graph(1.0))), topology_fingerprint(list(_graph(1.0, extra_edge=True)))
+        )
+
+    def test_parse_layout(self):
+        layout = parse_layout(LAID_OUT)
+
+        self.assertEqual(layout.graph, {"bb": "0,0,412,196"})
+        self.assertEqual(layout.clusters, {"cluster_default": {"bb": "8,8,404,188", "lp": "206,176.5"}})
+        self.assertEqual(layout.nodes, {"default_in_1": "54,84", "default_out-1": "350,84"})
+        self.assertEqual(layout.edges[("default_in_1", "default_out-1")], [
+            {"lp": "202,91.5", "pos": "e,314,84 90,84 150,84 250,84 303.8,84"},
+            {"pos": "e,314,60 90,60 303.8,60"},
+        ])
+
+    def test_apply_layout_keeps_new_attributes(self):
+        source = apply_layout(list(_graph(7.0)), parse_layout(LAID_OUT))
+        layout = parse_layout(source)
+
+        self.assertEqual(layout.nodes, {"default_in_1": "54,84", "default_out-1": "350,84"})
+        self.assertEqual(layout.clusters["cluster_default"]["bb"], "8,8,404,188")
+        self.assertEqual(layout.graph["bb"], "0,0,412,196")
+        self.assertEqual(
+            [edge["pos"] for edge in layout.edges[("default_in_1", "default_out-1")]],
+            ["e,314,84 90,84 150,84 250,84 303.8,84", "e,314,60 90,60 303.8,60"],
+        )
+        self.assertIn("(7.00 EPS)", source)
+        self.assertIn("penwidth=7.0", source)
+        # Nodes keep their cluster; positions are set after the clusters are closed
+        self.assertLess(source.index("subgraph cluster_default"), source.index('default_in_1 [pos="54,84"]'))
+
+    def test_unsupported_syntax_raises(self):
+        with self.assertRaises(ValueError):
+            topology_fingerprint(["a -> {b c}\n"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+
+from flow_model import FlowGroup, build_flow_group, summarize_group
+
+
+def _group_data(**overrides):
+    data = {
+        "inputs": [],
+        "outputs": [],
+        "source_metrics": {},
+        "dest_metrics": {},
+        "source_health_map": {},
+        "dest_health_map": {},
+        "pipeline_metrics": {},
+        "pipeline_complexity": {},
+    }
+    data.update(overrides)
+    return data
+
+
+class TestFlowModel(unittest.TestCase):
+
+    def test_intern_assigns_stable_ids(self):
+        group = FlowGroup("default")
+        first = group.intern("in_syslog")
+        self.assertEqual(group.intern("out_s3"), first + 1)
+        self.assertEqual(group.intern("in_syslog"), first)
+        self.assertEqual(group.name(first), "in_syslog")
+        self.assertIsNone(group.lookup("missing"))
+
+    def test_build_flow_group_edges_and_orphans(self):
+        group = build_flow_group("default", _group_data(
+            inputs=[
+                {"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}, {"output": "out_2"}]},
+                {"id": "in_2", "connections": []},
+                {"id": "in_3", "disabled": True, "connections": [{"output": "out_3"}]},
+            ],
+            outputs=[{"id": "out_1"}, {"id": "out_2"}, {"id": "out_3"}, {"id": "out_4"}],
+            pipeline_metrics={"main": {"eps": 12.5}},
+            pipeline_complexity={"main": {"score": 2, "level": "low", "label": "✓ (2 funcs)"}},
+        ))
+
+        self.assertEqual([group.name(node.name) for node in group.inputs if node.orphan], ["in_2"])
+        # out_3 is only referenced by a disabled input, which still counts
+        self.assertEqual([group.name(node.name) for node in group.outputs if node.orphan], ["out_4"])
+
+        routes = [(group.name(e.source), group.name(e.target), group.name(e.pipeline.name)) for e in group.edges]
+        self.assertEqual(routes, [("in_1", "out_1", "main"), ("in_1", "out_2", "passthru")])
+        self.assertEqual(group.edges[0].pipeline.eps, 12.5)
+        self.assertEqual(group.edges[0].pipeline.complexity["score"], 2)
+        self.assertEqual(group.edges[1].pipeline.eps, 0)
+        self.assertIsNone(group.edges[1].pipeline.complexity)
+
+    def test_build_flow_group_shares_pipelines_between_edges(self):
+        group = build_flow_group("default", _group_data(
+            inputs=[
+                {"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}]},
+                {"id": "in_2", "connections": [{"output": "out_1", "pipeline": "main"}]},
+            ],
+        ))
+
+        self.assertIs(group.edges[0].pipeline, group.edges[1].pipeline)
+        self.assertEqual(len(group.pipelines), 1)
+
+    def test_build_flow_group_metrics_and_max_eps(self):
+        group = build_flow_group("default", _group_data(
+            inputs=[{"id": "in_1"}, {"id": "in_2"}],
+            outputs=[{"id": "out_1"}],
+            source_metrics={"in_1": {"eps": 40.0}, "in_2": {"events": 7}, "gone": {"eps": 90.0}},
+            dest_metrics={"out_1": {"eps": 10.0}},
+            source_health_map={"in_1": {"error_rate": 12}},
+        ))
+
+        in_1, in_2 = group.inputs
+        self.assertEqual(in_1.metrics.eps, 40.0)
+        self.assertEqual(in_1.health.error_rate, 12)
+        self.assertEqual(in_1.health.drop_rate, 0)
+        self.assertIsNone(in_2.metrics.eps)
+        self.assertEqual(in_2.metrics.events, 7)
+        self.assertIsNone(in_2.health)
+        self.assertIsNone(group.outputs[0].health)
+        # Every reported input and output counts towards the group maximum
+        self.assertEqual(group.max_eps, 90.0)
+
+    def test_adjacency_indexes_and_reachable_routes(self):
+        def route(output, pipeline):
+            return {"output": output, "pipeline": pipeline}
+
+        group = build_flow_group("default", _group_data(
+            inputs=[
+                {"id": "in_a", "connections": [route("out_x", "main"), route("out_y", "passthru"), route("relay", "fwd")]},
+                {"id": "in_b", "connections": [route("out_x", "main")]},
+                # An input and an output of the same name are one node of the graph
+                {"id": "relay", "connections": [route("out_w", "passthru")]},
+                {"id": "in_c", "connections": [route("out_z", "other")]},
+            ],
+            outputs=[{"id": name} for name in ("out_x", "out_y", "out_z", "out_w", "relay")],
+        ))
+
+        self.assertEqual(group.outgoing[group.lookup("in_a")], [0, 1, 2])
+        self.assertEqual(group.incoming[group.lookup("out_x")], [0, 3])
+        self.assertEqual(group.pipeline_edges[group.lookup_pipeline("passthru")], [1, 4])
+
+        def names(result):
+            return sorted(group.name(node_id) for node_id in result[0]), result[1]
+
+        self.assertEqual(names(group.reachable("in_a")), (["in_a", "out_w", "out_x", "out_y", "relay"], [0, 1, 2, 4]))
+        self.assertEqual(names(group.reachable("out_w")), (["in_a", "out_w", "relay"], [2, 4]))
+        self.assertEqual(names(group.reachable("main")), (["in_a", "in_b", "out_x"], [0, 3]))
+        self.assertIsNone(group.reachable("missing"))
+
+    def test_pipelines_do_not_collide_with_nodes(self):
+        group = build_flow_group("default", _group_data(
+            inputs=[
+                {"id": "in_1", "connections": [{"output": "main", "pipeline": "main"}]},
+                {"id": "in_2", "connections": [{"output": "out_2", "pipeline": "main"}]},
+            ],
+            outputs=[{"id": "main"}, {"id": "out_2"}],
+        ))
+
+        self.assertNotEqual(group.lookup("main"), group.lookup_pipeline("main"))
+        self.assertEqual(group.name(group.lookup_pipeline("main")), "main")
+        self.assertNotIn(group.lookup("main"), group.pipeline_edges)
+
+        def names(result):
+            return sorted(group.name(node_id) for node_id in result[0]), result[1]
+
+        # The output named "main" keeps its own routes and stays in the result
+        self.assertEqual(names(group.reachable("main")), (["in_1", "main"], [0]))
+        self.assertEqual(names(group.reachable("in_2")), (["in_2", "out_2"], [1]))
+
+    def test_nodes_have_no_instance_dict(self):
+        group = build_flow_group("default", _group_data(inputs=[{"id": "in_1"}]))
+        with self.assertRaises(AttributeError):
+            group.inputs[0].extra = True
+
+    def test_summarize_group(self):
+        group = build_flow_group("default", _group_data(
+            inputs=[
+                {"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}]},
+                {"id": "in_2", "connections": []},
+                {"id": "in_3", "disabled": True},
+            ],
+            outputs=[{"id": "out_1"}],
+            source_metrics={"in_1": {"eps": 10.0}, "in_2": {"eps": 2.5}},
+            dest_metrics={"out_1": {"eps": 99.0}},
+            source_health_map={"in_1": {"error_rate": 3, "drop_rate": 7}},
+            dest_health_map={"out_1": {"error_rate": 6}},
+            pipeline_complexity={"main": {}, "unused": {}},
+        ))
+
+        self.assertEqual(summarize_group(group), {
+            "inputs": 2,
+            "outputs": 1,
+            "disabled": 1,
+            "pipelines": 2,
+            "eps": 12.5,
+            "orphans": 1,
+            "error_rate": 6,
+            "drop_rate": 7,
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
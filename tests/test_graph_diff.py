@@ -0,0 +1,97 @@
+import unittest
+
+from graph_diff import build_diff_graph, diff_graph_data, diff_summary
+
+
+def group_data(inputs, outputs=(), functions=None):
+    """Builds fetched group data from (id, connections, description) inputs and output IDs."""
+    return {
+        "inputs": [
+            {"id": input_id, "disabled": False, "description": description,
+             "connections": [{"output": output, "pipeline": pipeline} for output, pipeline in connections]}
+            for input_id, connections, description in inputs
+        ],
+        "outputs": [{"id": output_id} for output_id in outputs],
+        "source_metrics": {},
+        "dest_metrics": {},
+        "source_health_map": {},
+        "dest_health_map": {},
+        "pipeline_metrics": {},
+        "pipeline_complexity": {
+            name: {"score": count, "level": "low", "label": ""} for name, count in (functions or {}).items()
+        },
+    }
+
+
+class TestGraphDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.staging = [
+            ("shared", group_data(
+                [("in_http", [("out_s3", "main")], ""), ("in_syslog", [("out_s3", "main")], "")],
+                ["out_s3"], {"main": 3},
+            )),
+            ("retired", group_data([("in_old", [], "")])),
+        ]
+        self.prod = [
+            ("shared", group_data(
+                [("in_http", [("out_s3", "main")], "public"), ("in_kafka", [("out_s3", "main")], "")],
+                ["out_s3"], {"main": 5},
+            )),
+            ("new", group_data([("in_new", [], "")])),
+        ]
+
+    def test_matches_elements_by_identity(self):
+        diff = diff_graph_data(self.staging, self.prod)
+
+        self.assertEqual([(group["id"], group["status"]) for group in diff],
+                         [("shared", "changed"), ("retired", "removed"), ("new", "added")])
+        nodes = {(node["kind"], node["name"]): node for node in diff[0]["nodes"]}
+        self.assertEqual(nodes[("input", "in_http")]["status"], "changed")
+        self.assertEqual(nodes[("input", "in_http")]["changes"], {"description": ["", "public"]})
+        self.assertEqual(nodes[("input", "in_syslog")]["status"], "removed")
+        self.assertEqual(nodes[("input", "in_kafka")]["status"], "added")
+        self.assertEqual(nodes[("output", "out_s3")]["status"], "unchanged")
+        edges = {(edge["source"], edge["status"]) for edge in diff[0]["edges"]}
+        self.assertEqual(edges, {("in_http", "changed"), ("in_syslog", "removed"), ("in_kafka", "added")})
+
+    def test_identical_leaders_are_unchanged(self):
+        diff = diff_graph_data(self.prod, self.prod)
+
+        summary = diff_summary(diff)
+        self.assertEqual(summary["groups"], {"added": 0, "removed": 0, "changed": 0, "unchanged": 2, "unknown": 0})
+        self.assertEqual(summary["nodes"]["unchanged"], 4)
+        self.assertEqual(summary["edges"]["unchanged"], 2)
+
+    def test_build_diff_graph_colours_by_status(self):
+        source = build_diff_graph(diff_graph_data(self.staging, self.prod), "staging", "prod").source
+
+        self.assertIn("label=\"staging → prod\"", source)
+        self.assertIn("subgraph cluster_retired", source)
+        self.assertIn("label=\"retired (removed)\"", source)
+        self.assertRegex(source, r'shared_in_kafka \[label=in_kafka color=darkgreen fillcolor=palegreen')
+        self.assertRegex(source, r'shared_in_syslog \[label=in_syslog color=red fillcolor=mistyrose')
+        self.assertIn("description:  → public", source)
+        self.assertIn("functions: 3 → 5", source)
+
+    def test_unfetched_groups_are_not_compared(self):
+        unavailable = dict(group_data([]), unavailable=True)
+        stale = dict(self.prod[0][1], stale_since=0.0)
+        diff = diff_graph_data(self.staging, [("shared", unavailable), ("retired", stale)])
+
+        self.assertEqual([(group["id"], group["status"]) for group in diff],
+                         [("shared", "unknown"), ("retired", "unknown")])
+        self.assertEqual(diff[0]["reason"], "no data from other")
+        self.assertEqual(diff[1]["reason"], "other data from 1970-01-01 00:00:00 UTC")
+        self.assertEqual((diff[0]["nodes"], diff[0]["edges"]), ([], []))
+        self.assertEqual(diff_summary(diff)["groups"]["unknown"], 2)
+        self.assertEqual(diff_summary(diff)["nodes"]["removed"], 0)
+
+        source = build_diff_graph(diff, "staging", "prod").source
+        self.assertIn('label="shared (not compared)"', source)
+        self.assertIn("Not compared: no data from other", source)
+        self.assertNotIn("shared_in_http", source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,67 @@
+import asyncio
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+from cache import TTLCache
+from flow_model import build_flow_group
+from resilience import CircuitOpenError
 from graph_generator import (
     generate_graph,
+    generate_graph_async,
+    build_graph,
+    build_graph_json,
+    build_group_graphs,
+    build_summary_graph,
+    fetch_graph_data,
+    fetch_graph_data_async,
+    fetch_leaders,
+    fetch_leaders_async,
+    find_paths,
+    iter_graph_lines,
+    _add_group_cluster,
     _get_node_color,
     _get_edge_attributes,
     _detect_orphan_inputs,
     _detect_orphan_outputs,
     _calculate_pipeline_complexity,
+    _has_function_list,
 )
 
+# Per-group endpoints that the mock clients answer with an empty listing
+_GROUP_METHODS = ("get_sources", "get_destinations", "get_source_status", "get_destination_status",
+                  "get_source_health", "get_destination_health", "get_pipeline_status", "get_pipelines")
+
+
+def _mock_client(groups, async_=False):
+    """
+    Returns a mock API client listing the given worker groups, each without
+    inputs, outputs or metrics. Tests override the endpoints they exercise.
+    """
+    client = MagicMock()
+    listing = {"items": [{"id": group_id} for group_id in groups]}
+    if async_:
+        client.get_worker_groups = AsyncMock(return_value=listing)
+        for method in _GROUP_METHODS:
+            setattr(client, method, AsyncMock(return_value={"items": []}))
+    else:
+        client.get_worker_groups.return_value = listing
+        for method in _GROUP_METHODS:
+            getattr(client, method).return_value = {"items": []}
+    return client
+
+
+def _empty_group(**overrides):
+    """
+    Returns fetched data of a worker group without inputs, outputs or metrics,
+    with the given keys replaced.
+    """
+    group_data = {"inputs": [], "outputs": [], "source_metrics": {}, "dest_metrics": {}, "source_health_map": {},
+                  "dest_health_map": {}, "pipeline_metrics": {}, "pipeline_complexity": {}}
+    group_data.update(overrides)
+    return group_data
+
+
 class TestGraphGenerator(unittest.TestCase):
 
     def test_generate_graph(self):
@@ -368,6 +421,63 @@ class TestGraphGenerator(unittest.TestCase):
         self.assertEqual(result["level"], "low")
         self.assertEqual(result["label"], "")
 
+    def test_calculate_pipeline_complexity_from_conf(self):
+        """Test complexity scoring from the conf section of the /pipelines listing."""
+        pipeline = {"id": "listed", "conf": {"functions": [{"id": "eval"}] * 6}}
+
+        result = _calculate_pipeline_complexity(pipeline)
+
+        self.assertEqual(result["score"], 6)
+        self.assertEqual(result["level"], "medium")
+
+    def test_calculate_pipeline_complexity_from_conf_next_to_config(self):
+        """Test that a config section without functions does not hide the conf functions."""
+        pipeline = {"id": "listed", "config": {"asyncFuncTimeout": 1000},
+                    "conf": {"functions": [{"id": "eval"}] * 6}}
+
+        result = _calculate_pipeline_complexity(pipeline)
+
+        self.assertTrue(_has_function_list(pipeline))
+        self.assertEqual(result["score"], 6)
+
+    def test_generate_graph_scores_complexity_from_listing(self):
+        """Test that pipeline details are only fetched when the listing lacks functions."""
+        mock_api_client = MagicMock()
+        mock_api_client.get_worker_groups.return_value = {"items": [{"id": "default"}]}
+        mock_api_client.get_sources.return_value = {
+            "items": [
+                {
+                    "id": "in_1",
+                    "disabled": False,
+                    "connections": [
+                        {"output": "out_1", "pipeline": "listed"},
+                        {"output": "out_1", "pipeline": "bare"},
+                    ],
+                }
+            ]
+        }
+        mock_api_client.get_destinations.return_value = {"items": [{"id": "out_1"}]}
+        mock_api_client.get_source_status.return_value = {"items": []}
+        mock_api_client.get_destination_status.return_value = {"items": []}
+        mock_api_client.get_source_health.return_value = {"items": []}
+        mock_api_client.get_destination_health.return_value = {"items": []}
+        mock_api_client.get_pipeline_status.return_value = {"items": []}
+        mock_api_client.get_pipelines.return_value = {
+            "items": [
+                {"id": "listed", "conf": {"functions": [{"id": "eval"}] * 20}},
+                {"id": "bare"},
+            ]
+        }
+        mock_api_client.get_pipeline_functions.return_value = {
+            "functions": [{"id": "eval"}] * 8
+        }
+
+        source_code = generate_graph(mock_api_client).source
+
+        mock_api_client.get_pipeline_functions.assert_called_once_with("default", "bare")
+        self.assertIn("Complex 🔴 (20 funcs)", source_code)
+        self.assertIn("⚠ (8 funcs)", source_code)
+
     def test_generate_graph_with_orphan_inputs(self):
         """Test that orphan inputs appear in graph with correct styling."""
         mock_api_client = MagicMock()
@@ -502,5 +612,343 @@ class TestGraphGenerator(unittest.TestCase):
         self.assertIn("[DISABLED]", source_code)  # Disabled input
         self.assertIn("EPS", source_code)  # Feature #1 metrics
 
+    def test_generate_graph_cluster_order_is_deterministic(self):
+        """Test that clusters follow worker-group order even when responses arrive out of order."""
+        mock_api_client = MagicMock()
+        mock_api_client.get_worker_groups.return_value = {
+            "items": [{"id": "slow"}, {"id": "fast"}]
+        }
+
+        def get_sources(group_id):
+            # The first group answers last
+            if group_id == "slow":
+                time.sleep(0.05)
+            return {"items": [{"id": f"in_{group_id}", "disabled": False, "connections": []}]}
+
+        mock_api_client.get_sources.side_effect = get_sources
+        mock_api_client.get_destinations.return_value = {"items": []}
+        mock_api_client.get_source_status.return_value = {"items": []}
+        mock_api_client.get_destination_status.return_value = {"items": []}
+        mock_api_client.get_source_health.return_value = {"items": []}
+        mock_api_client.get_destination_health.return_value = {"items": []}
+        mock_api_client.get_pipeline_status.return_value = {"items": []}
+        mock_api_client.get_pipelines.return_value = {"items": []}
+
+        source_code = generate_graph(mock_api_client, max_workers=4).source
+
+        self.assertLess(source_code.index("cluster_slow"), source_code.index("cluster_fast"))
+        self.assertEqual(source_code, generate_graph(mock_api_client, max_workers=1).source)
+
+    def test_generate_graph_async_matches_sync(self):
+        """Test that the async entry point produces the same graph as generate_graph."""
+        responses = {
+            "get_worker_groups": {"items": [{"id": "default"}, {"id": "edge"}]},
+            "get_sources": {
+                "items": [
+                    {
+                        "id": "in_1",
+                        "disabled": False,
+                        "connections": [{"output": "out_1", "pipeline": "main"}],
+                    }
+                ]
+            },
+            "get_destinations": {"items": [{"id": "out_1"}]},
+            "get_source_status": {"items": [{"id": "in_1", "eps": 10.0}]},
+            "get_destination_status": {"items": []},
+            "get_source_health": {"items": []},
+            "get_destination_health": {"items": []},
+            "get_pipeline_status": {"items": [{"id": "main", "eps": 5.0}]},
+            "get_pipelines": {"items": [{"id": "main"}]},
+            "get_pipeline_functions": {"functions": [{"id": "eval"}] * 6},
+        }
+        sync_client = MagicMock()
+        async_client = MagicMock()
+        for method, response in responses.items():
+            getattr(sync_client, method).return_value = response
+            setattr(async_client, method, AsyncMock(return_value=response))
+
+        async_source = asyncio.run(generate_graph_async(async_client)).source
+
+        self.assertEqual(async_source, generate_graph(sync_client).source)
+        self.assertIn("⚠ (6 funcs)", async_source)
+
+    def test_build_graph_regenerates_only_changed_groups(self):
+        """Test that unchanged groups are composed from cached cluster fragments."""
+        def group_data(input_id):
+            return _empty_group(inputs=[{"id": input_id, "disabled": False, "connections": []}])
+
+        graph_data = [(f"cached_{i}", group_data("in_1")) for i in range(3)]
+        first = build_graph(graph_data).source
+
+        graph_data[1] = ("cached_1", group_data("in_2"))
+        with patch("graph_generator._add_group_cluster", wraps=_add_group_cluster) as add_cluster:
+            second = build_graph(graph_data).source
+
+        add_cluster.assert_called_once()
+        self.assertEqual(add_cluster.call_args[0][1].id, "cached_1")
+        self.assertIn("cached_1_in_2", second)
+        self.assertNotIn("cached_1_in_2", first)
+        self.assertEqual(second, build_graph(graph_data).source)
+
+    def test_fetch_graph_data_for_selected_groups(self):
+        """Test that only the requested worker groups are fetched."""
+        mock_api_client = _mock_client(["g1", "g2", "g3"])
+
+        graph_data = fetch_graph_data(mock_api_client, group_ids=["g3", "g2"])
+
+        self.assertEqual([group_id for group_id, _ in graph_data], ["g2", "g3"])
+        self.assertEqual(
+            sorted(call[0][0] for call in mock_api_client.get_sources.call_args_list), ["g2", "g3"]
+        )
+        with self.assertRaises(KeyError):
+            fetch_graph_data(mock_api_client, group_ids=["missing"])
+
+    def test_fetch_leaders_concurrently(self):
+        """Test that leaders are fetched at the same time, each with its own client."""
+        def leader_client(group_id):
+            client = _mock_client([group_id])
+
+            def get_worker_groups():
+                time.sleep(0.2)
+                return {"items": [{"id": group_id}]}
+
+            client.get_worker_groups.side_effect = get_worker_groups
+            return client
+
+        start = time.monotonic()
+        leaders = fetch_leaders({"staging": leader_client("g_staging"), "prod": leader_client("g_prod")})
+
+        self.assertLess(time.monotonic() - start, 0.35)
+        self.assertEqual(list(leaders), ["staging", "prod"])
+        self.assertEqual([group_id for group_id, _ in leaders["prod"]], ["g_prod"])
+
+        failing = leader_client("g_dev")
+        failing.get_worker_groups.side_effect = ConnectionError("dev is down")
+        with self.assertRaises(ConnectionError):
+            fetch_leaders({"prod": leader_client("g_prod"), "dev": failing})
+
+    def test_fetch_leaders_async(self):
+        """Test that async leader clients are fetched in one gather."""
+        leaders = asyncio.run(fetch_leaders_async({
+            "staging": _mock_client(["a"], async_=True), "prod": _mock_client(["b"], async_=True),
+        }))
+
+        self.assertEqual({name: [group_id for group_id, _ in data] for name, data in leaders.items()},
+                         {"staging": ["a"], "prod": ["b"]})
+
+    def test_fetch_graph_data_deadline_uses_last_known_data(self):
+        """Test that groups missing the deadline are returned stale or as placeholders."""
+        release = threading.Event()
+        mock_api_client = _mock_client(["fast", "slow", "new"])
+
+        def get_sources(group_id):
+            if group_id != "fast":
+                release.wait(5)
+            return {"items": [{"id": f"in_{group_id}"}]}
+
+        mock_api_client.get_sources.side_effect = get_sources
+        known = {"slow": ({"inputs": [{"id": "in_old"}], "outputs": []}, 1700000000.0)}
+
+        started = time.monotonic()
+        try:
+            graph_data = dict(fetch_graph_data(
+                mock_api_client, deadline=time.monotonic() + 0.2, last_known=known.get
+            ))
+        finally:
+            release.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        # Requests run on the pool are bounded by the deadline, so abandoned ones end soon after
+        self.assertTrue(mock_api_client.deadline.called)
+        self.assertEqual(graph_data["fast"]["inputs"], [{"id": "in_fast"}])
+        self.assertEqual(graph_data["slow"]["inputs"], [{"id": "in_old"}])
+        self.assertEqual(graph_data["slow"]["stale_since"], 1700000000.0)
+        self.assertTrue(graph_data["new"]["unavailable"])
+
+    def test_fetch_graph_data_async_deadline(self):
+        """Test that the async fetcher abandons groups that miss the deadline."""
+        async_client = _mock_client(["fast", "slow"], async_=True)
+
+        async def get_sources(group_id):
+            if group_id == "slow":
+                await asyncio.sleep(5)
+            return {"items": []}
+
+        async_client.get_sources = get_sources
+
+        async def fetch():
+            return await fetch_graph_data_async(async_client, deadline=time.monotonic() + 0.2)
+
+        graph_data = dict(asyncio.run(fetch()))
+
+        self.assertNotIn("unavailable", graph_data["fast"])
+        self.assertTrue(graph_data["slow"]["unavailable"])
+
+    def test_fetch_graph_data_degrades_groups_that_fail(self):
+        """Test that a group whose inputs cannot be fetched does not fail the graph."""
+        mock_api_client = _mock_client(["ok", "broken", "new"])
+
+        def get_sources(group_id):
+            if group_id != "ok":
+                raise CircuitOpenError(f"Circuit open for {group_id}")
+            return {"items": [{"id": "in_ok"}]}
+
+        mock_api_client.get_sources.side_effect = get_sources
+        known = {"broken": ({"inputs": [{"id": "in_old"}], "outputs": []}, 1700000000.0)}
+
+        graph_data = dict(fetch_graph_data(mock_api_client, last_known=known.get))
+
+        self.assertEqual(graph_data["ok"]["inputs"], [{"id": "in_ok"}])
+        self.assertEqual(graph_data["broken"]["inputs"], [{"id": "in_old"}])
+        self.assertEqual(graph_data["broken"]["stale_since"], 1700000000.0)
+        self.assertTrue(graph_data["new"]["unavailable"])
+
+        # With every group failing and nothing to draw, the error is raised
+        mock_api_client.get_sources.side_effect = CircuitOpenError("down")
+        with self.assertRaises(CircuitOpenError):
+            fetch_graph_data(mock_api_client)
+
+    def test_fetch_graph_data_async_degrades_groups_that_fail(self):
+        """Test that the async fetcher degrades a group whose inputs cannot be fetched."""
+        async_client = _mock_client(["ok", "broken"], async_=True)
+
+        async def get_sources(group_id):
+            if group_id == "broken":
+                raise ConnectionError("broken is down")
+            return {"items": []}
+
+        async_client.get_sources = get_sources
+
+        graph_data = dict(asyncio.run(fetch_graph_data_async(async_client)))
+
+        self.assertNotIn("unavailable", graph_data["ok"])
+        self.assertTrue(graph_data["broken"]["unavailable"])
+
+    def test_find_paths_uses_svg_ids_of_the_graph(self):
+        """Test that path queries name the SVG elements drawn by build_graph."""
+        group_data = _empty_group(
+            inputs=[
+                {"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}]},
+                {"id": "in_2", "connections": [{"output": "out_2", "pipeline": "main"}]},
+            ],
+            outputs=[{"id": "out_1"}, {"id": "out_2"}],
+        )
+        source = build_graph([("default", group_data)]).source
+
+        paths = find_paths(build_flow_group("default", group_data), "in_1")
+
+        self.assertEqual(paths["node"], "default/in_1")
+        self.assertEqual([node["id"] for node in paths["nodes"]], ["in_1", "out_1"])
+        self.assertEqual(paths["edges"], [{"source": "in_1", "target": "out_1", "pipeline": "main",
+                                           "svg_id": "edge:default/in_1/main/out_1"}])
+        for element in paths["nodes"] + paths["edges"]:
+            self.assertIn(f'id="{element["svg_id"]}"', source)
+        self.assertEqual(len(find_paths(build_flow_group("default", group_data), "main")["edges"]), 2)
+        self.assertIsNone(find_paths(build_flow_group("default", group_data), "missing"))
+
+    def test_build_group_graphs_splits_build_graph(self):
+        """Test that per-group graphs hold the clusters of the full graph."""
+        graph_data = [("g1", _empty_group(inputs=[{"id": "in_1"}])), ("g2", _empty_group(outputs=[{"id": "out_1"}]))]
+
+        graphs = build_group_graphs(graph_data)
+        full = build_graph(graph_data)
+
+        self.assertEqual(len(graphs), 2)
+        self.assertIn("cluster_g1", graphs[0].source)
+        self.assertNotIn("cluster_g2", graphs[0].source)
+        self.assertEqual(graphs[0].graph_attr, full.graph_attr)
+        self.assertEqual(graphs[0].body + graphs[1].body[1:], full.body)
+
+    def test_iter_graph_lines_matches_build_graph(self):
+        """Test that the streamed DOT source equals the source of build_graph."""
+        graph_data = [
+            ("g1", _empty_group(inputs=[{"id": "in_1", "connections": [{"output": "out_1"}]}],
+                                outputs=[{"id": "out_1"}])),
+            ("g2", _empty_group(inputs=[{"id": "in_2", "disabled": True}])),
+        ]
+
+        with patch("graph_generator._fragment_cache", TTLCache(max_entries=8)) as cache:
+            streamed = "".join(iter_graph_lines(graph_data))
+            # Streamed fragments are emitted without being cached
+            self.assertEqual(cache.stats()["size"], 0)
+            self.assertEqual(streamed, build_graph(graph_data).source)
+
+    def test_build_graph_marks_stale_and_unavailable_groups(self):
+        """Test that late groups are drawn with a stale label or a placeholder."""
+        source = build_graph([
+            ("old", _empty_group(stale_since=0.0)),
+            ("gone", _empty_group(unavailable=True)),
+        ]).source
+
+        self.assertIn('label="old (stale, data from 1970-01-01 00:00:00 UTC)"', source)
+        self.assertIn('label="gone (no data)"', source)
+        self.assertIn("gone__unavailable", source)
+
+    def test_build_graph_json_matches_dot_attributes(self):
+        """Test that the JSON graph carries the labels and styles of the DOT graph."""
+        graph_data = [("json_group", {
+            "inputs": [
+                {"id": "in_1", "connections": [{"output": "out_1", "pipeline": "main"}, {"output": "gone"}]},
+                {"id": "in_off", "disabled": True},
+            ],
+            "outputs": [{"id": "out_1"}, {"id": "out_2"}],
+            "source_metrics": {"in_1": {"eps": 100.0}},
+            "dest_metrics": {},
+            "source_health_map": {"in_1": {"error_rate": 12}},
+            "dest_health_map": {},
+            "pipeline_metrics": {"main": {"eps": 90.0}},
+            "pipeline_complexity": {},
+        })]
+
+        graph = build_graph_json(graph_data)
+        nodes = {node["id"]: node for node in graph["nodes"]}
+
+        self.assertEqual(
+            [(cluster["id"], cluster["parent"]) for cluster in graph["clusters"]],
+            [("cluster_json_group", None), ("cluster_disabled_json_group", "cluster_json_group")],
+        )
+        self.assertEqual(nodes["json_group_in_1"]["label"], "in_1\n(100.00 EPS)")
+        self.assertEqual(nodes["json_group_in_1"]["fillcolor"], "lightcoral")
+        self.assertEqual(nodes["json_group_out_2"]["color"], "red")
+        self.assertEqual(nodes["json_group_in_off"]["parent"], "cluster_disabled_json_group")
+        self.assertEqual(nodes["json_group_gone"]["kind"], "missing")
+
+        main_edge = graph["edges"][0]
+        expected = _get_edge_attributes(90.0, 100.0)
+        self.assertEqual(main_edge["label"], "main\n(90.00 EPS)")
+        self.assertEqual((main_edge["penwidth"], main_edge["color"]), (expected["penwidth"], expected["color"]))
+        self.assertIn(f'penwidth={expected["penwidth"]}', build_graph(graph_data).source)
+
+    def test_build_summary_graph(self):
+        """Test that collapsed groups become one summary node and expanded groups are drawn in full."""
+        def group_data(error_rate):
+            return {
+                "inputs": [{"id": "in_1", "connections": [{"output": "out_1"}]}, {"id": "in_2"}],
+                "outputs": [{"id": "out_1"}],
+                "source_metrics": {"in_1": {"eps": 4.0}},
+                "dest_metrics": {},
+                "source_health_map": {"in_1": {"error_rate": error_rate}},
+                "dest_health_map": {},
+                "pipeline_metrics": {},
+                "pipeline_complexity": {},
+            }
+
+        graph_data = [("sum_a", group_data(0)), ("sum_b", group_data(15)), ("sum_c", group_data(6))]
+        source = build_summary_graph(
+            graph_data, expand=["sum_c"], group_url=lambda group_id: f"/?expand={group_id}"
+        ).source
+
+        self.assertIn("summary_sum_a", source)
+        self.assertIn("2 in / 1 out / 1 pipelines", source)
+        self.assertIn("4.00 EPS", source)
+        self.assertIn("⚠ 1 orphans", source)
+        self.assertIn('URL="/?expand=sum_b"', source)
+        self.assertRegex(source, r"summary_sum_b \[[^]]*fillcolor=lightcoral")
+        self.assertRegex(source, r"summary_sum_a \[[^]]*fillcolor=lightsteelblue")
+        # The expanded group is drawn as its cluster, without a summary node
+        self.assertNotIn("summary_sum_c", source)
+        self.assertIn("cluster_sum_c", source)
+        self.assertIn("sum_c_in_1 -> sum_c_out_1", source)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from json_stream import ItemsDecoder, decode_items
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestItemsDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [
+            {"id": f"in_{i}", "disabled": i % 2 == 0, "conf": {"port": 9000 + i}, "description": "ü€" * i}
+            for i in range(20)
+        ]
+        self.body = json.dumps({"count": 20, "items": self.items, "total": 12345}).encode("utf-8")
+
+    def test_decodes_across_any_chunking(self):
+        # Chunk boundaries split strings, numbers and multi-byte characters
+        for size in (1, 2, 3, 7, 64, len(self.body)):
+            result = decode_items(_chunks(self.body, size))
+            self.assertEqual(result, json.loads(self.body), size)
+
+    def test_keeps_only_requested_fields(self):
+        result = decode_items(_chunks(self.body, 5), fields=("id", "disabled", "missing"))
+
+        self.assertEqual(result["items"][1], {"id": "in_1", "disabled": False})
+        self.assertEqual((result["count"], result["total"]), (20, 12345))
+
+    def test_empty_responses(self):
+        self.assertEqual(decode_items([b"{}"]), {})
+        self.assertEqual(decode_items([b'{"count": 0, "items": [ ]}']), {"count": 0, "items": []})
+
+    def test_items_are_available_while_decoding(self):
+        decoder = ItemsDecoder(fields=("id",))
+        decoder.feed(b'{"items": [{"id": "a"}, {"id": "b", "x": 1}, {"id"')
+
+        self.assertEqual(decoder.items, [{"id": "a"}, {"id": "b"}])
+        decoder.feed(b': "c"}]}')
+        self.assertEqual(decoder.close()["items"], [{"id": "a"}, {"id": "b"}, {"id": "c"}])
+
+    def test_rejects_invalid_responses(self):
+        for body in (b"[1, 2]", b'{"items": [1,]}', b'{"items": [], }', b'{"count": 1', b'{"count": 1} x'):
+            with self.assertRaises(ValueError, msg=body):
+                decode_items([body])
+
+
+if __name__ == '__main__':
+    unittest.main()
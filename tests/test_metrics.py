@@ -0,0 +1,61 @@
+import unittest
+from cache import TTLCache
+from metrics import Counter, Histogram, Registry
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = Counter("requests_total", "Requests.", ("endpoint",), registry=self.registry)
+        counter.inc(endpoint="/a")
+        counter.inc(2, endpoint="/a")
+
+        self.assertEqual(counter.value(endpoint="/a"), 3)
+        self.assertIn('requests_total{endpoint="/a"} 3', self.registry.render())
+
+    def test_histogram(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1), registry=self.registry)
+        histogram.observe(0.05, stage="build")
+        histogram.observe(0.5, stage="build")
+
+        output = self.registry.render()
+
+        self.assertIn("# TYPE latency_seconds histogram", output)
+        self.assertIn('latency_seconds_bucket{stage="build",le="0.1"} 1', output)
+        self.assertIn('latency_seconds_bucket{stage="build",le="1.0"} 2', output)
+        self.assertIn('latency_seconds_bucket{stage="build",le="+Inf"} 2', output)
+        self.assertIn('latency_seconds_sum{stage="build"} 0.55', output)
+        self.assertIn('latency_seconds_count{stage="build"} 2', output)
+
+    def test_histogram_time(self):
+        histogram = Histogram("stage_seconds", "Stages.", ("stage",), registry=self.registry)
+        with histogram.time(stage="fetch"):
+            pass
+
+        self.assertEqual(histogram.count(stage="fetch"), 1)
+
+    def test_labels_must_match(self):
+        counter = Counter("errors_total", "Errors.", ("endpoint",), registry=self.registry)
+
+        with self.assertRaises(ValueError):
+            counter.inc(group="default")
+
+    def test_cache_collector(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        self.registry.register_cache("api", lambda: cache)
+        self.registry.register_cache("missing", lambda: None)
+
+        output = self.registry.render()
+
+        self.assertIn('cache_hits_total{cache="api"} 1', output)
+        self.assertIn('cache_misses_total{cache="api"} 1', output)
+        self.assertIn('cache_hit_ratio{cache="api"} 0.5', output)
+        self.assertNotIn('cache="missing"', output)
+
+if __name__ == '__main__':
+    unittest.main()
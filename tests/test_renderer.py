@@ -0,0 +1,295 @@
+import gzip
+import re
+import shutil
+import subprocess
+import unittest
+from unittest.mock import MagicMock, patch
+
+import graphviz
+
+import renderer
+from renderer import (
+    compressed_copy,
+    configure_layout_cache,
+    configure_render_backend,
+    configure_render_cache,
+    graph_fingerprint,
+    render_cache_stats,
+    render_dot_lines,
+    render_graph,
+    render_stitched_svg,
+    stitch_svgs,
+)
+
+def _mock_dot(source, engine="dot"):
+    dot = MagicMock()
+    dot.source = source
+    dot.engine = engine
+    dot.pipe.return_value = f"<svg>{source}</svg>".encode("utf-8")
+    return dot
+
+def _graphviz_svg(width, height, title):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg width="{width}pt" height="{height}pt"\n'
+        f' viewBox="0.00 0.00 {width}.00 {height}.00" xmlns="http://www.w3.org/2000/svg">\n'
+        f'<g id="graph0" class="graph"><title>{title}</title><g id="node1" class="node"></g></g>\n'
+        '</svg>\n'
+    )
+
+class TestRenderer(unittest.TestCase):
+
+    def setUp(self):
+        configure_render_cache(1024)
+        configure_layout_cache(8)
+
+    def test_graph_fingerprint(self):
+        dot = _mock_dot("digraph { a -> b }")
+
+        self.assertEqual(graph_fingerprint(dot), graph_fingerprint(_mock_dot("digraph { a -> b }")))
+        self.assertNotEqual(graph_fingerprint(dot), graph_fingerprint(dot, format="png"))
+        self.assertNotEqual(graph_fingerprint(dot), graph_fingerprint(_mock_dot("digraph { a -> b }", "neato")))
+        self.assertNotEqual(graph_fingerprint(dot), graph_fingerprint(_mock_dot("digraph { a -> c }")))
+
+    def test_render_graph_reuses_unchanged_graph(self):
+        first = _mock_dot("digraph { a -> b }")
+        second = _mock_dot("digraph { a -> b }")
+
+        self.assertEqual(render_graph(first), b"<svg>digraph { a -> b }</svg>")
+        self.assertEqual(render_graph(second), b"<svg>digraph { a -> b }</svg>")
+
+        first.pipe.assert_called_once_with(format="svg")
+        second.pipe.assert_not_called()
+        self.assertEqual(render_cache_stats()["hits"], 1)
+
+    def test_render_graph_evicts_by_size(self):
+        configure_render_cache(40)
+        render_graph(_mock_dot("digraph { a -> b }"))
+        render_graph(_mock_dot("digraph { a -> c }"))
+
+        self.assertEqual(render_cache_stats()["size"], 1)
+
+    def test_render_graph_reuses_layout_of_same_topology(self):
+        def graph(eps):
+            dot = graphviz.Digraph("G")
+            dot.node("a", label=f"a\n({eps:.2f} EPS)", color="red" if eps > 1 else "black")
+            dot.node("b")
+            dot.edge("a", "b", label=f"main\n({eps * 10:.2f} EPS)", penwidth=str(eps))
+            return dot
+
+        laid_out = 'digraph G { graph [bb="0,0,100,50"]; a [pos="20,25"]; b [pos="80,25"]; a -> b [pos="e,70,25 30,25"]; }'
+        with patch.object(graphviz.Digraph, "pipe", return_value=laid_out) as layout, \
+                patch.object(graphviz.Source, "pipe", return_value=b"<svg/>") as pinned:
+            self.assertEqual(render_graph(graph(1)), b"<svg/>")
+            self.assertEqual(render_graph(graph(2)), b"<svg/>")
+
+        # Graphs differing only in EPS values share one layout; both are rendered pinned to it
+        layout.assert_called_once_with(format="dot", encoding="utf-8")
+        self.assertEqual(renderer._layout_cache.stats()["size"], 1)
+        self.assertEqual(pinned.call_count, 2)
+        pinned.assert_called_with(format="svg", neato_no_op=2)
+
+    def test_render_graph_without_layout_cache(self):
+        configure_layout_cache(0)
+        dot = graphviz.Digraph("G")
+        dot.edge("a", "b")
+        with patch.object(graphviz.Digraph, "pipe", return_value=b"<svg/>") as pipe:
+            render_graph(dot)
+        pipe.assert_called_once_with(format="svg")
+
+    def test_compressed_copy_is_cached(self):
+        configure_render_cache(1024 * 1024)
+        data = b"<svg>" + b"<g/>" * 1000 + b"</svg>"
+
+        first = compressed_copy("etag", data, "gzip")
+        second = compressed_copy("etag", data, "gzip")
+
+        self.assertIs(first, second)
+        self.assertEqual(gzip.decompress(first), data)
+        self.assertLess(len(first), len(data))
+        with self.assertRaises(ValueError):
+            compressed_copy("etag", data, "compress")
+
+class TestRenderBackend(unittest.TestCase):
+
+    def setUp(self):
+        configure_render_cache(1024)
+        configure_layout_cache(0)
+
+    def tearDown(self):
+        configure_render_backend("subprocess")
+        configure_layout_cache(8)
+
+    def test_inprocess_backend_renders_through_pygraphviz(self):
+        dot = graphviz.Digraph("g")
+        dot.edge("a", "b")
+        binding = MagicMock()
+        binding.AGraph.return_value.draw.return_value = b"<svg>in-process</svg>"
+
+        with patch("renderer.pygraphviz", binding):
+            self.assertEqual(configure_render_backend("inprocess"), "inprocess")
+            self.assertEqual(render_graph(dot, format="svg"), b"<svg>in-process</svg>")
+
+        binding.AGraph.assert_called_once_with(string=dot.source)
+        binding.AGraph.return_value.draw.assert_called_once_with(format="svg", prog="dot")
+
+    def test_inprocess_backend_falls_back_without_pygraphviz(self):
+        dot = _mock_dot("digraph { a -> b }")
+
+        with patch("renderer.pygraphviz", None):
+            self.assertEqual(configure_render_backend("inprocess"), "subprocess")
+        render_graph(dot, format="svg")
+
+        dot.pipe.assert_called_once_with(format="svg")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            configure_render_backend("wasm")
+
+class TestRenderDotLines(unittest.TestCase):
+
+    def setUp(self):
+        configure_render_cache(1024)
+
+    def _process(self, output=b"<svg>streamed</svg>", returncode=0):
+        process = MagicMock()
+        process.stdout.read.return_value = output
+        process.wait.return_value = returncode
+        return process
+
+    def test_render_dot_lines_streams_into_graphviz(self):
+        dot = graphviz.Digraph("g")
+        dot.edge("a", "b")
+        process = self._process()
+        consumed = []
+        written = []
+
+        def lines():
+            consumed.append(True)
+            yield from dot
+
+        def popen(cmd, stdin, **kwargs):
+            written.append(stdin.read())
+            return process
+
+        with patch("renderer.subprocess.Popen", side_effect=popen) as start:
+            first = render_dot_lines(lines())
+            second = render_dot_lines(lines())
+
+        self.assertEqual(first, b"<svg>streamed</svg>")
+        self.assertEqual(second, first)
+        start.assert_called_once()
+        self.assertEqual(start.call_args[0][0], ["dot", "-Tsvg"])
+        # Each render consumes its lines once; graphviz reads them from the spool file
+        self.assertEqual(len(consumed), 2)
+        self.assertEqual(written, [dot.source.encode("utf-8")])
+
+    def test_render_dot_lines_shares_the_render_cache(self):
+        dot = graphviz.Digraph("g")
+        dot.edge("a", "b")
+        with patch("renderer.subprocess.Popen", return_value=self._process()):
+            rendered = render_dot_lines(iter(dot))
+
+        with patch.object(graphviz.Digraph, "pipe") as pipe:
+            self.assertEqual(render_graph(dot, format="svg"), rendered)
+        pipe.assert_not_called()
+
+    def test_render_dot_lines_raises_on_failure(self):
+        with patch("renderer.subprocess.Popen", return_value=self._process(b"", 1)):
+            with self.assertRaises(subprocess.CalledProcessError):
+                render_dot_lines(iter(["digraph {\n", "}\n"]))
+
+class TestStitchSvgs(unittest.TestCase):
+
+    def setUp(self):
+        configure_render_cache(1024 * 1024)
+
+    def test_stitch_svgs_places_fragments_in_rows(self):
+        fragments = [_graphviz_svg(100, 50, "a").encode("utf-8")] + [_graphviz_svg(100, 50, t) for t in "bcd"]
+
+        stitched = stitch_svgs(fragments, gap=10).decode("utf-8")
+
+        # Two of the four fit in a row 1.5 times the square root of the total area wide
+        self.assertIn('<svg x="0.00" y="0.00" width="100.00" height="50.00"', stitched)
+        self.assertIn('<svg x="110.00" y="0.00" width="100.00" height="50.00"', stitched)
+        self.assertIn('<svg x="0.00" y="60.00" width="100.00" height="50.00"', stitched)
+        self.assertIn('<svg x="110.00" y="60.00" width="100.00" height="50.00"', stitched)
+        self.assertIn('viewBox="0.00 0.00 210.00 110.00"', stitched)
+        self.assertEqual(stitched.count("<title>"), 4)
+
+    def test_stitch_svgs_keeps_ids_unique(self):
+        stitched = stitch_svgs([_graphviz_svg(10, 10, "a"), _graphviz_svg(10, 10, "b")]).decode("utf-8")
+
+        self.assertIn('id="s0_graph0"', stitched)
+        self.assertIn('id="s1_node1"', stitched)
+        self.assertNotIn('id="graph0"', stitched)
+
+    def test_stitch_svgs_rejects_other_documents(self):
+        with self.assertRaises(ValueError):
+            stitch_svgs([b"<html></html>"])
+
+    def test_render_stitched_svg_renders_each_graph(self):
+        dots = [_mock_dot(f"digraph {{ g{index} }}") for index in range(3)]
+        for index, dot in enumerate(dots):
+            dot.pipe.return_value = _graphviz_svg(10, 10, f"g{index}").encode("utf-8")
+
+        stitched = render_stitched_svg(dots, max_workers=3).decode("utf-8")
+
+        for dot in dots:
+            dot.pipe.assert_called_once_with(format="svg")
+        self.assertLess(stitched.index("<title>g0"), stitched.index("<title>g1"))
+        self.assertLess(stitched.index("<title>g1"), stitched.index("<title>g2"))
+
+@unittest.skipUnless(shutil.which("dot") and shutil.which("neato"), "Graphviz is not installed")
+class TestLayoutReuseWithGraphviz(unittest.TestCase):
+
+    def setUp(self):
+        configure_render_cache(1024 * 1024)
+        configure_layout_cache(8)
+
+    def tearDown(self):
+        configure_layout_cache(0)
+
+    @staticmethod
+    def _graph(color="black", label="in_1"):
+        dot = graphviz.Digraph("G")
+        dot.attr(rankdir="LR")
+        with dot.subgraph(name="cluster_default") as c:
+            c.attr(label="default")
+            c.node("in_1", label=label, shape="box", color=color, id="node:in_1")
+            c.node("out_1", shape="box", id="node:out_1")
+            c.edge("in_1", "out_1", label="main", penwidth="2")
+        return dot
+
+    @staticmethod
+    def _node_shape(svg, node_id):
+        match = re.search(rf'<g id="{re.escape(node_id)}" class="node">.*?points="([^"]+)"', svg.decode("utf-8"), re.S)
+        return match.group(1)
+
+    def test_recoloured_graph_keeps_the_layout(self):
+        first = render_graph(self._graph())
+        second = render_graph(self._graph(color="red"))
+
+        self.assertEqual(renderer._layout_cache.stats()["size"], 1)
+        self.assertIn(b'stroke="red"', second)
+        self.assertEqual(self._node_shape(first, "node:in_1"), self._node_shape(second, "node:in_1"))
+        self.assertEqual(self._node_shape(first, "node:out_1"), self._node_shape(second, "node:out_1"))
+
+    def test_relabelled_graph_is_laid_out_again(self):
+        first = render_graph(self._graph())
+        second = render_graph(self._graph(label="in_1 with a much longer description"))
+
+        self.assertEqual(renderer._layout_cache.stats()["size"], 2)
+        # The wider node is not squeezed into the old box
+        self.assertNotEqual(self._node_shape(first, "node:in_1"), self._node_shape(second, "node:in_1"))
+        # Same node as drawn by a plain dot render
+        configure_layout_cache(0)
+        configure_render_cache(1024 * 1024)
+        self.assertEqual(
+            self._node_shape(render_graph(self._graph(label="in_1 with a much longer description")), "node:in_1"),
+            self._node_shape(second, "node:in_1"),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure("a")
+        self.breaker.before_call("a")
+        self.breaker.record_failure("a")
+
+        self.assertEqual(self.breaker.state("a"), "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call("a")
+        # Other keys are unaffected
+        self.breaker.before_call("b")
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure("a")
+        self.breaker.record_success("a")
+        self.breaker.record_failure("a")
+
+        self.assertEqual(self.breaker.state("a"), "closed")
+
+    def test_single_probe_after_cooldown(self):
+        self.breaker.record_failure("a")
+        self.breaker.record_failure("a")
+        self.clock.now = 10
+
+        self.breaker.before_call("a")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call("a")
+
+        self.breaker.record_success("a")
+        self.assertEqual(self.breaker.state("a"), "closed")
+        self.breaker.before_call("a")
+
+    def test_failed_probe_reopens(self):
+        self.breaker.record_failure("a")
+        self.breaker.record_failure("a")
+        self.clock.now = 10
+        self.breaker.before_call("a")
+
+        self.breaker.record_failure("a")
+
+        self.assertEqual(self.breaker.state("a"), "open")
+        self.clock.now = 19
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call("a")
+
+    def test_released_probe_lets_the_next_call_probe(self):
+        self.breaker.record_failure("a")
+        self.breaker.record_failure("a")
+        self.clock.now = 10
+        self.breaker.before_call("a")
+
+        self.breaker.release_probe("a")
+
+        self.assertEqual(self.breaker.state("a"), "half_open")
+        self.breaker.before_call("a")
+
+    def test_zero_threshold_disables(self):
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(10):
+            breaker.record_failure("a")
+        breaker.before_call("a")
+        self.assertEqual(breaker.state("a"), "closed")
+
+
+class TestBackoffDelay(unittest.TestCase):
+
+    def test_exponential_ceiling_with_cap(self):
+        self.assertEqual(backoff_delay(0, 0.5, 5, rng=lambda: 1.0), 0.5)
+        self.assertEqual(backoff_delay(2, 0.5, 5, rng=lambda: 1.0), 2.0)
+        self.assertEqual(backoff_delay(10, 0.5, 5, rng=lambda: 1.0), 5)
+        self.assertEqual(backoff_delay(3, 0.5, 5, rng=lambda: 0.0), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from snapshot import Snapshot, SnapshotRefresher
+from snapshot_store import SnapshotStore
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_age(self):
+        snapshot = Snapshot("<svg/>", generated_at=100.0)
+
+        self.assertEqual(snapshot.age(now=130.0), 30.0)
+
+class TestSnapshotRefresher(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.build_svg = MagicMock(return_value="<svg>v1</svg>")
+        self.refresher = SnapshotRefresher(self.build_svg, interval=60, clock=lambda: self.now)
+
+    def test_no_snapshot_before_first_refresh(self):
+        self.assertIsNone(self.refresher.latest())
+
+    def test_refresh_publishes_snapshot(self):
+        self.assertTrue(self.refresher.refresh())
+
+        snapshot = self.refresher.latest()
+        self.assertEqual(snapshot.svg_content, "<svg>v1</svg>")
+        self.assertEqual(snapshot.generated_at, 1000.0)
+
+    def test_failed_refresh_keeps_previous_snapshot(self):
+        self.refresher.refresh()
+        self.build_svg.side_effect = Exception("API Error")
+        self.now = 1060.0
+
+        self.assertFalse(self.refresher.refresh())
+
+        self.assertEqual(self.refresher.latest().svg_content, "<svg>v1</svg>")
+        self.assertEqual(self.refresher.latest().generated_at, 1000.0)
+        self.assertEqual(str(self.refresher.last_error), "API Error")
+
+    def test_restore_from_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.refresher.store = SnapshotStore(directory)
+            self.refresher.refresh()
+
+            restarted = SnapshotRefresher(self.build_svg, interval=60, store=SnapshotStore(directory))
+            self.assertTrue(restarted.restore())
+
+            self.assertEqual(restarted.latest().svg_content, "<svg>v1</svg>")
+            self.assertEqual(restarted.latest().generated_at, 1000.0)
+            self.build_svg.assert_called_once()
+
+    def test_restore_without_store(self):
+        self.assertFalse(self.refresher.restore())
+        self.assertIsNone(self.refresher.latest())
+
+    def test_background_thread_refreshes(self):
+        refresher = SnapshotRefresher(self.build_svg, interval=60)
+        refresher.start()
+        try:
+            for _ in range(100):
+                if refresher.latest() is not None:
+                    break
+                refresher._stop.wait(0.01)
+        finally:
+            refresher.stop(timeout=1)
+
+        self.assertEqual(refresher.latest().svg_content, "<svg>v1</svg>")
+
+if __name__ == '__main__':
+    unittest.main()
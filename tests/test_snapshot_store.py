@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+
+from snapshot_store import SnapshotStore
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_artifact_round_trip(self):
+        self.assertIsNone(self.store.load_artifact("index.svg"))
+
+        self.store.save_artifact("index.svg", "<svg>v1</svg>", 100.0)
+        self.store.save_artifact("index.svg", "<svg>v1</svg>", 160.0)
+
+        self.assertEqual(self.store.load_artifact("index.svg"), (b"<svg>v1</svg>", 160.0))
+        # A new store on the same directory sees the same data, as after a restart
+        self.assertEqual(SnapshotStore(self.directory.name).load_artifact("index.svg"), (b"<svg>v1</svg>", 160.0))
+
+    def test_save_groups_replaces_previous_set(self):
+        self.store.save_groups([("g1", {"inputs": [{"id": "in_1"}]}), ("g2", {"inputs": []})], 100.0)
+        self.store.save_groups([("g3", {"inputs": []}), ("g1", {"inputs": [{"id": "in_1"}]})], 200.0)
+
+        self.assertEqual(self.store.load_groups(), [
+            ("g3", {"inputs": []}, 200.0),
+            ("g1", {"inputs": [{"id": "in_1"}]}, 200.0),
+        ])
+
+    def test_save_some_groups_keeps_the_others(self):
+        self.store.save_groups([("g1", {"inputs": []}), ("g2", {"inputs": []})], 100.0)
+        self.store.save_groups([("g3", {"inputs": []}), ("g1", {"inputs": [{"id": "in_1"}]})], 200.0, replace=False)
+
+        self.assertEqual(self.store.load_groups(), [
+            ("g1", {"inputs": [{"id": "in_1"}]}, 200.0),
+            ("g2", {"inputs": []}, 100.0),
+            ("g3", {"inputs": []}, 200.0),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import vendor_assets
+from vendor_assets import IntegrityError, download_assets, load_vendor_manifest, sri_hash
+
+
+def _fake_urlopen(url):
+    return io.BytesIO(url.encode())
+
+
+# Assets whose pinned values match the content served by _fake_urlopen
+PINNED_ASSETS = {
+    name: (url, sri_hash(url.encode())) for name, (url, _) in vendor_assets.VENDOR_ASSETS.items()
+}
+
+
+class TestVendorAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(vendor_assets, "VENDOR_ASSETS", PINNED_ASSETS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _download(self):
+        return download_assets(self.tmp.name, urlopen=_fake_urlopen)
+
+    def test_sri_hash(self):
+        # Example from the Subresource Integrity specification
+        self.assertEqual(
+            sri_hash(b"alert('Hello, world.');"),
+            "sha384-H8BRh8j48O9oYatfu5AZzq6A9RINhZO5H16dQZngK7T62em8MUt1FLm52t+eX6xO",
+        )
+
+    def test_manifest_matches_downloaded_assets(self):
+        manifest = self._download()
+
+        self.assertEqual(manifest, {name: integrity for name, (_, integrity) in PINNED_ASSETS.items()})
+        self.assertEqual(load_vendor_manifest(self.tmp.name), manifest)
+
+    def test_missing_or_altered_assets_are_rejected(self):
+        self.assertIsNone(load_vendor_manifest(self.tmp.name))
+
+        self._download()
+        with open(os.path.join(self.tmp.name, "dagre.min.js"), "ab") as f:
+            f.write(b"tampered")
+        self.assertIsNone(load_vendor_manifest(self.tmp.name))
+
+    def test_download_not_matching_its_pin_is_rejected(self):
+        tampered = dict(PINNED_ASSETS, **{"dagre.min.js": (PINNED_ASSETS["dagre.min.js"][0], sri_hash(b"other"))})
+        unpinned = dict(PINNED_ASSETS, **{"dagre.min.js": (PINNED_ASSETS["dagre.min.js"][0], None)})
+        for assets in (tampered, unpinned):
+            with patch.object(vendor_assets, "VENDOR_ASSETS", assets), self.assertRaises(IntegrityError):
+                self._download()
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_manifest_not_matching_the_pins_is_rejected(self):
+        self._download()
+        repinned = dict(PINNED_ASSETS, **{"dagre.min.js": (PINNED_ASSETS["dagre.min.js"][0], sri_hash(b"other"))})
+
+        with patch.object(vendor_assets, "VENDOR_ASSETS", repinned):
+            self.assertIsNone(load_vendor_manifest(self.tmp.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
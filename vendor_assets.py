@@ -0,0 +1,143 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Browser libraries of the client-side layout view (/?view=client): file name ->
+# (URL pinned by version, expected Subresource Integrity value). A download whose
+# content does not match the expected value is rejected. Values still None must
+# be filled in from a verified copy of the file before the asset can be vendored.
+VENDOR_ASSETS = {
+    "cytoscape.min.js": (
+        "https://unpkg.com/cytoscape@3.30.2/dist/cytoscape.min.js",
+        None,
+    ),
+    "dagre.min.js": (
+        "https://unpkg.com/dagre@0.8.5/dist/dagre.min.js",
+        None,
+    ),
+    "cytoscape-dagre.js": (
+        "https://unpkg.com/cytoscape-dagre@2.5.0/cytoscape-dagre.js",
+        None,
+    ),
+}
+
+# Served by Flask as /static/vendor/<name>
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "vendor")
+
+_MANIFEST = "manifest.json"
+
+
+class IntegrityError(Exception):
+    """
+    Raised when a downloaded asset does not match its pinned integrity value.
+    """
+
+
+def sri_hash(data):
+    """
+    Returns the Subresource Integrity value of a file's content.
+
+    Args:
+        data (bytes): The file content.
+
+    Returns:
+        str: "sha384-" followed by the base64 digest.
+    """
+    return "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode("ascii")
+
+
+def load_vendor_manifest(vendor_dir=VENDOR_DIR):
+    """
+    Returns the integrity values of the vendored assets, checked against the
+    files and the pinned values.
+
+    Args:
+        vendor_dir (str): Directory the assets were downloaded to.
+
+    Returns:
+        dict: File name -> integrity value, or None if an asset is missing or
+        does not match the manifest or its pinned value.
+    """
+    try:
+        with open(os.path.join(vendor_dir, _MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        for name, (_, integrity) in VENDOR_ASSETS.items():
+            if manifest.get(name) != integrity:
+                logger.warning("Vendored asset %s was not downloaded with its pinned integrity value", name)
+                return None
+            with open(os.path.join(vendor_dir, name), "rb") as f:
+                if sri_hash(f.read()) != integrity:
+                    logger.warning("Vendored asset %s does not match its manifest entry", name)
+                    return None
+    except (OSError, ValueError) as e:
+        logger.info("Vendored assets in %s are not installed: %s", vendor_dir, e)
+        return None
+    return {name: manifest[name] for name in VENDOR_ASSETS}
+
+
+def download_assets(vendor_dir=VENDOR_DIR, urlopen=urllib.request.urlopen):
+    """
+    Downloads the pinned assets and records their integrity values in the manifest.
+
+    Args:
+        vendor_dir (str): Directory to write the assets to.
+        urlopen (callable): Opens a URL; defaults to urllib.request.urlopen.
+
+    Returns:
+        dict: File name -> integrity value.
+
+    Raises:
+        IntegrityError: If an asset has no pinned integrity value or its content
+            does not match it. Nothing is written in that case.
+    """
+    assets = {}
+    for name, (url, integrity) in VENDOR_ASSETS.items():
+        with urlopen(url) as response:
+            data = response.read()
+        actual = sri_hash(data)
+        if integrity is None:
+            raise IntegrityError(f"{name} has no pinned integrity value; verify {url} and pin {actual}")
+        if actual != integrity:
+            raise IntegrityError(f"{url} does not match its pinned integrity value: expected {integrity}, got {actual}")
+        assets[name] = data
+        print(f"Downloaded {url} ({len(data)} bytes, {actual})")
+
+    os.makedirs(vendor_dir, exist_ok=True)
+    manifest = {}
+    for name, data in assets.items():
+        with open(os.path.join(vendor_dir, name), "wb") as f:
+            f.write(data)
+        manifest[name] = sri_hash(data)
+    with open(os.path.join(vendor_dir, _MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main(argv=None):
+    """
+    Vendors the browser libraries of the client-side layout view under static/vendor.
+    """
+    parser = argparse.ArgumentParser(description="Download the browser libraries served by /?view=client.")
+    parser.add_argument("--dir", default=VENDOR_DIR, help=f"Target directory (default: {VENDOR_DIR})")
+    parser.add_argument("--check", action="store_true", help="Only verify the vendored files against the manifest")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        if load_vendor_manifest(args.dir) is None:
+            raise SystemExit(f"Vendored assets in {args.dir} are missing or altered")
+        print(f"Vendored assets in {args.dir} match the manifest")
+        return
+    try:
+        download_assets(args.dir)
+    except IntegrityError as e:
+        raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()